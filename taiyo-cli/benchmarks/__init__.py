@@ -0,0 +1 @@
+"""Performance benchmarks for Taiyo CLI (run as ``python -m benchmarks.<name>``)."""
@@ -0,0 +1,362 @@
+"""End-to-end agent benchmark: the REPL and TUI against a mock Ollama.
+
+For every scenario a synthetic repository is generated, the mock server
+(``benchmarks.mock_ollama``) is started in its own process with the
+scenario's script, and each front-end runs the scenario's turns headlessly
+in a fresh interpreter: the REPL reads each prompt from a pipe once the
+previous turn is over (text typed during a turn is queued), output discarded, the TUI runs under Textual's ``run_test`` and the headless
+``-p`` mode runs once per prompt, as a script would. The worker reports
+
+    wall      seconds for the whole session: start-up, turns and exit
+    cpu       process CPU seconds (all threads, excluding the mock server)
+    peak      peak resident memory (MB)
+    lag       how late a 5 ms event-loop timer fires (p95 / max, ms)
+
+Each measurement is the median of ``--runs`` workers. With ``--save``
+the results become the baseline; otherwise they are compared with it and
+the benchmark exits non-zero when a metric regresses by more than
+``--threshold`` (relative, plus a small absolute allowance for noise).
+
+Scenarios:
+    explore   grep, read, symbols and glob over the repository, then an answer
+    edit      read a module, write and edit a copy, compile it with bash
+    chat      long Markdown answers, no tools (rendering path)
+
+Usage:
+    python -m benchmarks.bench_agent [files] [turns] [--runs=3] [--threshold=0.25]
+        [--frontend=repl,tui,headless] [--scenario=explore,edit,chat] [--token-delay=0]
+        [--baseline=benchmarks/agent_baseline.json] [--save]   # default: 1000 3
+"""
+from __future__ import annotations
+import asyncio
+import contextlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import make_workspace
+
+FRONTENDS = ("repl", "tui", "headless")
+# metric: absolute allowance on top of the relative threshold
+CHECKED = {"wall_s": 0.05, "cpu_s": 0.05, "peak_mb": 5.0, "lag_p95_ms": 10.0}
+LAG_INTERVAL = 0.005
+MODEL = "mock-coder:7b"
+
+WORDS = "the agent reads each module and updates the index before the next request".split()
+
+
+def _answer(words: int, code_every: int = 120) -> str:
+    """A Markdown answer of ``words`` words with a code block every ``code_every``."""
+    parts = []
+    for i in range(words):
+        parts.append(WORDS[i % len(WORDS)])
+        if i % code_every == code_every - 1:
+            parts.append(f"\n\n```python\ndef step_{i}(x):\n    return x + {i}\n```\n\n")
+    return "## Summary\n\n" + " ".join(parts)
+
+
+def _call(tool: str, **arguments) -> dict:
+    return {"tool_calls": [{"function": {"name": tool, "arguments": arguments}}]}
+
+
+def _target(files: int) -> int:
+    """A Python module in the middle of the synthetic repository."""
+    index = files // 2
+    return index - 1 if index % 5 == 4 else index
+
+
+def scenario_explore(root: str, files: int) -> list[dict]:
+    t = _target(files)
+    path = os.path.join(root, f"pkg_{t // 50}", f"mod_{t}.py")
+    return [
+        _call("grep", pattern=f"class Helper{t}\\b", path=root),
+        _call("read", file_path=path),
+        _call("symbols", name=f"Helper{t}"),
+        _call("glob", pattern="**/*.js", path=root),
+        {"content": _answer(300)},
+    ]
+
+
+def scenario_edit(root: str, files: int) -> list[dict]:
+    t = _target(files)
+    path = os.path.join(root, f"pkg_{t // 50}", f"mod_{t}.py")
+    scratch = os.path.join(root, "scratch_edit.py")
+    return [
+        _call("read", file_path=path),
+        _call("write", file_path=scratch, content=f"CONSTANT = {t}\n\n\ndef entry(arg):\n    return arg + CONSTANT\n"),
+        _call("edit", file_path=scratch, old_string="return arg + CONSTANT", new_string="return arg * CONSTANT"),
+        _call("bash", command=f"{sys.executable} -m py_compile {scratch}"),
+        {"content": _answer(120)},
+    ]
+
+
+def scenario_chat(root: str, files: int) -> list[dict]:
+    return [{"content": _answer(1500)}]
+
+
+SCENARIOS = {"explore": scenario_explore, "edit": scenario_edit, "chat": scenario_chat}
+
+
+# ---------------------------------------------------------------------------
+# Worker: runs one front-end in this process and prints its metrics as JSON
+# ---------------------------------------------------------------------------
+
+class LoopLag:
+    """Samples how late a short timer fires on the running event loop."""
+
+    def __init__(self, interval: float = LAG_INTERVAL):
+        self.interval = interval
+        self.samples: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - start - self.interval))
+
+
+def _peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def _drive_repl(config, prompts: list[str]):
+    from prompt_toolkit.application import create_app_session
+    from prompt_toolkit.input import create_pipe_input
+    from prompt_toolkit.output import DummyOutput
+
+    from src.api import OllamaClient
+    from src.main import run_repl
+
+    # Text typed during a turn is queued, so each prompt is sent once the
+    # previous turn is over, as it would be typed at the prompt
+    turns = 0
+    chat_stream = OllamaClient.chat_stream
+
+    async def counted(self, *args, **kwargs):
+        nonlocal turns
+        try:
+            async for chunk in chat_stream(self, *args, **kwargs):
+                yield chunk
+        finally:
+            turns += 1
+
+    def busy() -> bool:
+        return any(
+            t.get_coro().__name__ in ("_run_turn", "_compose_queued") for t in asyncio.all_tasks()
+        )
+
+    OllamaClient.chat_stream = counted
+    try:
+        with create_pipe_input() as pipe, create_app_session(input=pipe, output=DummyOutput()):
+            with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+                repl = asyncio.ensure_future(run_repl(config))
+                for i, prompt in enumerate(prompts):
+                    pipe.send_text(prompt + "\r")
+                    while (turns <= i or busy()) and not repl.done():
+                        await asyncio.sleep(0.001)
+                pipe.send_text("/quit\r")
+                await repl
+    finally:
+        OllamaClient.chat_stream = chat_stream
+
+
+async def _drive_tui(config, prompts: list[str]):
+    from textual.widgets import Input
+
+    from src.app import TaiyoApp
+
+    app = TaiyoApp(config=config)
+    async with app.run_test(headless=True, size=(120, 40)) as pilot:
+        await app.workers.wait_for_complete()  # client start-up and connection check
+        for prompt in prompts:
+            app.query_one("#user-input", Input).value = prompt
+            await pilot.press("enter")
+            await pilot.pause()
+            while app._is_processing or app._worker is not None:
+                await asyncio.sleep(0.005)
+        await app.client.close()
+
+
+async def _drive_headless(config, prompts: list[str]):
+    from src.headless import run_headless
+
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        for prompt in prompts:
+            await run_headless(config, prompt)
+
+
+def run_worker(frontend: str, root: str, host: str, turns: int) -> dict:
+    # Import the front-end up front; what is measured is the session itself
+    import src.api  # noqa: F401
+    import src.tools  # noqa: F401
+    if frontend == "tui":
+        import src.app  # noqa: F401
+    elif frontend == "headless":
+        import src.headless  # noqa: F401
+    else:
+        import prompt_toolkit  # noqa: F401
+        import rich.markdown  # noqa: F401
+    from src.config import Config
+
+    config = Config.from_env()
+    config.working_dir = root
+    config.ollama_host = host
+    config.model = MODEL
+    # Measure the in-process agent, not a daemon that happens to be running
+    config.use_daemon = False
+    prompts = [f"Benchmark request {i + 1}: look at Helper and report back" for i in range(turns)]
+    drive = {"repl": _drive_repl, "tui": _drive_tui, "headless": _drive_headless}[frontend]
+
+    async def session():
+        lag = LoopLag()
+        lag.start()
+        try:
+            await drive(config, prompts)
+        finally:
+            lag.stop()
+        return lag.samples
+
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    samples = asyncio.run(session())
+    wall = time.perf_counter() - wall
+    cpu = time.process_time() - cpu
+    samples_ms = sorted(s * 1000 for s in samples) or [0.0]
+    return {
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "peak_mb": _peak_rss_mb(),
+        "lag_p95_ms": samples_ms[min(len(samples_ms) - 1, int(len(samples_ms) * 0.95))],
+        "lag_max_ms": samples_ms[-1],
+    }
+
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+@contextlib.contextmanager
+def mock_server(script: dict, workdir: str):
+    path = os.path.join(workdir, "script.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(script, f)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.mock_ollama", path, "0"],
+        stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        url = proc.stdout.readline().split()[-1]
+        yield url
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def measure(frontend: str, scenario: str, files: int, turns: int, token_delay: float, root: str) -> dict:
+    script = {
+        "model": MODEL,
+        "token_delay": token_delay,
+        "turns": [SCENARIOS[scenario](root, files)],
+    }
+    with tempfile.TemporaryDirectory() as workdir, mock_server(script, workdir) as url:
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_agent", "--worker", frontend, root, url, str(turns)],
+            capture_output=True, text=True,
+        )
+    if out.returncode != 0:
+        raise RuntimeError(f"{frontend}/{scenario} worker failed:\n{out.stderr[-2000:]}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _options(argv: list[str]) -> tuple[list[str], dict[str, str]]:
+    positional, options = [], {}
+    for arg in argv:
+        if arg.startswith("--"):
+            key, _, value = arg[2:].partition("=")
+            options[key] = value
+        else:
+            positional.append(arg)
+    return positional, options
+
+
+def run(files: int, turns: int, options: dict[str, str]) -> bool:
+    runs = int(options.get("runs", 3))
+    threshold = float(options.get("threshold", 0.25))
+    token_delay = float(options.get("token-delay", 0.0))
+    frontends = options.get("frontend", ",".join(FRONTENDS)).split(",")
+    scenarios = options.get("scenario", ",".join(SCENARIOS)).split(",")
+    baseline_path = options.get("baseline", os.path.join("benchmarks", "agent_baseline.json"))
+
+    baseline: dict = {}
+    if os.path.exists(baseline_path):
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results: dict[str, dict] = {}
+    ok = True
+    print(f"repository: {files} files, {turns} turns per scenario, median of {runs} runs")
+    print(f"{'':16} {'wall s':>8} {'cpu s':>8} {'peak MB':>8} {'lag p95':>8} {'lag max':>8}")
+    with tempfile.TemporaryDirectory(prefix="taiyo-bench-agent-") as root:
+        make_workspace(root, files)
+        for scenario in scenarios:
+            for frontend in frontends:
+                key = f"{frontend}/{scenario}/{files}x{turns}"
+                samples = [measure(frontend, scenario, files, turns, token_delay, root) for _ in range(runs)]
+                result = {metric: statistics.median(s[metric] for s in samples) for metric in samples[0]}
+                results[key] = result
+                print(
+                    f"{frontend + '/' + scenario:16} {result['wall_s']:8.2f} {result['cpu_s']:8.2f} "
+                    f"{result['peak_mb']:8.1f} {result['lag_p95_ms']:8.1f} {result['lag_max_ms']:8.1f}"
+                )
+                base = baseline.get(key)
+                if base is None or "save" in options:
+                    continue
+                for metric, allowance in CHECKED.items():
+                    limit = base[metric] * (1 + threshold) + allowance
+                    if result[metric] > limit:
+                        ok = False
+                        print(f"  FAIL {metric}: {result[metric]:.3f} > {limit:.3f} (baseline {base[metric]:.3f})")
+
+    if "save" in options:
+        baseline.update(results)
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"baseline saved to {baseline_path}")
+    elif not baseline:
+        print(f"no baseline at {baseline_path}; run with --save to create one")
+    else:
+        print("ok" if ok else f"regression beyond {threshold:.0%} of the baseline")
+    return ok
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        frontend, root, host, turns = sys.argv[2:6]
+        print(json.dumps(run_worker(frontend, root, host, int(turns))))
+        return
+    positional, options = _options(sys.argv[1:])
+    files = int(positional[0]) if positional else 1000
+    turns = int(positional[1]) if len(positional) > 1 else 3
+    sys.exit(0 if run(files, turns, options) else 1)
+
+
+if __name__ == "__main__":
+    main()
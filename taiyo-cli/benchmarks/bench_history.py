@@ -0,0 +1,91 @@
+"""Benchmark the session history index: build, incremental refresh, queries.
+
+Writes synthetic session logs through ``SessionJournal`` (user prompts,
+assistant replies, bash/read tool calls and results) and measures the
+first full index, an incremental refresh after a few sessions grow, and
+``/history search`` query latency.
+
+Usage:
+    python -m benchmarks.bench_history [sessions] [messages_per_session]   # default: 2000 40
+"""
+from __future__ import annotations
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from src.api import Message
+from src.history import HistoryIndex
+from src.session import SessionJournal
+
+WORDS = (
+    "index parser cache refresh session model token stream widget config "
+    "request response handler error retry timeout build test deploy merge "
+    "branch commit schema query latency budget worker thread queue"
+).split()
+COMMANDS = ["pytest -q", "git status", "ls -la src", "make build", "npm test", "grep -rn TODO src"]
+
+
+def _sentence(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def make_sessions(root: str, sessions: int, messages: int, seed: int = 0):
+    rng = random.Random(seed)
+    for s in range(sessions):
+        journal = SessionJournal(root, session_id=f"bench_{s:05d}")
+        for m in range(messages // 4):
+            journal.record(Message(role="user", content=_sentence(rng, 12)))
+            command = f"{rng.choice(COMMANDS)} --run {s}-{m}"
+            journal.record(Message(
+                role="assistant", content="",
+                tool_calls=[{"function": {"name": "bash", "arguments": {"command": command}}}],
+            ))
+            journal.record(Message(role="tool", content=_sentence(rng, rng.choice((20, 400))), name="bash"))
+            journal.record(Message(role="assistant", content=_sentence(rng, 40)))
+        journal.flush()
+
+
+def _time(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def run(sessions: int, messages: int):
+    root = tempfile.mkdtemp(prefix="taiyo-bench-history-")
+    gen_s, _ = _time(make_sessions, root, sessions, messages)
+    print(f"sessions:           {sessions} x {messages} messages ({gen_s:.1f} s to write)")
+
+    index = HistoryIndex(root)
+    build_s, stats = _time(index.refresh)
+    print(f"cold index:         {build_s * 1000:.0f} ms ({stats['entries']} entries)")
+
+    noop_s, _ = _time(index.refresh)
+    print(f"no-op refresh:      {noop_s * 1000:.1f} ms")
+
+    for s in range(10):
+        journal = SessionJournal(root, session_id=f"bench_{s:05d}")
+        journal.record(Message(role="user", content="appended follow-up about flaky retry timeout"))
+        journal.flush()
+    inc_s, stats = _time(index.refresh)
+    print(f"append refresh:     {inc_s * 1000:.1f} ms ({stats['sessions']} sessions grew)")
+
+    queries = ["pytest", "git status", "retry timeout", "run 1234-3", "schema latency budget", "make bu"]
+    samples = []
+    for query in queries:
+        elapsed, hits = _time(index.search, query, 10)
+        samples.append(elapsed)
+        print(f"  {query!r:26} {elapsed * 1000:7.1f} ms  {len(hits)} hits")
+    print(f"search latency:     p50 {statistics.median(samples) * 1000:.1f} ms   max {max(samples) * 1000:.1f} ms")
+
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    messages = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    run(sessions, messages)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Compare generated-token cost of write, edit and apply_patch for common edits.
+
+Counts the tokens the model must generate for the tool-call JSON of each
+approach (approximate BPE count: words, punctuation and whitespace runs),
+and checks that every generated patch actually applies.
+
+Usage:
+    python -m benchmarks.bench_patch_tokens [file]   # default: src/api.py
+"""
+from __future__ import annotations
+import asyncio
+import difflib
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+from src.tools.patch_tool import ApplyPatchTool
+
+TOKEN_RE = re.compile(r"\w+|[^\w\s]|\s+")
+
+
+def approx_tokens(text: str) -> int:
+    return len(TOKEN_RE.findall(text))
+
+
+def call_tokens(name: str, arguments: dict) -> int:
+    return approx_tokens(json.dumps({"name": name, "arguments": arguments}))
+
+
+def _scenarios(lines: list[str]) -> dict[str, list[tuple[int, int, list[str]]]]:
+    """Edits as ``(start, end, replacement)`` line ranges (0-based, end exclusive)."""
+    n = len(lines)
+    mid = n // 2
+    return {
+        "one-line change": [(mid, mid + 1, [lines[mid].rstrip() + "  # changed"])],
+        "replace 10-line block": [(mid, mid + 10, [f"    replaced_{i} = {i}" for i in range(10)])],
+        "insert 5-line function": [(mid, mid, ["", "def helper(x):", "    y = x * 2", "    return y", ""])],
+        "3 scattered edits": [
+            (n // 4, n // 4 + 1, [lines[n // 4].rstrip() + "  # a"]),
+            (mid, mid + 1, [lines[mid].rstrip() + "  # b"]),
+            (3 * n // 4, 3 * n // 4 + 1, [lines[3 * n // 4].rstrip() + "  # c"]),
+        ],
+    }
+
+
+def _apply(lines: list[str], edits: list[tuple[int, int, list[str]]]) -> list[str]:
+    result = list(lines)
+    for start, end, replacement in sorted(edits, reverse=True):
+        result[start:end] = replacement
+    return result
+
+
+def _edit_calls(path: str, lines: list[str], edits) -> list[dict]:
+    """One edit call per change, with a line of context on each side for uniqueness."""
+    calls = []
+    for start, end, replacement in edits:
+        lo, hi = max(0, start - 1), min(len(lines), end + 1)
+        old = "\n".join(lines[lo:hi])
+        new = "\n".join(lines[lo:start] + replacement + lines[end:hi])
+        calls.append({"file_path": path, "old_string": old, "new_string": new})
+    return calls
+
+
+async def run(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    rel = os.path.basename(path)
+
+    print(f"file: {path} ({len(lines)} lines)")
+    print(f"{'scenario':<24}{'write':>8}{'edit':>8}{'patch':>8}   patch vs write")
+    for label, edits in _scenarios(lines).items():
+        new_lines = _apply(lines, edits)
+        write_cost = call_tokens("write", {"file_path": path, "content": "\n".join(new_lines) + "\n"})
+        edit_cost = sum(call_tokens("edit", c) for c in _edit_calls(path, lines, edits))
+        diff = "\n".join(difflib.unified_diff(
+            lines, new_lines, f"a/{rel}", f"b/{rel}", n=2, lineterm=""
+        )) + "\n"
+        patch_cost = call_tokens("apply_patch", {"patch": diff})
+
+        with tempfile.TemporaryDirectory() as tmp:
+            shutil.copy(path, os.path.join(tmp, rel))
+            result = await ApplyPatchTool(cwd=tmp).execute(patch=diff)
+            with open(os.path.join(tmp, rel), "r", encoding="utf-8") as f:
+                ok = not result.is_error and f.read().splitlines() == new_lines
+        status = "" if ok else "  (PATCH FAILED)"
+        print(
+            f"{label:<24}{write_cost:>8}{edit_cost:>8}{patch_cost:>8}"
+            f"   {patch_cost / write_cost:6.1%}{status}"
+        )
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join("src", "api.py")
+    asyncio.run(run(os.path.abspath(path)))
+
+
+if __name__ == "__main__":
+    main()
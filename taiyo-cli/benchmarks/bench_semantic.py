@@ -0,0 +1,124 @@
+"""Benchmark and check the semantic index against the mock embedding server.
+
+Builds the index for a synthetic repository through ``OllamaEmbedder``
+talking to ``benchmarks.mock_ollama``'s ``/api/embed``, then checks that
+
+* the cold build sends every chunk in batches of ``EMBED_BATCH_SIZE``;
+* a refresh with nothing changed embeds nothing;
+* editing one file re-embeds only its changed chunk;
+* a reloaded index answers without embedding anything but the query;
+* searches within ``REFRESH_INTERVAL`` do not re-scan the workspace.
+
+and reports build, refresh and query times. Exits non-zero when a check fails.
+
+Usage:
+    python -m benchmarks.bench_semantic [files] [queries]   # default: 1000 50
+"""
+from __future__ import annotations
+import asyncio
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from src import semantic
+from src.semantic import EMBED_BATCH_SIZE, OllamaEmbedder, SemanticIndex
+from .mock_ollama import MockOllama
+from .synthetic import make_workspace
+
+EMBED_MODEL = "mock-embed"
+QUERIES = ("helper class compute", "fetch the working directory", "widget constructor", "entry point")
+
+
+async def _timed(coro):
+    start = time.perf_counter()
+    result = await coro
+    return time.perf_counter() - start, result
+
+
+async def run(root: str, queries: int) -> list[str]:
+    failures = []
+
+    def check(ok: bool, message: str):
+        print(f"  {'ok  ' if ok else 'FAIL'} {message}")
+        if not ok:
+            failures.append(message)
+
+    index_dir = tempfile.mkdtemp(prefix="taiyo-bench-semantic-")
+    server = MockOllama({"model": "mock-coder:7b", "embed_dim": 256})
+    url = server.start()
+    embedder = OllamaEmbedder(url, EMBED_MODEL)
+    try:
+        index = SemanticIndex(root, embedder, EMBED_MODEL, index_dir=index_dir)
+        build_s, stats = await _timed(index.refresh())
+        chunks = stats["embedded"]
+        print(f"chunks embedded:    {chunks} in {server.embed_requests} requests")
+        print(f"cold build:         {build_s * 1000:.0f} ms")
+        print(f"index memory:       {index.nbytes / 1e6:.1f} MB")
+        check(server.embed_inputs == chunks, "every chunk sent once")
+        check(server.embed_requests == math.ceil(chunks / EMBED_BATCH_SIZE),
+              f"batched by {EMBED_BATCH_SIZE}")
+
+        before = server.embed_inputs
+        noop_s, stats = await _timed(index.refresh())
+        print(f"no-op refresh:      {noop_s * 1000:.0f} ms")
+        check(stats["embedded"] == 0 and server.embed_inputs == before, "no-op refresh embeds nothing")
+
+        # Change the first window of one file; its other chunks keep their vectors
+        target = next(
+            os.path.join(d, f) for d, _, fs in os.walk(root) for f in sorted(fs) if f.endswith(".py")
+        )
+        with open(target, "r", encoding="utf-8") as f:
+            text = f.read()
+        with open(target, "w", encoding="utf-8") as f:
+            f.write("# edited for the benchmark\n" + text)
+        before = server.embed_inputs
+        edit_s, stats = await _timed(index.refresh())
+        print(f"refresh after edit: {edit_s * 1000:.0f} ms ({stats})")
+        check(stats["embedded"] == 1 and server.embed_inputs - before == 1, "edit re-embeds one chunk")
+
+        reloaded = SemanticIndex(root, embedder, EMBED_MODEL, index_dir=index_dir)
+        before = server.embed_inputs
+        load_s, results = await _timed(reloaded.search(QUERIES[0]))
+        print(f"load + search:      {load_s * 1000:.0f} ms")
+        check(bool(results) and server.embed_inputs - before == 1, "reloaded index embeds only the query")
+
+        scans = 0
+        scan = index._scan
+
+        def counting_scan():
+            nonlocal scans
+            scans += 1
+            return scan()
+
+        index._scan = counting_scan
+        times = []
+        for i in range(queries):
+            elapsed, _ = await _timed(index.search(QUERIES[i % len(QUERIES)]))
+            times.append(elapsed)
+        ordered = sorted(times)
+        p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+        backend = "numpy" if semantic.np is not None else "pure Python"
+        print(f"search ({backend}):  p50 {statistics.median(times) * 1000:.1f} ms   p95 {p95 * 1000:.1f} ms")
+        check(scans == 0, "searches within the refresh interval do not re-scan")
+    finally:
+        await embedder.close()
+        server.stop()
+    return failures
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("-")]
+    files = int(args[0]) if args else 1000
+    queries = int(args[1]) if len(args) > 1 else 50
+    with tempfile.TemporaryDirectory(prefix="taiyo-ws-") as root:
+        make_workspace(root, files=files)
+        failures = asyncio.run(run(root, queries))
+    if failures:
+        sys.exit(f"{len(failures)} check(s) failed")
+
+
+if __name__ == "__main__":
+    main()
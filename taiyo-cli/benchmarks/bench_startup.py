@@ -0,0 +1,87 @@
+"""Startup-latency budget for the ``taiyo`` entry point.
+
+Launches ``python -m src.main --startup-profile`` repeatedly and reads the
+time until the REPL prompt is ready from the profile it prints. Also checks
+that importing the entry module stays lightweight: none of the heavy
+front-end or network packages may be imported before they are needed.
+
+Exits non-zero when the median time to prompt exceeds the budget or a heavy
+module is imported eagerly, so it can gate CI.
+
+Usage:
+    python -m benchmarks.bench_startup [runs] [budget_ms]   # default: 15 350
+"""
+from __future__ import annotations
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Must not be loaded by ``import src.main``
+HEAVY_MODULES = ("httpx", "rich", "prompt_toolkit", "textual", "src.api", "src.tools")
+
+MARK_RE = re.compile(r"^\s*([\d.]+)\s+(.+)$")
+
+
+def eager_imports() -> list[str]:
+    code = (
+        "import sys, src.main; "
+        f"print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return out.stdout.split()
+
+
+def profile_once(cwd: str) -> dict[str, float]:
+    env = {
+        **os.environ,
+        "TAIYO_CWD": cwd,
+        # Nothing listens here: the connection check fails fast
+        "OLLAMA_HOST": "http://127.0.0.1:9",
+    }
+    out = subprocess.run(
+        [sys.executable, "-m", "src.main", "--startup-profile"],
+        stdin=subprocess.DEVNULL, capture_output=True, text=True, env=env, check=True,
+    )
+    marks: dict[str, float] = {}
+    for line in out.stderr.split("Imports (ms")[0].splitlines():
+        match = MARK_RE.match(line)
+        if match:
+            marks[match.group(2)] = float(match.group(1))
+    return marks
+
+
+def run(runs: int, budget_ms: float) -> bool:
+    ok = True
+    eager = eager_imports()
+    if eager:
+        print(f"FAIL  import src.main loads heavy modules: {', '.join(eager)}")
+        ok = False
+    else:
+        print("ok    import src.main loads no heavy modules")
+
+    with tempfile.TemporaryDirectory() as cwd:
+        profile_once(cwd)  # warm the bytecode and filesystem caches
+        samples = [profile_once(cwd) for _ in range(runs)]
+
+    for mark in ("arguments parsed", "banner shown", "prompt ready", "connection checked"):
+        values = [s[mark] for s in samples if mark in s]
+        if values:
+            print(f"      {mark:20s} median {statistics.median(values):7.1f} ms   max {max(values):7.1f} ms")
+
+    ready = statistics.median(s["prompt ready"] for s in samples)
+    verdict = "ok  " if ready <= budget_ms else "FAIL"
+    print(f"{verdict}  time to prompt {ready:.1f} ms (budget {budget_ms:.0f} ms)")
+    return ok and ready <= budget_ms
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+    budget_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 350.0
+    sys.exit(0 if run(runs, budget_ms) else 1)
+
+
+if __name__ == "__main__":
+    main()
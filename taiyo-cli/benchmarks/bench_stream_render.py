@@ -0,0 +1,96 @@
+"""Benchmark per-frame render cost of streamed Markdown.
+
+Streams a synthetic ~20k-token answer with many code blocks in small deltas
+and, at a fixed frame rate, renders the accumulated response: a full
+``Markdown`` re-parse inside a Panel (old behaviour) versus
+``IncrementalMarkdown``, where each completed block is rendered once and
+only the trailing block is re-rendered per frame (as ``StreamingMessage``
+does with one widget per block).
+
+Usage:
+    python -m benchmarks.bench_stream_render [tokens] [tokens_per_frame]
+"""
+from __future__ import annotations
+import io
+import random
+import statistics
+import sys
+import time
+
+from rich.console import Console
+from rich.markdown import Markdown
+from rich.panel import Panel
+
+from src.ui.markdown_stream import IncrementalMarkdown
+
+WORDS = "the model returns a list of values from each file and we update the index".split()
+
+
+def synthetic_answer(tokens: int, seed: int = 0) -> list[str]:
+    """Return the answer as ~1-token deltas: prose, bullet lists and code blocks."""
+    rng = random.Random(seed)
+    deltas: list[str] = []
+    section = 0
+    while len(deltas) < tokens:
+        section += 1
+        deltas += [f"## Step {section}\n\n"]
+        deltas += [rng.choice(WORDS) + " " for _ in range(60)] + ["\n\n"]
+        deltas += [f"- item {i} " + " ".join(rng.choice(WORDS) for _ in range(5)) + "\n" for i in range(4)]
+        deltas += ["\n```python\n"]
+        for i in range(12):
+            deltas += ["def ", f"func_{section}_{i}", "(x):", "\n", "    return ", "x + ", f"{i}", "\n"]
+        deltas += ["```\n\n"]
+    return deltas[:tokens]
+
+
+def _render(console: Console, renderable) -> float:
+    start = time.perf_counter()
+    console.print(renderable)
+    elapsed = time.perf_counter() - start
+    console.file.seek(0)
+    console.file.truncate()
+    return elapsed
+
+
+def run(tokens: int, per_frame: int):
+    deltas = synthetic_answer(tokens)
+    console = Console(file=io.StringIO(), width=100, force_terminal=True)
+
+    full_times: list[float] = []
+    inc_times: list[float] = []
+    text = ""
+    doc = IncrementalMarkdown()
+    # Sample the naive O(n^2) path at ~40 frames so the run stays affordable
+    frames = (len(deltas) + per_frame - 1) // per_frame
+    sample_every = max(1, frames // 40)
+    for frame, start in enumerate(range(0, len(deltas), per_frame)):
+        chunk = "".join(deltas[start:start + per_frame])
+        text += chunk
+        begin = time.perf_counter()
+        for block in doc.append(chunk):
+            _render(console, block)
+        tail = doc.tail()
+        if tail is not None:
+            _render(console, tail)
+        inc_times.append(time.perf_counter() - begin)
+        if frame % sample_every == 0:
+            full_times.append(_render(console, Panel(Markdown(text), title="Taiyo", padding=(0, 1))))
+
+    print(f"tokens: {len(deltas)}  chars: {len(text)}  frames: {frames}")
+    for label, samples in (("full re-parse", full_times), ("incremental", inc_times)):
+        tail_samples = samples[-max(1, len(samples) // 10):]
+        print(
+            f"{label:<15} mean {statistics.mean(samples) * 1000:7.2f} ms"
+            f"   last 10% {statistics.mean(tail_samples) * 1000:7.2f} ms"
+            f"   max {max(samples) * 1000:7.2f} ms"
+        )
+
+
+def main():
+    tokens = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    per_frame = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    run(tokens, per_frame)
+
+
+if __name__ == "__main__":
+    main()
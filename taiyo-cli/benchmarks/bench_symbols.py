@@ -0,0 +1,67 @@
+"""Benchmark symbol index build time and query latency.
+
+Usage:
+    python -m benchmarks.bench_symbols              # synthetic 5000-file repo
+    python -m benchmarks.bench_symbols /path/to/repo
+"""
+from __future__ import annotations
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from src.symbols import SymbolIndex
+from .synthetic import make_workspace
+
+
+def _time(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def run(root: str, queries: int = 200):
+    index_path = os.path.join(tempfile.mkdtemp(prefix="taiyo-bench-"), "symbols.json")
+
+    index = SymbolIndex(root, index_path=index_path)
+    build_s, stats = _time(index.refresh)
+    print(f"files indexed:      {stats['added']}")
+    print(f"symbols:            {len(index)}")
+    print(f"cold build:         {build_s * 1000:.0f} ms")
+
+    noop_s, _ = _time(index.refresh)
+    print(f"no-op refresh:      {noop_s * 1000:.0f} ms")
+
+    reloaded = SymbolIndex(root, index_path=index_path)
+    load_s, _ = _time(reloaded.refresh)
+    print(f"load + refresh:     {load_s * 1000:.0f} ms")
+
+    names = sorted({s.name for f in index.files()[:queries] for s in index.file_symbols(f)})[:queries]
+    def_times = [_time(index.definitions, n)[0] for n in names]
+    file_times = [_time(index.file_symbols, f)[0] for f in index.files()[:queries]]
+    ref_times = [_time(index.references, n)[0] for n in names[:20]]
+
+    def report(label, samples):
+        if not samples:
+            return
+        ordered = sorted(samples)
+        p95 = ordered[int(len(ordered) * 0.95) - 1] if len(ordered) > 1 else ordered[0]
+        print(f"{label:<20}p50 {statistics.median(samples) * 1e6:8.1f} us   p95 {p95 * 1e6:8.1f} us")
+
+    report("definition query:", def_times)
+    report("file query:", file_times)
+    report("references query:", ref_times)
+
+
+def main():
+    if len(sys.argv) > 1:
+        run(os.path.abspath(sys.argv[1]))
+    else:
+        with tempfile.TemporaryDirectory(prefix="taiyo-ws-") as root:
+            make_workspace(root, files=5000)
+            run(root)
+
+
+if __name__ == "__main__":
+    main()
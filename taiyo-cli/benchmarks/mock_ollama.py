@@ -0,0 +1,355 @@
+"""A local stand-in for the Ollama HTTP API that replays scripted responses.
+
+Serves ``/api/tags``, ``/api/show`` (with the script's ``context_length``),
+``/api/chat``, streaming or not, and the empty ``/api/generate`` request
+that loads a model; other model names get a 404 like a model that was
+never pulled. ``/api/embed`` answers for any model name with deterministic
+bag-of-words vectors (``embed_dim`` wide), so texts sharing words score as
+similar; ``MockOllama.embed_requests`` / ``embed_inputs`` count its use.
+A request whose ``num_ctx`` differs from the loaded one
+counts as a reload in ``Script.loads``, as it would cost one in Ollama. Each
+chat request is answered with the next scripted assistant message, which
+may carry ``tool_calls``; a streamed answer is sent word by word and,
+like a model's, stops after ``num_predict`` tokens (one per word) or when
+the client closes the stream. Every
+generated token costs ``token_delay`` seconds and every prompt token
+``prompt_token_delay`` seconds, and the final response reports matching
+``eval_count`` / ``eval_duration`` timings, as Ollama does.
+
+A script is a JSON document::
+
+    {
+      "model": "mock-coder:7b",
+      "token_delay": 0.0,
+      "prompt_token_delay": 0.0,
+      "context_length": 32768,
+      "embed_dim": 64,
+      "turns": [                        # one list of replies per user turn
+        [{"tool_calls": [{"function": {"name": "read", "arguments": {...}}}]},
+         {"content": "Done."}]
+      ]
+    }
+
+Further models can be served, each with its own script (for routing
+between a fast and a main model)::
+
+    {"model": "mock-coder:7b", "turns": [...],
+     "models": {"mock-coder:1b": {"turns": [...]}}}
+
+A request whose last message comes from the user starts the next turn
+(turns are reused cyclically); the replies of a turn are used in order and
+the last one repeats. Instead of ``turns`` a script may hold a flat list of
+``responses`` replayed in order regardless of turns. A ``.jsonl`` file of
+recorded ``/api/chat`` responses (one per line, with ``message``) is
+replayed the same way.
+
+Usage:
+    python -m benchmarks.mock_ollama <script.json|recording.jsonl> [port]   # default port: 11435
+"""
+from __future__ import annotations
+import hashlib
+import json
+import math
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def load_script(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return {"responses": [json.loads(line) for line in f if line.strip()]}
+        return json.load(f)
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4) if text else 0
+
+
+def embed_text(text: str, dim: int) -> list[float]:
+    """Deterministic unit vector: each word adds to a hashed dimension."""
+    vector = [0.0] * dim
+    for word in re.findall(r"\w+", text.lower()):
+        digest = hashlib.md5(word.encode("utf-8")).digest()
+        vector[int.from_bytes(digest[:4], "little") % dim] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+class Script:
+    """Picks the reply for each chat request; shared by the handler threads."""
+
+    def __init__(self, script: dict):
+        self.model = script.get("model", "mock-coder:7b")
+        self.token_delay = float(script.get("token_delay", 0.0))
+        self.prompt_token_delay = float(script.get("prompt_token_delay", 0.0))
+        self.context_length = int(script.get("context_length", 32768))
+        self.embed_dim = int(script.get("embed_dim", 64))
+        self.turns = [[self._message(r) for r in turn] for turn in script.get("turns", [])]
+        self.responses = [self._message(r) for r in script.get("responses", [])]
+        if not self.turns and not self.responses:
+            self.responses = [{"role": "assistant", "content": "OK."}]
+        self.requests = 0
+        # Times the model was (re)loaded, and the num_ctx it was last loaded with
+        self.loads = 0
+        self.num_ctx = None
+        self._turn = -1
+        self._step = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _message(reply: dict) -> dict:
+        message = dict(reply.get("message", reply))
+        message.setdefault("role", "assistant")
+        message.setdefault("content", "")
+        return message
+
+    def load(self, options: dict):
+        num_ctx = (options or {}).get("num_ctx", 2048)
+        with self._lock:
+            if num_ctx != self.num_ctx:
+                self.loads += 1
+                self.num_ctx = num_ctx
+
+    def next_reply(self, messages: list[dict]) -> dict:
+        with self._lock:
+            self.requests += 1
+            if not self.turns:
+                return self.responses[(self.requests - 1) % len(self.responses)]
+            if self._turn < 0 or (messages and messages[-1].get("role") == "user"):
+                self._turn += 1
+                self._step = 0
+            turn = self.turns[self._turn % len(self.turns)]
+            reply = turn[min(self._step, len(turn) - 1)]
+            self._step += 1
+            return reply
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; don't let Nagle hold the body back
+    disable_nagle_algorithm = True
+    server: "_Server"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, data: dict, status: int = 200):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_chunk(self, data: dict):
+        line = json.dumps(data).encode("utf-8") + b"\n"
+        self.wfile.write(f"{len(line):x}\r\n".encode("ascii") + line + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [
+                {"name": model, "model": model, "size": 0, "details": {}} for model in self.server.scripts
+            ]})
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json({"error": "invalid JSON"}, 400)
+            return
+        if self.path == "/api/embed":
+            self._embed(payload)
+            return
+        if self.path not in ("/api/chat", "/api/generate", "/api/show"):
+            self._send_json({"error": "not found"}, 404)
+            return
+
+        script = self.server.scripts.get(payload.get("model", self.server.script.model))
+        if script is None:
+            self._send_json({"error": f"model '{payload['model']}' not found"}, 404)
+            return
+        if self.path == "/api/show":
+            self._send_json({
+                "details": {"family": "mock"},
+                "model_info": {"general.architecture": "mock", "mock.context_length": script.context_length},
+            })
+            return
+        script.load(payload.get("options"))
+        if self.path == "/api/generate":
+            # Only the model-loading form (no prompt) is supported
+            self._send_json({
+                "model": script.model,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "response": "",
+                "done": True,
+                "done_reason": "load",
+            })
+            return
+        messages = payload.get("messages", [])
+        reply = script.next_reply(messages)
+        prompt_tokens = sum(_estimate_tokens(m.get("content") or "") for m in messages)
+        started = time.perf_counter()
+        time.sleep(prompt_tokens * script.prompt_token_delay)
+        prompt_ns = int((time.perf_counter() - started) * 1e9)
+
+        if payload.get("stream", True):
+            limit = (payload.get("options") or {}).get("num_predict")
+            try:
+                self._stream(script, reply, prompt_tokens, prompt_ns, limit)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the client closed the stream; Ollama stops generating
+            return
+
+        eval_count = _estimate_tokens(reply["content"] + json.dumps(reply.get("tool_calls") or ""))
+        generate_start = time.perf_counter()
+        time.sleep(eval_count * script.token_delay)
+        self._send_json({
+            "model": script.model,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "message": reply,
+            "done": True,
+            "done_reason": "stop",
+            **self._timings(prompt_tokens, prompt_ns, eval_count, generate_start),
+        })
+
+    def _embed(self, payload: dict):
+        texts = payload.get("input", [])
+        if isinstance(texts, str):
+            texts = [texts]
+        with self.server.lock:
+            self.server.embed_requests += 1
+            self.server.embed_inputs += len(texts)
+        dim = self.server.script.embed_dim
+        self._send_json({
+            "model": payload.get("model", ""),
+            "embeddings": [embed_text(t, dim) for t in texts],
+            "prompt_eval_count": sum(_estimate_tokens(t) for t in texts),
+        })
+
+    def _stream(self, script: Script, reply: dict, prompt_tokens: int, prompt_ns: int, limit: int | None = None):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        generate_start = time.perf_counter()
+        eval_count = 0
+        done_reason = "stop"
+        words = reply["content"].split(" ")
+        for i, word in enumerate(words):
+            piece = word if i == len(words) - 1 else word + " "
+            if not piece:
+                continue
+            if limit and eval_count >= limit:
+                done_reason = "length"
+                break
+            time.sleep(script.token_delay)
+            eval_count += 1
+            self._send_chunk({"model": script.model, "message": {"role": "assistant", "content": piece}, "done": False})
+        if reply.get("tool_calls"):
+            eval_count += _estimate_tokens(json.dumps(reply["tool_calls"]))
+            self._send_chunk({
+                "model": script.model,
+                "message": {"role": "assistant", "content": "", "tool_calls": reply["tool_calls"]},
+                "done": False,
+            })
+        self._send_chunk({
+            "model": script.model,
+            "message": {"role": "assistant", "content": ""},
+            "done": True,
+            "done_reason": done_reason,
+            **self._timings(prompt_tokens, prompt_ns, eval_count, generate_start),
+        })
+        self.wfile.write(b"0\r\n\r\n")
+
+    @staticmethod
+    def _timings(prompt_tokens: int, prompt_ns: int, eval_count: int, generate_start: float) -> dict:
+        eval_ns = int((time.perf_counter() - generate_start) * 1e9)
+        return {
+            "total_duration": prompt_ns + eval_ns,
+            "load_duration": 0,
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": prompt_ns,
+            "eval_count": eval_count,
+            "eval_duration": eval_ns,
+        }
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    script: Script
+    # Model name -> script, the main script included
+    scripts: dict[str, Script]
+    lock: threading.Lock
+    # /api/embed requests served and texts embedded
+    embed_requests: int = 0
+    embed_inputs: int = 0
+
+
+class MockOllama:
+    """Run the mock server on a background thread: ``with MockOllama(script) as url: ...``."""
+
+    def __init__(self, script: dict, port: int = 0):
+        self.server = _Server(("127.0.0.1", port), _Handler)
+        self.server.script = Script(script)
+        self.server.scripts = {self.server.script.model: self.server.script}
+        self.server.lock = threading.Lock()
+        for name, extra in script.get("models", {}).items():
+            self.server.scripts[name] = Script({**extra, "model": name})
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def requests(self) -> int:
+        return sum(s.requests for s in self.server.scripts.values())
+
+    @property
+    def embed_requests(self) -> int:
+        return self.server.embed_requests
+
+    @property
+    def embed_inputs(self) -> int:
+        return self.server.embed_inputs
+
+    def start(self) -> str:
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> str:
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit("usage: python -m benchmarks.mock_ollama <script.json|recording.jsonl> [port]")
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 11435
+    mock = MockOllama(load_script(sys.argv[1]), port)
+    print(f"mock Ollama listening on {mock.url}", flush=True)
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mock.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Synthetic workspace generator shared by the benchmarks."""
+from __future__ import annotations
+import os
+import random
+
+PY_TEMPLATE = '''"""Module {mod}."""
+import os
+from .mod_{dep} import Helper{dep}
+
+
+CONSTANT_{mod} = {mod}
+
+
+class Helper{mod}:
+    """Helper class {mod}."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def compute_{mod}(self, x):
+        return Helper{dep}(x).value + CONSTANT_{mod}
+
+    async def fetch_{mod}(self):
+        return os.getcwd()
+
+
+def entry_{mod}(arg):
+    helper = Helper{mod}(arg)
+    return helper.compute_{mod}(arg)
+'''
+
+JS_TEMPLATE = '''import {{ entry{dep} }} from "./mod_{dep}";
+
+export class Widget{mod} {{
+  constructor(v) {{ this.v = v; }}
+}}
+
+export function entry{mod}(x) {{
+  return entry{dep}(x) + 1;
+}}
+
+export const arrow{mod} = (y) => y * {mod};
+'''
+
+
+def make_workspace(root: str, files: int = 1000, seed: int = 0) -> str:
+    """Create ``files`` source files (mostly Python, some JS) under ``root``."""
+    rng = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+    for i in range(files):
+        pkg = os.path.join(root, f"pkg_{i // 50}")
+        os.makedirs(pkg, exist_ok=True)
+        dep = rng.randrange(files)
+        if i % 5 == 4:
+            path = os.path.join(pkg, f"mod_{i}.js")
+            text = JS_TEMPLATE.format(mod=i, dep=dep)
+        else:
+            path = os.path.join(pkg, f"mod_{i}.py")
+            text = PY_TEMPLATE.format(mod=i, dep=dep)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    return root
@@ -2,14 +2,114 @@
 from __future__ import annotations
 import json
 import re
+from contextlib import aclosing, nullcontext
+
 import httpx
-from typing import Any, AsyncIterator
-from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable
+from dataclasses import dataclass, field, replace
 
 from .config import Config
+from .contextsize import ContextSizer, estimate_prompt_tokens
+from .loopguard import TurnGuard
+from .repomap import RepoMap
+from .routing import FAST_PROSE_CHARS, ModelRoute, looks_like_tool_call
+from .session import SessionJournal
+from .tracing import Tracer
 from .tools.base import BaseTool, ToolResult
 
 
+# Timing fields Ollama includes in a completed /api/chat response (ns / tokens)
+OLLAMA_TIMING_KEYS = (
+    "total_duration", "load_duration", "prompt_eval_count",
+    "prompt_eval_duration", "eval_count", "eval_duration",
+)
+
+
+class _ReplyGate:
+    """Decides which streamed reply text can be shown while it arrives.
+
+    Models without native tool calling write the call as JSON, alone or
+    after some prose, possibly in a code fence. Text is released line by
+    line; a region that opens a ``{`` or a fence is held until it closes,
+    and released only if it does not parse as a tool call. Once a tool
+    call has been seen, nothing more is released.
+    """
+
+    def __init__(self, is_tool_call: Callable[[str], Any]):
+        self._is_tool_call = is_tool_call
+        self.text = ""
+        self._released = 0
+        self._scan = 0  # start of the first unprocessed line
+        self._hold: int | None = None
+        self._fence = False
+        self._depth = 0
+        self._tool_call = False
+
+    def feed(self, delta: str) -> str:
+        """Add streamed text; return the part that can be shown now."""
+        if not delta or self._tool_call:
+            self.text += delta
+            return ""
+        self.text += delta
+        text = self.text
+        while (newline := text.find("\n", self._scan)) >= 0:
+            self._line(self._scan, newline + 1)
+            self._scan = newline + 1
+            if self._tool_call:
+                return self._release(self._released)
+        safe = self._scan if self._hold is None else self._hold
+        if self._hold is None:
+            partial = text[self._scan:]
+            if "{" not in partial and not partial.lstrip().startswith("`"):
+                safe = len(text)
+        return self._release(safe)
+
+    def _line(self, start: int, end: int):
+        line = self.text[start:end]
+        stripped = line.strip()
+        if self._hold is None:
+            if stripped.startswith("```"):
+                self._hold, self._fence = max(start, self._released), True
+                return
+            if "{" not in line:
+                return
+            self._hold, self._fence, self._depth = max(start, self._released), False, 0
+        elif self._fence:
+            if stripped.startswith("```"):
+                self._close(end)
+            return
+        self._depth += line.count("{") - line.count("}")
+        if self._depth <= 0:
+            self._close(end)
+
+    def _close(self, end: int):
+        if self._is_tool_call(self.text[self._hold:end]):
+            self._tool_call = True
+        else:
+            self._hold = None
+
+    def _release(self, upto: int) -> str:
+        if upto <= self._released:
+            return ""
+        piece = self.text[self._released:upto]
+        self._released = upto
+        return piece
+
+    @property
+    def tool_call(self) -> bool:
+        """A complete tool call has been seen in the text."""
+        return self._tool_call
+
+    @property
+    def prose(self) -> int:
+        """Characters released as plain text, if no possible tool call is open; else 0."""
+        return self._released if self._hold is None else 0
+
+    def rest(self) -> str:
+        """Everything not released yet (the reply turned out not to be a tool call)."""
+        return self._release(len(self.text))
+
+
 @dataclass
 class Message:
     role: str  # "system", "user", "assistant", "tool"
@@ -22,12 +122,22 @@ class Message:
 class OllamaClient:
     """Client for Ollama API with tool calling."""
 
-    def __init__(self, config: Config, tools: list[BaseTool]):
+    # Front-ends drive a daemon-held conversation through ``daemon.RemoteClient``
+    remote = False
+
+    def __init__(self, config: Config, tools: list[BaseTool], http_client: httpx.AsyncClient | None = None):
         self.config = config
         self.tools = {t.name: t for t in tools}
         self.messages: list[Message] = []
-        self.client = httpx.AsyncClient(timeout=300.0)
-        self._max_tool_rounds = 15
+        # A shared connection pool (batch mode) is closed by its owner
+        self._owns_http = http_client is None
+        self.client = http_client or httpx.AsyncClient(timeout=300.0)
+        self.repo_map: RepoMap | None = None
+        self.journal: SessionJournal | None = None
+        self.tracer: Tracer | None = None
+        # Map snapshot used for the whole turn so the prompt prefix stays stable
+        self._context_map = ""
+        self.context = ContextSizer(config)
 
     def _build_tools_schema(self) -> list[dict]:
         return [t.to_api_schema() for t in self.tools.values()]
@@ -36,6 +146,8 @@ class OllamaClient:
         # Inject working directory into system prompt
         system_content = self.config.system_prompt
         system_content += f"\n\n## CURRENT CONTEXT\n- Working directory: {self.config.working_dir}\n- When using file paths, use this as the base directory.\n"
+        if self._context_map:
+            system_content += f"\n## REPOSITORY MAP\n{self._context_map}\n"
         msgs = [{"role": "system", "content": system_content}]
         for m in self.messages:
             msg: dict[str, Any] = {"role": m.role, "content": m.content}
@@ -130,135 +242,272 @@ class OllamaClient:
         self, user_message: str
     ) -> AsyncIterator[dict[str, Any]]:
         """Send a message and stream the response, handling tool calls."""
-        self.messages.append(Message(role="user", content=user_message))
-
-        tool_rounds = 0
-        while tool_rounds < self._max_tool_rounds:
-            tool_rounds += 1
-            response_text = ""
-            tool_calls = []
-
-            # Use non-streaming for reliable tool call detection
-            response_data = await self._request()
-            msg_data = response_data.get("message", {})
-            response_text = msg_data.get("content", "")
-
-            # Check for proper tool_calls field first (native Ollama tool calling)
-            if msg_data.get("tool_calls"):
-                tool_calls = msg_data["tool_calls"]
-            else:
-                # Try to parse tool calls from text content
-                parsed = self._try_parse_tool_call(response_text)
-                if parsed:
-                    tool_calls = [{"function": parsed}]
-                else:
-                    # Regular text response - yield it
-                    if response_text:
-                        yield {"type": "text", "content": response_text}
-
-            # Save assistant message
-            self.messages.append(
-                Message(
-                    role="assistant",
-                    content=response_text,
-                    tool_calls=tool_calls if tool_calls else None,
+        self._append(Message(role="user", content=user_message))
+        if self.repo_map:
+            self._context_map = self.repo_map.text
+
+        # Tool calls of the last assistant message that have no result yet
+        pending: list[str] = []
+        guard = TurnGuard(self.config.max_tool_rounds, self.config.max_tool_rounds_cap)
+        route = ModelRoute(self.config)
+        saved = 0
+        turn_start = self.tracer.now_us() if self.tracer else 0.0
+        try:
+            tool_rounds = 0
+            while tool_rounds < guard.budget:
+                tool_rounds += 1
+                response_text, tool_calls = "", []
+                async for event in self._next_reply(route):
+                    if event["type"] == "reply":
+                        response_text, tool_calls = event["content"], event["tool_calls"]
+                    else:
+                        # Text deltas and notices
+                        yield event
+
+                # Save assistant message
+                self._append(
+                    Message(
+                        role="assistant",
+                        content=response_text,
+                        tool_calls=tool_calls if tool_calls else None,
+                    )
                 )
-            )
 
-            # If no tool calls, we're done
-            if not tool_calls:
-                break
+                # If no tool calls, we're done
+                if not tool_calls:
+                    break
+                pending = [tc.get("function", tc).get("name", "") for tc in tool_calls]
 
-            # Execute tool calls
-            for tc in tool_calls:
-                func = tc.get("function", tc)
-                tool_name = func.get("name", "")
-                arguments = func.get("arguments", {})
+                # Execute tool calls
+                for tc in tool_calls:
+                    func = tc.get("function", tc)
+                    tool_name = func.get("name", "")
+                    arguments = func.get("arguments", {})
+
+                    if isinstance(arguments, str):
+                        try:
+                            arguments = json.loads(arguments)
+                        except json.JSONDecodeError:
+                            arguments = {}
 
-                if isinstance(arguments, str):
-                    try:
-                        arguments = json.loads(arguments)
-                    except json.JSONDecodeError:
-                        arguments = {}
-
-                yield {
-                    "type": "tool_call",
-                    "name": tool_name,
-                    "arguments": arguments,
-                }
-
-                # Execute the tool
-                tool = self.tools.get(tool_name)
-                if tool:
-                    result = await tool.execute(**arguments)
                     yield {
-                        "type": "tool_result",
+                        "type": "tool_call",
                         "name": tool_name,
-                        "result": result,
+                        "arguments": arguments,
                     }
-                    self.messages.append(
+
+                    # Execute the tool, unless the call would only repeat itself
+                    note = ""
+                    tool = self.tools.get(tool_name)
+                    refusal = guard.check(tool_name, arguments)
+                    if refusal:
+                        result = ToolResult(error=refusal, is_error=True)
+                    else:
+                        if tool:
+                            with self._span(tool_name, "tool"):
+                                result = await tool.execute(**arguments)
+                        else:
+                            result = ToolResult(
+                                error=f"Unknown tool: {tool_name}", is_error=True
+                            )
+                        note = guard.record(tool_name, arguments, result.output, result.error)
+                    self._append(
                         Message(
                             role="tool",
-                            content=result.to_text(),
+                            content=result.to_text() + note,
                             name=tool_name,
                         )
                     )
-                else:
-                    error_result = ToolResult(
-                        error=f"Unknown tool: {tool_name}", is_error=True
-                    )
+                    pending.pop(0)
                     yield {
                         "type": "tool_result",
                         "name": tool_name,
-                        "result": error_result,
+                        "result": result,
                     }
-                    self.messages.append(
-                        Message(
-                            role="tool",
-                            content=error_result.to_text(),
-                            name=tool_name,
-                        )
-                    )
 
-    async def _request(self) -> dict:
-        """Make a non-streaming request to Ollama for reliable tool calling."""
-        url = f"{self.config.ollama_host}/api/chat"
-        payload = {
-            "model": self.config.model,
-            "messages": self._build_messages(),
-            "stream": False,
-            "tools": self._build_tools_schema(),
-            "options": {
-                "temperature": self.config.temperature,
-                "num_predict": self.config.max_tokens,
-            },
-        }
-
-        resp = await self.client.post(url, json=payload)
-        resp.raise_for_status()
-        return resp.json()
-
-    async def _stream_request(self) -> AsyncIterator[dict]:
-        """Make a streaming request to Ollama."""
+                guard.end_round(tool_rounds)
+                if guard.strikes:
+                    # A stuck fast model hands the rest of the turn over
+                    route.escalate(guard.reason)
+                if guard.stuck:
+                    # Every further round would most likely be wasted as well
+                    saved = guard.budget - tool_rounds
+                    yield {"type": "loop", "reason": guard.reason, "rounds": tool_rounds, "saved": saved}
+                    break
+            else:
+                # Still calling tools when the round budget ran out
+                yield {"type": "round_limit", "rounds": tool_rounds}
+        finally:
+            # A cancelled turn must not leave assistant tool calls unanswered,
+            # or the next request would carry a malformed history
+            for tool_name in pending:
+                self._append(
+                    Message(role="tool", content="Error: Cancelled by user", name=tool_name)
+                )
+            # Pick up any files the turn created or edited before the next one
+            if self.repo_map:
+                self.repo_map.refresh()
+            if self.tracer:
+                self.tracer.add("turn", "agent", turn_start, self.tracer.now_us() - turn_start, {
+                    "rounds": tool_rounds, "budget": guard.budget, "extensions": guard.extensions,
+                    "stuck": guard.stuck, "rounds_saved": saved, "escalation": route.escalation,
+                })
+                self.tracer.flush()
+
+    def _span(self, name: str, cat: str, **args):
+        if self.tracer:
+            return self.tracer.span(name, cat, **args)
+        return nullcontext(args)
+
+    async def _next_reply(self, route: ModelRoute) -> AsyncIterator[dict]:
+        """Run one round on the model ``route`` picks.
+
+        Yields the events of the request whose reply is shown (text deltas,
+        context warnings), then a ``reply`` event with its full text and
+        tool calls.
+        """
+        model = route.tool_model()
+        if model == self.config.model:
+            async for event in self._ask(model):
+                yield event
+            return
+        start = self.tracer.now_us() if self.tracer else 0.0
+        reply: dict = {}
+        async for event in self._ask(model, "tool", show=False, stop_early=True):
+            if event["type"] == "reply":
+                reply = event
+            else:
+                yield event
+        text, tool_calls = reply["content"], reply["tool_calls"]
+        unknown = [tc for tc in tool_calls if tc.get("function", tc).get("name") not in self.tools]
+        if unknown or (not tool_calls and looks_like_tool_call(text)):
+            route.escalate(f"invalid tool call from {model}")
+            self._discarded(model, start, reply)
+            async for event in self._ask(self.config.model, "escalation"):
+                yield event
+        elif not tool_calls:
+            # Done with tools: the main model writes the answer
+            self._discarded(model, start, reply)
+            async for event in self._ask(self.config.model, "answer"):
+                yield event
+        else:
+            yield reply
+
+    def _discarded(self, model: str, start_us: float, reply: dict):
+        """Trace a fast-model request whose reply was thrown away (routing cost)."""
+        if self.tracer:
+            self.tracer.add("discarded", "model", start_us, self.tracer.now_us() - start_us, {
+                "model": model, "eval_count": reply.get("eval_count", 0),
+            })
+
+    async def _ask(
+        self, model: str, route: str = "", show: bool = True, stop_early: bool = False,
+    ) -> AsyncIterator[dict]:
+        """One model request: text deltas as they stream in (if ``show``), then a ``reply`` event.
+
+        With ``stop_early`` (fast-model rounds) the request is closed once
+        the reply is decided; see ``routing``.
+        """
+        gate = _ReplyGate(self._try_parse_tool_call)
+        tool_calls: list[dict] = []
+        eval_count = 0
+        async with aclosing(self._request(model, route)) as stream:
+            async for data in stream:
+                # Ollama streams one token per chunk until the final count arrives
+                eval_count = data.get("eval_count", eval_count + 1)
+                warning = self.context.take_warning()
+                if warning:
+                    yield warning
+                message = data.get("message") or {}
+                # Native Ollama tool calling
+                tool_calls.extend(message.get("tool_calls") or [])
+                delta = gate.feed(message.get("content") or "")
+                if delta and show and not tool_calls:
+                    yield {"type": "text", "content": delta}
+                if stop_early and (tool_calls or gate.tool_call or gate.prose >= FAST_PROSE_CHARS):
+                    break
+
+        response_text = gate.text
+        if not tool_calls:
+            # Try to parse tool calls from text content
+            with self._span("parse", "agent"):
+                parsed = self._try_parse_tool_call(response_text)
+            if parsed:
+                tool_calls = [{"function": parsed}]
+            elif show and gate.rest():
+                yield {"type": "text", "content": gate.rest()}
+        yield {"type": "reply", "content": response_text, "tool_calls": tool_calls, "eval_count": eval_count}
+
+    def _keep_alive(self) -> dict:
+        return {"keep_alive": self.config.keep_alive} if self.config.keep_alive else {}
+
+    async def _request(
+        self, model: str | None = None, route: str = "",
+    ) -> AsyncIterator[dict]:
+        """Stream one chat request to Ollama; yield its response chunks."""
+        model = model or self.config.model
         url = f"{self.config.ollama_host}/api/chat"
+        messages = self._build_messages()
+        tools = self._build_tools_schema()
+        num_ctx = await self.context.num_ctx(self.client, model, estimate_prompt_tokens(messages, tools))
         payload = {
-            "model": self.config.model,
-            "messages": self._build_messages(),
+            "model": model,
+            "messages": messages,
             "stream": True,
+            "tools": tools,
             "options": {
                 "temperature": self.config.temperature,
                 "num_predict": self.config.max_tokens,
+                "num_ctx": num_ctx,
             },
+            **self._keep_alive(),
         }
 
-        async with self.client.stream("POST", url, json=payload) as response:
-            response.raise_for_status()
-            async for line in response.aiter_lines():
-                if line.strip():
+        start = self.tracer.now_us() if self.tracer else 0.0
+        first_token = 0.0
+        final: dict = {}
+        chunks = 0
+
+        def trace(stopped: bool = False):
+            if not self.tracer:
+                return
+            duration = self.tracer.now_us() - start
+            timings = {key: final[key] for key in OLLAMA_TIMING_KEYS if key in final}
+            args = {
+                "model": model, **({"route": route} if route else {}), "num_ctx": num_ctx,
+                "first_chunk_ms": round((first_token - start) / 1000, 1) if first_token else None,
+                **({"stopped": True, "eval_count": chunks} if stopped else {}),
+                **timings,
+            }
+            self.tracer.add("request", "model", start, duration, args)
+            self.tracer.add_model_phases(start, duration, final)
+
+        async with self.client.stream("POST", url, json=payload) as resp:
+            if resp.is_error:
+                await resp.aread()  # for the error detail
+                resp.raise_for_status()
+            try:
+                async for line in resp.aiter_lines():
+                    if not line.strip():
+                        continue
                     try:
-                        yield json.loads(line)
+                        data = json.loads(line)
                     except json.JSONDecodeError:
                         continue
+                    if data.get("error"):
+                        raise RuntimeError(f"Ollama error: {data['error']}")
+                    if not first_token and self.tracer:
+                        first_token = self.tracer.now_us()
+                    chunks += 1
+                    if data.get("done"):
+                        final = data
+                    yield data
+            except GeneratorExit:
+                # Closed by the caller once a fast-model reply is decided;
+                # closing the response stops the generation on the server
+                trace(stopped=True)
+                raise
+        trace()
 
     async def check_connection(self) -> bool:
         """Check if Ollama is running and model is available."""
@@ -275,6 +524,24 @@ class OllamaClient:
         except Exception:
             return False
 
+    async def preload(self):
+        """Load the main and fast models into Ollama's memory before they are needed.
+
+        Each is loaded with the ``num_ctx`` the current conversation needs, so
+        the first request does not load it a second time.
+        """
+        models = [self.config.model] + ([self.config.fast_model] if self.config.fast_model else [])
+        prompt_tokens = estimate_prompt_tokens(self._build_messages(), self._build_tools_schema())
+        for model in dict.fromkeys(models):
+            try:
+                num_ctx = await self.context.num_ctx(self.client, model, prompt_tokens)
+                await self.client.post(
+                    f"{self.config.ollama_host}/api/generate",
+                    json={"model": model, "options": {"num_ctx": num_ctx}, **self._keep_alive()},
+                )
+            except httpx.HTTPError:
+                pass
+
     async def list_models(self) -> list[str]:
         """List available Ollama models."""
         try:
@@ -286,9 +553,47 @@ class OllamaClient:
         except Exception:
             return []
 
+    def _append(self, message: Message):
+        self.messages.append(message)
+        if self.journal:
+            self.journal.record(message)
+
     def clear_history(self):
         """Clear conversation history."""
         self.messages.clear()
+        if self.journal:
+            self.journal.reset()
+
+    def replace_history(self, messages: list[Message]):
+        """Swap in a new history (compaction) and journal it as a snapshot."""
+        self.messages = list(messages)
+        if self.journal:
+            self.journal.snapshot(self.messages)
+
+    def evict_tool_output(self, keep_turns: int = 2, min_chars: int = 1024) -> int:
+        """Stub out large tool results older than the last ``keep_turns`` turns.
+
+        The full output stays in the session journal. Returns the number of
+        characters dropped from the in-memory history.
+        """
+        user_turns = [i for i, m in enumerate(self.messages) if m.role == "user"]
+        if len(user_turns) <= keep_turns:
+            return 0
+        cutoff = user_turns[-keep_turns] if keep_turns else len(self.messages)
+        freed = 0
+        messages = list(self.messages)
+        for i, m in enumerate(messages[:cutoff]):
+            if m.role == "tool" and len(m.content) > min_chars:
+                freed += len(m.content)
+                messages[i] = replace(
+                    m, content=f"[{m.name or 'tool'} output of {len(m.content)} characters evicted from memory]"
+                )
+        if freed:
+            self.replace_history(messages)
+        return freed
 
     async def close(self):
-        await self.client.aclose()
+        if self.journal:
+            await self.journal.close()
+        if self._owns_http:
+            await self.client.aclose()
@@ -1,46 +1,29 @@
 """Taiyo CLI - TUI Application using Textual."""
 from __future__ import annotations
-import os
 import asyncio
 import time
-from datetime import datetime
 
 from textual import on, work
 from textual.app import App, ComposeResult
 from textual.binding import Binding
-from textual.containers import Vertical, VerticalScroll, Horizontal
+from textual.containers import Vertical, Horizontal
 from textual.css.query import NoMatches
-from textual.widgets import (
-    Header,
-    Footer,
-    Static,
-    Input,
-    TextArea,
-    Label,
-    RichLog,
-    LoadingIndicator,
-)
-from textual.message import Message as TextualMessage
+from textual.widgets import Header, Static, Input
 from textual.timer import Timer
+from textual.worker import Worker
 
 from rich.markdown import Markdown
 from rich.panel import Panel
-from rich.syntax import Syntax
 from rich.text import Text
-from rich.table import Table
-from rich.align import Align
 
 from .config import Config
-from .api import OllamaClient
-from .tools import (
-    BashTool,
-    ReadTool,
-    WriteTool,
-    EditTool,
-    GrepTool,
-    GlobTool,
-    WebSearchTool,
-)
+from .input_queue import InputQueue
+from .memory import MemoryMonitor, format_bytes
+from .startup import StartupProfile
+from .tracing import Tracer
+from .ui.markdown_stream import IncrementalMarkdown
+from .ui.transcript import Transcript, TranscriptRecord
+from .ui.animation import AnimationClock
 
 LOGO = r"""
  ___________  _____  ___  __   __  _____
@@ -118,21 +101,32 @@ THINKING_BRAIN_FRAMES = [
 
 
 class ThinkingWidget(Static):
-    """Animated thinking indicator widget."""
+    """Animated thinking indicator widget.
 
-    def __init__(self, **kwargs):
+    A single instance is reused for the whole session: ``start()`` shows it
+    and subscribes to the app's shared animation clock, ``stop()`` hides it
+    and unsubscribes, so nothing ticks while it is hidden.
+    """
+
+    def __init__(self, clock: AnimationClock, **kwargs):
         super().__init__(**kwargs)
+        self._clock = clock
         self._frame = 0
         self._start_time = time.time()
-        self._timer: Timer | None = None
         self._phase = "thinking"  # thinking, tool_exec
+        self.display = False
 
-    def on_mount(self):
-        self._timer = self.set_interval(0.3, self._animate)
+    def start(self, phase: str = "thinking"):
+        if not self.display:
+            self._frame = 0
+            self._start_time = time.time()
+        self._phase = phase
+        self.display = True
+        self._clock.subscribe(self._animate)
         self._render_frame()
 
-    def _animate(self):
-        self._frame = (self._frame + 1) % len(THINKING_FRAMES)
+    def _animate(self, frame: int):
+        self._frame = frame % len(THINKING_FRAMES)
         self._render_frame()
 
     def _render_frame(self):
@@ -187,9 +181,8 @@ class ThinkingWidget(Static):
         self._render_frame()
 
     def stop(self):
-        if self._timer:
-            self._timer.stop()
-            self._timer = None
+        self._clock.unsubscribe(self._animate)
+        self.display = False
 
 
 class ChatMessage(Static):
@@ -243,43 +236,123 @@ class ChatMessage(Static):
             widget.update(panel)
 
 
-class StreamingMessage(Static):
-    """Widget that displays streaming assistant response."""
+class StreamingMessage(Vertical):
+    """Widget that displays streaming assistant response.
+
+    Completed Markdown blocks are mounted as their own widgets and never
+    re-rendered; only the trailing block is re-parsed, at most once per frame.
+    A finished reply stays in the transcript as this widget; ``text``
+    rebuilds it, parsed again, after it was scrolled out.
+    """
+
+    DEFAULT_CSS = """
+    StreamingMessage {
+        height: auto;
+        border: round green;
+        border-title-align: left;
+        padding: 0 1;
+        margin: 0 0 1 0;
+    }
+
+    StreamingMessage > Static {
+        height: auto;
+    }
+
+    StreamingMessage > .md-block {
+        margin: 0 0 1 0;
+    }
+    """
+
+    # Incoming deltas are coalesced and rendered at most this often (seconds)
+    FRAME_INTERVAL = 1 / 15
 
-    def __init__(self, **kwargs):
+    def __init__(self, tracer: Tracer | None = None, text: str | None = None, **kwargs):
         super().__init__(**kwargs)
-        self._text = ""
+        self._tracer = tracer
+        self._doc = IncrementalMarkdown()
+        # Every completed block, parsed once while this widget lives
+        self.blocks: list[Markdown] = []
+        if text is not None:
+            self.blocks = self._doc.append(text) + self._doc.finish()
+        self._pending: list[Markdown] = []
+        self._frame_timer: Timer | None = None
+        if text is None:
+            self.border_title = "[bold green]Taiyo[/] [dim italic]typing...[/]"
+        else:
+            self.border_title = "[bold green]Taiyo[/]"
+
+    def compose(self) -> ComposeResult:
+        for block in self.blocks:
+            yield Static(block, classes="md-block")
+        yield Static(id="stream-tail")
+
+    def on_mount(self):
+        # Text may arrive (and even finish) before the widget is mounted
+        self._render_frame()
 
     def append_text(self, text: str):
-        self._text += text
+        completed = self._doc.append(text)
+        self.blocks.extend(completed)
+        self._pending.extend(completed)
+        if self._frame_timer is None:
+            self._frame_timer = self.set_timer(self.FRAME_INTERVAL, self._render_frame)
+
+    def _render_frame(self):
+        if self._tracer:
+            with self._tracer.span("render", "ui", blocks=len(self._pending)):
+                self._draw()
+        else:
+            self._draw()
+
+    def _draw(self):
+        self._frame_timer = None
         try:
-            md = Markdown(self._text)
-            panel = Panel(
-                md,
-                title="[bold green]Taiyo[/] [dim italic]typing...[/]",
-                border_style="green",
-                padding=(0, 1),
+            tail = self.query_one("#stream-tail", Static)
+        except NoMatches:
+            return
+        if self._pending:
+            self.mount_all(
+                [Static(block, classes="md-block") for block in self._pending],
+                before=tail,
             )
-            self.update(panel)
-        except Exception:
-            self.update(self._text)
+            self._pending = []
+        md = self._doc.tail()
+        tail.update(md if md is not None else "")
 
     def finalize(self):
-        try:
-            md = Markdown(self._text)
-            panel = Panel(
-                md,
-                title="[bold green]Taiyo[/]",
-                border_style="green",
-                padding=(0, 1),
-            )
-            self.update(panel)
-        except Exception:
-            self.update(self._text)
+        if self._frame_timer:
+            self._frame_timer.stop()
+            self._frame_timer = None
+        completed = self._doc.finish()
+        self.blocks.extend(completed)
+        self._pending.extend(completed)
+        self.border_title = "[bold green]Taiyo[/]"
+        self._render_frame()
 
     @property
     def text(self) -> str:
-        return self._text
+        return self._doc.text
+
+
+class QueuePanel(Static):
+    """Lists messages waiting for the current turn to finish."""
+
+    def show(self, queue: InputQueue):
+        items = list(queue)
+        self.display = bool(items)
+        if not items:
+            return
+        text = Text()
+        text.append(f" Queued ({len(items)})", style="bold yellow")
+        text.append("  Up: edit last  /queue: manage\n", style="dim")
+        for i, item in enumerate(items, 1):
+            line = item.replace("\n", " ")
+            if len(line) > 100:
+                line = line[:97] + "..."
+            text.append(f"  {i}. ", style="bold")
+            text.append(line + "\n")
+        text.rstrip()
+        self.update(text)
 
 
 class TaiyoApp(App):
@@ -311,6 +384,14 @@ class TaiyoApp(App):
         width: 1fr;
     }
 
+    #queue-panel {
+        dock: bottom;
+        height: auto;
+        max-height: 8;
+        padding: 0 1;
+        background: $surface-darken-1;
+    }
+
     #status-bar {
         dock: bottom;
         height: 1;
@@ -341,50 +422,96 @@ class TaiyoApp(App):
         height: auto;
         margin: 0 1;
     }
-
-    LoadingIndicator {
-        height: 1;
-    }
     """
 
     BINDINGS = [
         Binding("ctrl+c", "quit", "Quit", show=True),
         Binding("ctrl+l", "clear_chat", "Clear", show=True),
         Binding("escape", "cancel", "Cancel", show=False),
+        Binding("up", "edit_queued", "Edit queued", show=False),
     ]
 
-    def __init__(self, config: Config | None = None):
+    def __init__(
+        self,
+        config: Config | None = None,
+        profile: StartupProfile | None = None,
+        profile_only: bool = False,
+    ):
         super().__init__()
         self.config = config or Config.from_env()
+        self._profile = profile or StartupProfile()
+        self._profile_only = profile_only
         self._is_processing = False
+        self._queue = InputQueue(merge=self.config.merge_queued)
         self._current_stream: StreamingMessage | None = None
-        self._thinking_widget: ThinkingWidget | None = None
-        self._init_tools()
+        self._worker: Worker | None = None
+        self._animation_clock = AnimationClock(interval=0.3)
+        self._thinking_widget = ThinkingWidget(self._animation_clock)
+        self._memory = MemoryMonitor(
+            limit_bytes=self.config.memory_limit_mb * 1024 * 1024,
+            interval=self.config.memory_sample_interval,
+            on_limit=self._evict,
+        )
+        self.client = None
+        # Runs the session commands: ``SessionCommands``, or the ``RemoteClient`` itself
+        self._session = None
+        self.tool_instances = []
+        self._backend: asyncio.Future | None = None
 
     def _init_tools(self):
-        self.tool_instances = [
-            BashTool(cwd=self.config.working_dir),
-            ReadTool(),
-            WriteTool(),
-            EditTool(),
-            GrepTool(),
-            GlobTool(),
-            WebSearchTool(),
-        ]
+        """Build the tools and client; imports httpx, so runs in a thread."""
+        from .api import OllamaClient
+        from .repomap import RepoMap
+        from .session import SessionJournal
+        from .factory import create_tools
+
+        self.tool_instances = create_tools(self.config)
         self.client = OllamaClient(self.config, self.tool_instances)
+        # Sub-agents share the conversation's connection pool
+        self.client.tools["task"].http_client = self.client.client
+        self.client.repo_map = RepoMap(
+            self.config.working_dir, token_budget=self.config.repo_map_tokens
+        )
+        self.client.journal = SessionJournal(self.config.working_dir)
+        self.client.tracer = Tracer(self.config.working_dir, session_id=self.client.journal.session_id)
+
+    async def _open_backend(self):
+        """Hold the conversation in the daemon if one is running, else build it here."""
+        if self.config.use_daemon:
+            from .daemon import open_session
+
+            remote = await open_session(self.config)
+            if remote is not None:
+                self.client = self._session = remote
+                return
+        await asyncio.to_thread(self._init_tools)
+        from .commands import SessionCommands
+
+        self._session = SessionCommands(self.client, self._memory)
+
+    async def _ensure_client(self):
+        if self._backend is None:
+            self._backend = asyncio.ensure_future(self._open_backend())
+        # Shielded: a cancelled turn must not cancel the shared start-up task
+        await asyncio.shield(self._backend)
+        return self.client
 
     def compose(self) -> ComposeResult:
         yield Header(show_clock=True)
-        with VerticalScroll(id="chat-container"):
-            yield Static(LOGO, id="logo-area")
-            yield Static(
+        yield Transcript(
+            Static(LOGO, id="logo-area"),
+            Static(
                 Markdown(
                     WELCOME.format(
                         cwd=self.config.working_dir, model=self.config.model
                     )
                 ),
                 id="welcome-msg",
-            )
+            ),
+            id="chat-container",
+            widget_factory=self._record_widget,
+        )
+        yield QueuePanel("", id="queue-panel")
         yield Static("", id="status-bar")
         with Horizontal(id="input-area"):
             yield Input(
@@ -393,7 +520,33 @@ class TaiyoApp(App):
             )
 
     async def on_mount(self):
+        self.query_one("#queue-panel", QueuePanel).display = False
+        # Mounted once below the transcript records and reused for every turn
+        self.query_one("#chat-container", Transcript).mount(self._thinking_widget)
         self._update_status("Connecting to Ollama...")
+        self.query_one("#user-input", Input).focus()
+        self._profile.mark("tui mounted")
+        self._memory.start()
+        self._connect()
+
+    async def on_unmount(self):
+        if self.client is not None:
+            from .factory import close_tools
+
+            await self.client.close()
+            await close_tools(self.tool_instances)
+
+    @work
+    async def _connect(self):
+        """Load the client and check the Ollama connection in the background."""
+        await self._ensure_client()
+        self._profile.mark("client ready" if not self.client.remote else "daemon session ready")
+        if self.client.repo_map is not None:
+            self.client.repo_map.refresh()
+        if self.config.profiler:
+            result = await self._session.run("profile", {"action": "start", "mode": self.config.profiler})
+            if "error" in result:
+                self._add_message("error", result["error"])
         connected = await self.client.check_connection()
         if connected:
             models = await self.client.list_models()
@@ -401,15 +554,36 @@ class TaiyoApp(App):
                 model_names = [m.split(":")[0] for m in models]
                 if not any(self.config.model in m or m in self.config.model for m in models):
                     self.config.model = models[0]
-                    self.client.config.model = models[0]
+                    await self._session.run("model", {"name": models[0]})
+                fast = self.config.fast_model
+                if fast and not any(fast in m or m in fast for m in models):
+                    self.config.fast_model = ""
+                    await self._session.run("model", {"fast": ""})
+                if self.config.fast_model:
+                    asyncio.ensure_future(self.client.preload())
+                fast = f" (fast: {self.config.fast_model})" if self.config.fast_model else ""
                 self._update_status(
-                    f"Connected | Model: {self.config.model} | {self.config.working_dir}"
+                    f"Connected | Model: {self.config.model}{fast} | {self.config.working_dir}"
                 )
             else:
                 self._update_status("Connected | No models found - run: ollama pull qwen2.5-coder:7b")
         else:
             self._update_status("Ollama not running! Start with: ollama serve")
-        self.query_one("#user-input", Input).focus()
+        self._profile.mark("connection checked")
+        if self._profile_only:
+            self.exit()
+
+    def _evict(self, rss: int) -> bool:
+        """Drop old tool output from memory (soft limit)."""
+        if self._session is None or self.client.remote:
+            return False  # not loaded yet, or the daemon watches its own memory
+        freed = self._session.evict()
+        self._add_message(
+            "assistant",
+            f"Memory at {format_bytes(rss)} is above the soft limit: evicted {freed} characters "
+            "of old tool output; `/compact` shrinks history further.",
+        )
+        return True
 
     def _update_status(self, text: str):
         try:
@@ -422,31 +596,56 @@ class TaiyoApp(App):
             pass
 
     def _scroll_to_bottom(self):
-        container = self.query_one("#chat-container", VerticalScroll)
+        container = self.query_one("#chat-container", Transcript)
         container.scroll_end(animate=False)
 
-    def _add_message(self, role: str, content: str) -> ChatMessage:
-        container = self.query_one("#chat-container", VerticalScroll)
-        msg = ChatMessage(role=role, content=content)
-        container.mount(msg)
+    @staticmethod
+    def _record_widget(record: TranscriptRecord):
+        if record.streamed:
+            return StreamingMessage(text=record.content)
+        return ChatMessage(role=record.role, content=record.content)
+
+    def _add_message(self, role: str, content: str) -> TranscriptRecord:
+        container = self.query_one("#chat-container", Transcript)
+        record = container.add(role, content)
         self.call_after_refresh(self._scroll_to_bottom)
-        return msg
+        return record
+
+    def _show_history(self, history: list[dict]):
+        """Rebuild the transcript from a resumed message history."""
+        container = self.query_one("#chat-container", Transcript)
+        container.clear()
+        for message in history:
+            role, content = message["role"], message.get("content") or ""
+            if role == "tool":
+                self._add_message("tool", f"[bold]{message.get('name') or 'tool'}[/]\n{content[:1000]}")
+            elif message.get("tool_calls"):
+                for call in message["tool_calls"]:
+                    func = call.get("function", call)
+                    self._add_message("tool", f"[bold]Tool:[/] {func.get('name', '')}")
+            elif content and role in ("user", "assistant"):
+                self._add_message(role, content)
+
+    def _finish_stream(self, stream_widget: StreamingMessage):
+        """Keep a finished streaming reply, as rendered, as its transcript record."""
+        stream_widget.finalize()
+        text = stream_widget.text
+        if not text.strip():
+            stream_widget.remove()
+            return
+        record = self.query_one("#chat-container", Transcript).adopt(stream_widget, "assistant", text)
+        record.streamed = True
 
     def _show_thinking(self) -> ThinkingWidget:
         """Show the animated thinking indicator."""
-        container = self.query_one("#chat-container", VerticalScroll)
-        thinking = ThinkingWidget()
-        container.mount(thinking)
-        self._thinking_widget = thinking
+        thinking = self._thinking_widget
+        thinking.start()
         self.call_after_refresh(self._scroll_to_bottom)
         return thinking
 
     def _hide_thinking(self):
-        """Remove the thinking indicator."""
-        if self._thinking_widget:
-            self._thinking_widget.stop()
-            self._thinking_widget.remove()
-            self._thinking_widget = None
+        """Hide the thinking indicator."""
+        self._thinking_widget.stop()
 
     @on(Input.Submitted, "#user-input")
     async def handle_input(self, event: Input.Submitted):
@@ -463,28 +662,63 @@ class TaiyoApp(App):
             return
 
         if self._is_processing:
+            position = self._queue.put(text)
+            self._refresh_queue()
+            self._update_status(f"Queued #{position} | runs when the current turn ends")
             return
 
+        self._start_turn(text)
+
+    def _start_turn(self, text: str):
+        """Show ``text`` and run its turn.
+
+        ``_is_processing`` is set here, not in the worker: the worker body
+        runs later, and a submit in between would start a second exclusive
+        worker that cancels this one.
+        """
+        self._is_processing = True
         self._add_message("user", text)
-        self._process_message(text)
+        self._worker = self._process_message(text)
+
+    def _refresh_queue(self):
+        self.query_one("#queue-panel", QueuePanel).show(self._queue)
+
+    def _dispatch_queued(self):
+        """Start the next queued request once the ending turn's worker is done.
+
+        The ending turn leaves ``_is_processing`` set, so that a submit in
+        the meantime is queued behind this request instead of starting a
+        turn ahead of it.
+        """
+        text = self._queue.take()
+        self._refresh_queue()
+        if text is None:
+            self._is_processing = False
+            return
+        self._start_turn(text)
+
+    def _edit_queued(self, position: int):
+        input_widget = self.query_one("#user-input", Input)
+        input_widget.value = self._queue.pop(position)
+        input_widget.cursor_position = len(input_widget.value)
+        input_widget.focus()
+        self._refresh_queue()
 
     async def _handle_command(self, cmd: str):
+        await self._ensure_client()
         parts = cmd.split(maxsplit=1)
         command = parts[0].lower()
 
         if command == "/clear":
-            self.client.clear_history()
-            container = self.query_one("#chat-container", VerticalScroll)
-            children = list(container.children)
-            for child in children[2:]:
-                child.remove()
+            await self._session.run("clear")
+            self.query_one("#chat-container", Transcript).clear()
             self._update_status(f"Chat cleared | {self.config.model}")
 
         elif command == "/quit" or command == "/exit":
             self.exit()
 
         elif command == "/model":
-            models = await self.client.list_models()
+            models = (await self._session.run("model")).get("models", [])
             if models:
                 model_list = "\n".join(f"  - `{m}`" for m in models)
                 self._add_message(
@@ -494,21 +728,141 @@ class TaiyoApp(App):
                 if len(parts) > 1:
                     new_model = parts[1].strip()
                     self.config.model = new_model
-                    self.client.config.model = new_model
+                    await self._session.run("model", {"name": new_model})
                     self._update_status(f"Model changed to: {new_model}")
                     self._add_message("assistant", f"Switched to model: **{new_model}**")
             else:
                 self._add_message("error", "No models available. Is Ollama running?")
 
+        elif command == "/resume":
+            arg = parts[1].strip() if len(parts) > 1 else ""
+            result = await self._session.run("resume", {"session": arg})
+            if "error" in result:
+                self._add_message("error", result["error"])
+            elif arg == "list":
+                rows = "\n".join(
+                    f"- `{s['session_id']}` ({s['size'] // 1024} KB)" for s in result["sessions"]
+                ) or "(none)"
+                self._add_message("assistant", f"**Recent sessions:**\n\n{rows}")
+            else:
+                self._show_history(result["history"])
+                self._update_status(f"Resumed {result['session_id']} | {self.config.model}")
+
+        elif command == "/history":
+            from .history import HistoryIndex
+
+            args = parts[1].split(maxsplit=1) if len(parts) > 1 else []
+            action = args[0].lower() if args else ""
+            index = HistoryIndex(self.config.working_dir)
+            if action == "search" and len(args) > 1:
+                hits = await asyncio.to_thread(index.search, args[1], 15)
+                rows = "\n".join(
+                    f"- `{hit.session_id}` {hit.ts} **{hit.role}**: {hit.snippet}" for hit in hits
+                ) or "No matches."
+                self._add_message("assistant", f"**History matches for** `{args[1]}`:\n\n{rows}")
+            elif action == "rollup":
+                try:
+                    days = float(args[1]) if len(args) > 1 else 30
+                except ValueError:
+                    days = 30
+                current = (await self._session.run("session")).get("session_id")
+                archived = await asyncio.to_thread(index.rollup, days, {current})
+                self._add_message("assistant", f"Archived {archived} sessions older than {days:g} days.")
+            else:
+                self._add_message("error", "Usage: `/history search <query>` or `/history rollup [days]`")
+
+        elif command == "/stats":
+            result = await self._session.run("stats")
+            body = "\n".join(result.get("lines") or [result.get("error", "No turns traced yet.")])
+            self._add_message(
+                "assistant",
+                f"**Session stats**\n\n```\n{body}\n```\n\nTrace: `{result.get('trace', '')}`",
+            )
+
+        elif command == "/profile":
+            args = parts[1].split() if len(parts) > 1 else []
+            action = args[0].lower() if args else "status"
+            usage = "Usage: `/profile start [cprofile|sample]` or `/profile stop`"
+            if action not in ("start", "stop", "status"):
+                self._add_message("error", usage)
+                return
+            mode = args[1] if len(args) > 1 else "cprofile"
+            result = await self._session.run("profile", {"action": action, "mode": mode})
+            if "error" in result:
+                self._add_message("error", result["error"])
+            elif action == "start":
+                self._add_message("assistant", f"Profiling turns with **{result['mode']}** into `{result['dir']}`")
+            elif action == "stop":
+                self._add_message("assistant", "Profiling stopped.")
+            else:
+                state = f"on ({result['mode']})" if result["mode"] else "off"
+                self._add_message("assistant", f"Profiling is {state}. {usage}")
+
+        elif command == "/mem":
+            args = parts[1].split() if len(parts) > 1 else []
+            action = args[0].lower() if args else ""
+            limit = int(args[1]) if action == "top" and len(args) > 1 and args[1].isdigit() else 10
+            result = await self._session.run("mem", {"action": action, "limit": limit})
+            if "error" in result:
+                self._add_message("error", result["error"])
+                return
+            if action == "evict":
+                self._add_message(
+                    "assistant",
+                    f"Evicted {result['freed']} characters of old tool output; `/compact` shrinks history further.",
+                )
+                return
+            lines = result["lines"]
+            if action != "top":
+                transcript = self.query_one("#chat-container", Transcript)
+                lines = lines + [
+                    f"transcript           {len(transcript.records)} messages, {transcript.mounted_count} mounted",
+                    f"widgets              {len(self.query('*'))}",
+                ]
+            body = "\n".join(lines)
+            where = " (daemon)" if self.client.remote else ""
+            self._add_message("assistant", f"**Memory**{where}\n\n```\n{body}\n```")
+
+        elif command == "/queue":
+            args = parts[1].split() if len(parts) > 1 else []
+            action = args[0].lower() if args else "list"
+            try:
+                if action == "list":
+                    if self._queue:
+                        items = "\n".join(f"{i}. {item}" for i, item in enumerate(self._queue, 1))
+                        self._add_message("assistant", f"**Queued messages:**\n\n{items}")
+                    else:
+                        self._add_message("assistant", "No queued messages.")
+                elif action == "clear":
+                    self._queue.clear()
+                elif action in ("drop", "cancel", "edit") and len(args) == 2:
+                    position = int(args[1])
+                    if action != "edit":
+                        self._queue.pop(position)
+                    else:
+                        self._edit_queued(position)
+                else:
+                    self._add_message("error", "Usage: `/queue [list|clear|drop <n>|edit <n>]`")
+            except (ValueError, IndexError) as e:
+                self._add_message("error", f"Queue: {e}")
+            self._refresh_queue()
+
         elif command == "/help":
             help_text = """**Available Commands:**
 - `/clear` - Clear chat history
 - `/model` - List models or switch model (`/model <name>`)
+- `/resume` - Resume the last session (`/resume <id>`, `/resume list`)
+- `/history search <query>` - Search past sessions (`/history rollup [days]` archives old ones)
+- `/stats` - Latency, token rate and per-tool timing for this session
+- `/mem` - Memory use (`/mem top [n]` for tracemalloc allocation sites, `/mem evict` drops old tool output)
+- `/profile start [cprofile|sample]` - Profile each turn into `.taiyo/profiles` (`/profile stop` ends it)
+- `/queue` - Manage messages queued during a turn (`list`, `edit <n>`, `drop <n>`, `clear`)
 - `/help` - Show this help
 - `/quit` - Exit Taiyo CLI
 
 **Keyboard Shortcuts:**
-- `Enter` - Send message
+- `Enter` - Send message (queued while Taiyo is working)
+- `Up` - Edit the last queued message
 - `Ctrl+C` - Quit
 - `Ctrl+L` - Clear chat
 """
@@ -518,25 +872,27 @@ class TaiyoApp(App):
 
     @work(exclusive=True)
     async def _process_message(self, text: str):
-        self._is_processing = True
         self._update_status(f"Thinking... | {self.config.model}")
 
-        container = self.query_one("#chat-container", VerticalScroll)
+        container = self.query_one("#chat-container", Transcript)
 
         # Show thinking animation
         thinking = self._show_thinking()
+        cancelled = False
+        stream_widget = None
 
         try:
             first_text = True
-            stream_widget = None
 
+            await self._ensure_client()
+            self._session.begin_turn()
             async for chunk in self.client.chat_stream(text):
                 if chunk["type"] == "text":
                     # Hide thinking on first text response
                     if first_text:
                         self._hide_thinking()
-                        stream_widget = StreamingMessage()
-                        container.mount(stream_widget)
+                        stream_widget = StreamingMessage(tracer=self.client.tracer)
+                        container.mount_live(stream_widget)
                         self._current_stream = stream_widget
                         first_text = False
 
@@ -545,13 +901,9 @@ class TaiyoApp(App):
                     self.call_after_refresh(self._scroll_to_bottom)
 
                 elif chunk["type"] == "tool_call":
-                    # Switch thinking to tool execution phase
-                    if self._thinking_widget:
-                        self._thinking_widget.set_phase("tool_exec")
-
                     # If we had been streaming text, finalize it
-                    if stream_widget and stream_widget.text:
-                        stream_widget.finalize()
+                    if stream_widget:
+                        self._finish_stream(stream_widget)
                         stream_widget = None
 
                     # Hide thinking before showing tool call
@@ -584,14 +936,25 @@ class TaiyoApp(App):
                     # Show thinking for follow-up response
                     thinking = self._show_thinking()
                     first_text = True
+                    if stream_widget:
+                        self._finish_stream(stream_widget)
                     stream_widget = None
 
+                elif chunk["type"] == "loop":
+                    self._hide_thinking()
+                    self._add_message(
+                        "error",
+                        f"Stopped after {chunk['rounds']} rounds: {chunk['reason']} "
+                        f"(saved up to {chunk['saved']} rounds)",
+                    )
+
+                elif chunk["type"] == "context":
+                    self._add_message("error", f"{chunk['message']} (`/compact`, `/clear`)")
+
             # Done - hide thinking and finalize
             self._hide_thinking()
             if stream_widget:
-                stream_widget.finalize()
-                if not stream_widget.text:
-                    stream_widget.remove()
+                self._finish_stream(stream_widget)
 
         except Exception as e:
             self._hide_thinking()
@@ -604,20 +967,45 @@ class TaiyoApp(App):
                 error_msg = f"Model not found: {self.config.model}. Pull it: `ollama pull {self.config.model}`"
             self._add_message("error", error_msg)
 
+        except asyncio.CancelledError:
+            cancelled = True
+            if stream_widget:
+                self._finish_stream(stream_widget)
+            self._add_message("error", "Cancelled.")
+            raise
+
         finally:
+            report = self._session.end_turn() if self._session is not None else None
+            if report:
+                top = "\n".join(report.top)
+                self._add_message(
+                    "assistant",
+                    f"**Profile** ({report.mode}, {report.seconds:.2f}s)\n\n```\n{top}\n```\n\nSaved: `{report.path}`",
+                )
             self._hide_thinking()
-            self._is_processing = False
+            # After a cancel, queued messages wait until the next turn ends
+            dispatch = bool(self._queue) and not cancelled
+            self._is_processing = dispatch
             self._current_stream = None
+            self._worker = None
             self._update_status(
-                f"Ready | Model: {self.config.model} | {self.config.working_dir}"
+                "Cancelled" if cancelled
+                else f"Ready | Model: {self.config.model} | {self.config.working_dir}"
             )
             self.query_one("#user-input", Input).focus()
+            if dispatch:
+                self.call_later(self._dispatch_queued)
 
     def action_clear_chat(self):
         asyncio.create_task(self._handle_command("/clear"))
 
+    def action_edit_queued(self):
+        input_widget = self.query_one("#user-input", Input)
+        if self._queue and not input_widget.value:
+            self._edit_queued(len(self._queue))
+
     def action_cancel(self):
-        if self._is_processing:
-            self._hide_thinking()
-            self._is_processing = False
-            self._update_status("Cancelled")
+        # Cancelling the worker aborts the Ollama request (the server stops
+        # generating once the connection closes) and kills running tools.
+        if self._worker is not None:
+            self._worker.cancel()
@@ -0,0 +1,254 @@
+"""Concurrent batch runner: ``taiyo batch tasks.jsonl``.
+
+Each line of the tasks file is one independent conversation::
+
+    {"id": "types-utils", "prompt": "Add type hints to src/utils.py"}
+    {"prompt": "...", "model": "qwen2.5-coder:14b"}     # id defaults to the line number
+
+All tasks run on one event loop, each with its own ``OllamaClient`` (and
+so its own history and session journal), while the HTTP connection pool,
+the tool instances with their caches and indexes, the repository map and
+the tracer are shared. ``concurrency`` caps the model requests in flight
+(the size of the shared connection pool); size it to the backend, which
+serves ``OLLAMA_NUM_PARALLEL`` requests at once. Twice that many
+conversations are open, so tool execution in some overlaps with model
+requests in others.
+
+Every finished task appends one JSON record to the results file, which
+doubles as the checkpoint: rerunning the same command skips tasks that
+already have a successful record, so an interrupted batch resumes. Failed
+tasks are run again on resume; when the run ends the file is rewritten
+with only the last record per task id, so each task appears once.
+"""
+from __future__ import annotations
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from dataclasses import replace
+from datetime import datetime
+
+from .config import Config
+
+# Statuses that count as done when a batch is resumed
+FINISHED = ("ok", "round_limit", "loop")
+# Open conversations per model request slot
+CONVERSATIONS_PER_SLOT = 2
+
+
+def default_concurrency() -> int:
+    try:
+        return max(1, int(os.environ.get("OLLAMA_NUM_PARALLEL", "4")))
+    except ValueError:
+        return 4
+
+
+def load_tasks(path: str) -> list[dict]:
+    tasks = []
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                task = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"{path}:{lineno}: invalid JSON ({e})") from None
+            if isinstance(task, str):
+                task = {"prompt": task}
+            if not task.get("prompt"):
+                raise ValueError(f"{path}:{lineno}: task has no prompt")
+            task["id"] = str(task.get("id", lineno))
+            tasks.append(task)
+    return tasks
+
+
+def load_finished(path: str) -> set[str]:
+    """Task ids with a successful record in an existing results file."""
+    done = set()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn last line of an interrupted run
+                if record.get("status") in FINISHED:
+                    done.add(str(record.get("id")))
+    except OSError:
+        pass
+    return done
+
+
+def compact_results(path: str) -> int:
+    """Keep only the last record per task id; return the records dropped."""
+    latest: dict[str, str] = {}
+    lines = 0
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                lines += 1
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                # Updating keeps the id's first position, so task order holds
+                latest[str(record.get("id"))] = line if line.endswith("\n") else line + "\n"
+    except OSError:
+        return 0
+    dropped = lines - len(latest)
+    if dropped:
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(latest.values())
+        os.replace(tmp, path)
+    return dropped
+
+
+class BatchRunner:
+    """Runs tasks concurrently over shared tools, connections and caches."""
+
+    def __init__(self, config: Config, tasks: list[dict], output: str, concurrency: int):
+        self.config = config
+        self.tasks = tasks
+        self.output = output
+        self.concurrency = concurrency
+        self.counts = {"ok": 0, "round_limit": 0, "loop": 0, "error": 0}
+        self._done = 0
+        self._total = 0
+        self._out = None
+
+    async def run(self) -> int:
+        import httpx
+
+        from .api import OllamaClient
+        from .factory import close_tools, create_tools, session_tools
+        from .repomap import RepoMap
+        from .session import SessionJournal, new_session_id
+        from .tracing import Tracer
+
+        finished = load_finished(self.output)
+        pending = [t for t in self.tasks if t["id"] not in finished]
+        self._total = len(pending)
+        if finished:
+            self._log(f"resuming: {len(self.tasks) - len(pending)} of {len(self.tasks)} tasks already done")
+        if not pending:
+            compact_results(self.output)
+            return 0
+
+        batch_id = f"batch_{new_session_id()}"
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        # Requests wait for a free pooled connection for as long as it takes
+        http = httpx.AsyncClient(timeout=httpx.Timeout(300.0, pool=None), limits=limits)
+        tools = create_tools(self.config, http_client=http)
+        repo_map = RepoMap(self.config.working_dir, token_budget=self.config.repo_map_tokens)
+        tracer = Tracer(self.config.working_dir, session_id=batch_id)
+        gate = asyncio.Semaphore(self.concurrency * CONVERSATIONS_PER_SLOT)
+        started = time.perf_counter()
+
+        task = repo_map.refresh()
+        if task is not None:
+            await task
+
+        def make_client(spec: dict) -> OllamaClient:
+            if spec.get("model"):
+                # Sub-agents of this task run on its model too
+                config = replace(self.config, model=spec["model"])
+                client = OllamaClient(config, session_tools(config, tools, http), http_client=http)
+            else:
+                client = OllamaClient(self.config, tools, http_client=http)
+            client.repo_map = repo_map
+            client.journal = SessionJournal(self.config.working_dir, session_id=f"{batch_id}_{spec['id']}")
+            client.tracer = tracer
+            return client
+
+        workers = [asyncio.ensure_future(self._run_task(spec, make_client, gate)) for spec in pending]
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, lambda: [w.cancel() for w in workers])
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        interrupted = False
+        with open(self.output, "a", encoding="utf-8") as out:
+            self._out = out
+            try:
+                results = await asyncio.gather(*workers, return_exceptions=True)
+                interrupted = any(isinstance(r, asyncio.CancelledError) for r in results)
+            finally:
+                self._out = None
+                await http.aclose()
+                await close_tools(tools)
+                tracer.flush()
+        # Records superseded by a re-run (and torn lines) go
+        compact_results(self.output)
+
+        elapsed = time.perf_counter() - started
+        summary = ", ".join(f"{n} {status}" for status, n in self.counts.items() if n)
+        self._log(f"{self._done}/{self._total} tasks in {elapsed:.1f}s ({summary or 'nothing finished'})")
+        if interrupted:
+            self._log(f"interrupted; rerun the same command to resume (results: {self.output})")
+            return 130
+        return 0 if not self.counts["error"] else 1
+
+    async def _run_task(self, spec: dict, make_client, gate: asyncio.Semaphore):
+        queued = time.perf_counter()
+        async with gate:
+            started = time.perf_counter()
+            started_at = datetime.now().isoformat(timespec="seconds")
+            client = make_client(spec)
+            record = {"id": spec["id"], "status": "ok", "text": "", "tool_calls": 0, "tools": {}, "error": ""}
+            try:
+                text_parts: list[str] = []
+                async for chunk in client.chat_stream(spec["prompt"]):
+                    if chunk["type"] == "text":
+                        text_parts.append(chunk["content"])
+                    elif chunk["type"] == "tool_call":
+                        record["tool_calls"] += 1
+                        record["tools"][chunk["name"]] = record["tools"].get(chunk["name"], 0) + 1
+                        text_parts = []
+                    elif chunk["type"] in ("round_limit", "loop"):
+                        record["status"] = chunk["type"]
+                record["text"] = "".join(text_parts)
+            except Exception as e:
+                record["status"] = "error"
+                record["error"] = str(e) or type(e).__name__
+            finally:
+                await client.journal.close()
+            record.update({
+                "model": client.config.model,
+                "started_at": started_at,
+                "queued_ms": round((started - queued) * 1000),
+                "duration_ms": round((time.perf_counter() - started) * 1000),
+                "messages": len(client.messages),
+            })
+        self._finish(record)
+
+    def _finish(self, record: dict):
+        self._out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._out.flush()
+        self.counts[record["status"]] += 1
+        self._done += 1
+        detail = f" - {record['error']}" if record["error"] else ""
+        self._log(
+            f"[{self._done}/{self._total}] {record['status']:<11} {record['id']} "
+            f"({record['duration_ms'] / 1000:.1f}s, {record['tool_calls']} tool calls){detail}"
+        )
+
+    @staticmethod
+    def _log(text: str):
+        print(text, file=sys.stderr, flush=True)
+
+
+async def run_batch(config: Config, tasks_file: str, output: str | None = None, concurrency: int | None = None) -> int:
+    """Run every task in ``tasks_file``; return the process exit code."""
+    try:
+        tasks = load_tasks(tasks_file)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    output = output or os.path.splitext(tasks_file)[0] + ".results.jsonl"
+    runner = BatchRunner(config, tasks, output, concurrency or default_concurrency())
+    return await runner.run()
@@ -0,0 +1,121 @@
+"""Session commands (``/stats``, ``/profile``, ``/mem``, ``/resume``, ...).
+
+Each command works on one conversation and returns a JSON-serialisable
+dict; a failure is reported as ``{"error": "..."}``. The REPL and the TUI
+run them through ``SessionCommands`` on their own ``OllamaClient``, and the
+daemon runs the same code for its clients as protocol ops (see
+``daemon.RemoteClient``), so a front-end renders the same answers whether
+the conversation lives in its process or in the daemon.
+"""
+from __future__ import annotations
+from dataclasses import asdict
+
+from .memory import MemoryMonitor, release_memory, tracemalloc_top
+from .profiling import TurnProfile, TurnProfiler
+from .tracing import format_stats
+
+OPS = ("clear", "compact", "model", "session", "resume", "stats", "profile", "mem")
+# Messages kept by /compact
+COMPACT_KEEP = 4
+# Sessions listed by /resume list
+RESUME_LIST = 10
+
+
+class SessionCommands:
+    """The commands and the turn profiler of one conversation."""
+
+    def __init__(self, client, memory: MemoryMonitor):
+        self.client = client
+        self.memory = memory
+        self.profiler = TurnProfiler(client.config.working_dir, session_id=client.journal.session_id)
+
+    async def run(self, op: str, args: dict | None = None) -> dict:
+        if op not in OPS:
+            return {"error": f"Unknown command: {op}"}
+        try:
+            return await getattr(self, f"_{op}")(**(args or {}))
+        except TypeError as e:  # arguments the op does not take
+            return {"error": str(e)}
+
+    def begin_turn(self):
+        self.profiler.begin()
+
+    def end_turn(self) -> TurnProfile | None:
+        return self.profiler.end()
+
+    def evict(self) -> int:
+        """Drop old tool output from memory; returns the characters freed."""
+        freed = self.client.evict_tool_output()
+        release_memory()
+        return freed
+
+    async def _clear(self) -> dict:
+        self.client.clear_history()
+        return {}
+
+    async def _compact(self) -> dict:
+        before = len(self.client.messages)
+        if before > COMPACT_KEEP:
+            self.client.replace_history(self.client.messages[-COMPACT_KEEP:])
+        return {"before": before, "after": len(self.client.messages)}
+
+    async def _model(self, name: str = "", fast: str | None = None) -> dict:
+        """Switch the model (and/or the fast model), or list the available ones."""
+        config = self.client.config
+        if name:
+            config.model = name
+        if fast is not None:
+            config.fast_model = fast
+        result = {"model": config.model, "fast_model": config.fast_model}
+        if not name and fast is None:
+            result["connected"] = await self.client.check_connection()
+            result["models"] = await self.client.list_models() if result["connected"] else []
+        return result
+
+    async def _session(self) -> dict:
+        return {
+            "session_id": self.client.journal.session_id,
+            "messages": len(self.client.messages),
+            "model": self.client.config.model,
+        }
+
+    async def _resume(self, session: str = "") -> dict:
+        """``session`` "list" lists; otherwise resume the newest session id starting with it."""
+        from .session import list_sessions
+
+        current = self.client.journal.session_id
+        sessions = [s for s in list_sessions(self.client.config.working_dir) if s.session_id != current]
+        if session == "list":
+            return {"sessions": [
+                {"session_id": s.session_id, "modified": s.modified, "size": s.size}
+                for s in sessions[:RESUME_LIST]
+            ]}
+        match = next((s for s in sessions if s.session_id.startswith(session)), None)
+        if match is None:
+            return {"error": "No session to resume" + (f" matching {session}" if session else "")}
+        self.client.journal.switch(match.session_id)
+        self.client.messages = self.client.journal.load()
+        return {"session_id": match.session_id, "history": [asdict(m) for m in self.client.messages]}
+
+    async def _stats(self) -> dict:
+        tracer = self.client.tracer
+        return {"lines": format_stats(tracer.stats()), "trace": tracer.path}
+
+    async def _profile(self, action: str = "status", mode: str = "cprofile") -> dict:
+        if action == "start":
+            try:
+                self.profiler.enable(mode)
+            except ValueError as e:
+                return {"error": str(e)}
+        elif action == "stop":
+            self.profiler.disable()
+        elif action != "status":
+            return {"error": f"Unknown profile action: {action}"}
+        return {"mode": self.profiler.mode, "dir": self.profiler.dir}
+
+    async def _mem(self, action: str = "", limit: int = 10) -> dict:
+        if action == "top":
+            return {"lines": tracemalloc_top(limit)}
+        if action == "evict":
+            return {"freed": self.evict()}
+        return {"lines": self.memory.report(self.client)}
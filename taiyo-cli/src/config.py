@@ -4,17 +4,50 @@ import os
 from dataclasses import dataclass, field
 
 
+def default_daemon_socket() -> str:
+    base = os.environ.get("XDG_RUNTIME_DIR") or os.path.join(os.path.expanduser("~"), ".taiyo")
+    return os.path.join(base, "taiyo-daemon.sock")
+
+
 @dataclass
 class Config:
     """Application configuration."""
     # Ollama settings
     ollama_host: str = "http://localhost:11434"
     model: str = "qwen2.5-coder:7b"
+    # Small model for tool-selection rounds; "" sends every round to ``model``
+    fast_model: str = ""
+    # How long Ollama keeps used models loaded (e.g. "30m"); "" uses its default
+    keep_alive: str = ""
+    embed_model: str = "nomic-embed-text"
 
     # App settings
     working_dir: str = field(default_factory=os.getcwd)
     max_tokens: int = 4096
+    # Context window requested from Ollama; 0 sizes it to each conversation
+    num_ctx: int = 0
+    # Model requests per turn before the agent loop stops calling tools
+    max_tool_rounds: int = 15
+    # Ceiling for extending that budget while rounds keep making progress
+    max_tool_rounds_cap: int = 30
+    # Sub-agents (the task tool) running at once, and tool rounds each may use
+    subagent_concurrency: int = 4
+    subagent_rounds: int = 8
     temperature: float = 0.1
+    # Approximate token budget for the repository map (0 disables it)
+    repo_map_tokens: int = 1024
+    # Combine messages queued during a turn into a single follow-up request
+    merge_queued: bool = True
+    # Profile every turn from the start: "cprofile", "sample" or "" (off)
+    profiler: str = ""
+    # Soft RSS limit in MB; above it old tool output is evicted (0 disables)
+    memory_limit_mb: int = 0
+    # Seconds between RSS samples (0: only when a memory limit is set)
+    memory_sample_interval: float = 0.0
+    # Unix socket of the background daemon (``taiyo daemon start``)
+    daemon_socket: str = field(default_factory=default_daemon_socket)
+    # Run conversations (``-p``, the REPL, the TUI) in a running daemon instead of starting cold
+    use_daemon: bool = True
 
     # System prompt
     system_prompt: str = """You are Taiyo CLI, an AI-powered coding assistant that runs in the user's terminal. You are an agent that performs actions by calling tools. You MUST use tools to accomplish tasks. You NEVER say "I can't do that" or "I don't have access to files" -- you DO have access through your tools.
@@ -113,6 +146,57 @@ Example - Find all Python files:
 Example - Find config files:
 {"name": "glob", "arguments": {"pattern": "*.{json,yaml,yml,toml}", "path": "/path/to/project"}}
 
+### 7. symbols -- Look up definitions and references
+Use for: Finding where a function/class is defined, what a file defines, or who uses a symbol. Faster than grep + read.
+Parameters:
+  - action (optional, string): "definition" (default), "file", or "references"
+  - name (string): Symbol name, e.g. "main" or "OllamaClient.chat_stream"
+  - file_path (string): File to list symbols for (action "file")
+
+Example - Find a definition:
+{"name": "symbols", "arguments": {"name": "OllamaClient"}}
+
+Example - List a file's functions and classes:
+{"name": "symbols", "arguments": {"action": "file", "file_path": "/path/to/file.py"}}
+
+Example - Find callers:
+{"name": "symbols", "arguments": {"action": "references", "name": "chat_stream"}}
+
+### 8. semantic_search -- Find code by meaning
+Use for: Locating code when you know what it does but not what it is called (e.g. "where are retries handled").
+Parameters:
+  - query (required, string): Natural-language description of the code you are looking for
+  - k (optional, integer): Number of results (default: 8)
+
+Example - Find code by behaviour:
+{"name": "semantic_search", "arguments": {"query": "parse tool calls out of model text output"}}
+
+### 9. apply_patch -- Apply a unified diff
+Use for: Changing existing files, especially large ones or several files at once. Send only the changed lines with 1-3 lines of context instead of rewriting the file. If any hunk does not apply, nothing is changed and the error says which hunk failed.
+Parameters:
+  - patch (required, string): Unified diff with "--- a/path" and "+++ b/path" headers and "@@" hunks
+
+Example - Change one line:
+{"name": "apply_patch", "arguments": {"patch": "--- a/src/app.py\n+++ b/src/app.py\n@@ -10,3 +10,3 @@\n def main():\n-    run(debug=True)\n+    run(debug=False)\n     return 0\n"}}
+
+### 10. web_search -- Search offline documentation
+Use for: Looking up APIs of installed Python packages, project docs (Markdown) and man pages. There is no internet access; this searches local docs only.
+Parameters:
+  - query (required, string): Search terms
+  - source (optional, string): "all" (default), "python", "project", or "man"
+  - limit (optional, integer): Maximum number of results (default: 8)
+
+Example - Look up a library API:
+{"name": "web_search", "arguments": {"query": "httpx AsyncClient stream timeout", "source": "python"}}
+
+### 11. task -- Delegate research to parallel sub-agents
+Use for: Broad questions that split into independent parts (e.g. "find every place we handle auth and summarize them"). Each task runs concurrently in its own sub-agent with read-only tools (read, grep, glob, symbols, semantic_search, web_search); you get back only their short answers. Do not use it for a single lookup or for changing files.
+Parameters:
+  - tasks (required, array of strings): Self-contained questions, one per sub-agent (at most 8)
+
+Example - Fan out an investigation:
+{"name": "task", "arguments": {"tasks": ["Where are login credentials checked? List files and functions.", "How are API tokens issued and validated?", "Which HTTP routes require authentication, and how is that enforced?"]}}
+
 ## WORKFLOW PATTERNS
 
 ### When asked to read/view a file:
@@ -120,21 +204,26 @@ Example - Find config files:
 
 ### When asked to edit/fix code:
 1. First call read to see the current file content
-2. Then call edit to make the change
+2. Then call edit or apply_patch to make the change (prefer apply_patch for multi-line or multi-file changes)
 3. Optionally call read again to verify
 
 ### When asked to create a file:
 1. Call write with the file path and content
 
 ### When asked to find something in the codebase:
-1. Use grep to search for patterns, or glob to find files
+1. Use symbols to locate definitions/references by name, grep to search for patterns, or glob to find files
 2. Then read the relevant files found
 
+### When asked a broad question that spans many parts of the codebase:
+1. Split it into independent questions and call task once with all of them
+2. Combine the sub-agents' answers into your reply
+
 ### When asked to run a command:
 1. Call bash immediately with the command
 
 ### When asked about the project structure:
-1. Call bash with "ls -la" or use glob with "**/*" pattern
+1. Check the REPOSITORY MAP in the current context first
+2. Only if more detail is needed, call bash with "ls -la" or use glob with "**/*" pattern
 
 ## RESPONSE STYLE
 - Be concise and direct
@@ -158,5 +247,19 @@ Example - Find config files:
         return cls(
             ollama_host=os.environ.get("OLLAMA_HOST", "http://localhost:11434"),
             model=os.environ.get("TAIYO_MODEL", "qwen2.5-coder:7b"),
+            fast_model=os.environ.get("TAIYO_FAST_MODEL", ""),
+            keep_alive=os.environ.get("TAIYO_KEEP_ALIVE", ""),
+            embed_model=os.environ.get("TAIYO_EMBED_MODEL", "nomic-embed-text"),
             working_dir=os.environ.get("TAIYO_CWD", os.getcwd()),
+            merge_queued=os.environ.get("TAIYO_MERGE_QUEUED", "1").lower() not in ("0", "false", "no"),
+            num_ctx=int(os.environ.get("TAIYO_NUM_CTX", "0")),
+            max_tool_rounds=int(os.environ.get("TAIYO_MAX_ROUNDS", "15")),
+            max_tool_rounds_cap=int(os.environ.get("TAIYO_MAX_ROUNDS_CAP", "30")),
+            subagent_concurrency=max(1, int(os.environ.get("TAIYO_SUBAGENTS", "4"))),
+            subagent_rounds=int(os.environ.get("TAIYO_SUBAGENT_ROUNDS", "8")),
+            profiler=os.environ.get("TAIYO_PROFILE", ""),
+            memory_limit_mb=int(os.environ.get("TAIYO_MEMORY_LIMIT_MB", "0")),
+            memory_sample_interval=float(os.environ.get("TAIYO_MEMORY_SAMPLE_INTERVAL", "0")),
+            daemon_socket=os.environ.get("TAIYO_DAEMON_SOCKET") or default_daemon_socket(),
+            use_daemon=os.environ.get("TAIYO_DAEMON", "1").lower() not in ("0", "false", "no"),
         )
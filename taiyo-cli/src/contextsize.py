@@ -0,0 +1,124 @@
+"""Choosing ``num_ctx`` for each model request.
+
+Ollama allocates a model's KV cache for ``num_ctx`` tokens when it loads
+the model, and loads it again whenever a request asks for a different
+value. Requests without ``num_ctx`` get the model's default context:
+long conversations are silently cut from the front, and short ones pay
+for memory they never use.
+
+``ContextSizer`` sizes the context from the prompt actually sent. It picks
+the smallest of ``CONTEXT_BUCKETS`` that holds the estimated prompt plus
+``Config.max_tokens`` for the reply, capped at the model's trained context
+length from ``/api/show``. Within a process the size per model only
+grows. A conversation therefore causes at most a few reloads, and every
+client in the process (sub-agents, batch tasks, daemon sessions) asks for
+the same size and shares the one loaded model.
+"""
+from __future__ import annotations
+import json
+
+import httpx
+
+from .config import Config
+
+CONTEXT_BUCKETS = (4096, 8192, 16384, 32768, 65536, 131072)
+# Share of the usable context at which the conversation is reported as close to truncation
+WARN_FRACTION = 0.8
+
+# (host, model) -> trained context length from /api/show, 0 if unknown
+_limits: dict[tuple[str, str], int] = {}
+# (host, model) -> num_ctx last requested
+_sizes: dict[tuple[str, str], int] = {}
+
+
+def estimate_prompt_tokens(messages: list[dict], tools: list[dict]) -> int:
+    """Rough prompt size of a chat request (~3 characters per token, as elsewhere)."""
+    chars = len(json.dumps(tools)) if tools else 0
+    for m in messages:
+        chars += len(m.get("content") or "")
+        if m.get("tool_calls"):
+            chars += len(json.dumps(m["tool_calls"]))
+    return max(1, chars // 3)
+
+
+def current_size(host: str, model: str) -> int:
+    """The ``num_ctx`` this process last requested for ``model`` (0 if none yet)."""
+    return _sizes.get((host, model), 0)
+
+
+def _context_length(info: dict) -> int:
+    for key, value in (info.get("model_info") or {}).items():
+        if key.endswith(".context_length") and isinstance(value, int):
+            return value
+    return 0
+
+
+class ContextSizer:
+    """Per-client sizing and truncation warnings; see the module docstring."""
+
+    def __init__(self, config: Config):
+        self.config = config
+        # Set when a request came close to the usable context; taken by chat_stream
+        self.warning: dict | None = None
+        # Model -> level warned about: 1 close to the context, 2 beyond it
+        self._warned: dict[str, int] = {}
+
+    async def limit(self, http: httpx.AsyncClient, model: str) -> int:
+        """The model's trained context length, looked up once per process."""
+        key = (self.config.ollama_host, model)
+        if key not in _limits:
+            try:
+                resp = await http.post(f"{self.config.ollama_host}/api/show", json={"model": model})
+            except httpx.HTTPError:
+                return 0  # not cached: the server may come back
+            try:
+                _limits[key] = _context_length(resp.json()) if resp.status_code == 200 else 0
+            except ValueError:
+                _limits[key] = 0
+        return _limits[key]
+
+    async def num_ctx(self, http: httpx.AsyncClient, model: str, prompt_tokens: int) -> int:
+        """The ``num_ctx`` to send with a request of ``prompt_tokens`` to ``model``."""
+        limit = await self.limit(http, model)
+        needed = prompt_tokens + self.config.max_tokens
+        if self.config.num_ctx:
+            size = self.config.num_ctx
+        else:
+            key = (self.config.ollama_host, model)
+            size = next((b for b in CONTEXT_BUCKETS if b >= needed), max(limit, CONTEXT_BUCKETS[-1]))
+            size = max(size, _sizes.get(key, 0))
+            if limit:
+                size = min(size, limit)
+            _sizes[key] = size
+        # The most this conversation can get; unknown without a fixed size or a known limit
+        usable = min(filter(None, (self.config.num_ctx, limit)), default=0)
+        if usable:
+            self._check(model, prompt_tokens, needed, usable)
+        return size
+
+    def _check(self, model: str, prompt_tokens: int, needed: int, usable: int):
+        # Ollama cuts the prompt once it alone overflows; the reply reserve only warns earlier
+        level = 2 if prompt_tokens > usable else 1 if needed >= usable * WARN_FRACTION else 0
+        if level <= self._warned.get(model, 0):
+            # Dropping back (e.g. after /compact) re-arms the warnings
+            self._warned[model] = level
+            return
+        self._warned[model] = level
+        if level == 2:
+            message = (
+                f"The conversation (~{prompt_tokens} tokens) exceeds {model}'s {usable}-token context; "
+                "the oldest messages are being cut off."
+            )
+        else:
+            message = (
+                f"The conversation (~{prompt_tokens} tokens, plus up to {self.config.max_tokens} for the reply) "
+                f"is close to {model}'s {usable}-token context; older messages will soon be cut off."
+            )
+        self.warning = {
+            "type": "context", "message": message + " Compact or clear the conversation to keep it whole.",
+            "model": model, "tokens": prompt_tokens, "limit": usable,
+        }
+
+    def take_warning(self) -> dict | None:
+        warning, self.warning = self.warning, None
+        return warning
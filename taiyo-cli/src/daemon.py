@@ -0,0 +1,649 @@
+"""Background daemon that keeps connections, indexes and models warm.
+
+``taiyo daemon start`` runs one process per user, listening on a Unix
+socket (``Config.daemon_socket``, mode 0600). It owns a single HTTP
+connection pool and, per working directory and client interpreter, the
+tool instances with their caches and indexes plus the repository map, so
+they are built once and reused by every later invocation. Commands run in
+the environment of the client that asked for them. Models that clients used recently are
+kept loaded in Ollama by periodic empty ``/api/generate`` requests.
+
+Every connection is one conversation with its own ``OllamaClient``,
+session journal, trace and turn profiler. The protocol is one JSON object
+per line::
+
+    -> {"op": "hello", "config": {...Config fields...}, "env": {...os.environ},
+        "python": {"prefix": sys.prefix, "path": sys.path}}
+    <- {"type": "ready", "session_id": "...", "pid": 1234}
+    -> {"op": "chat", "prompt": "..."}
+    <- headless events (text, tool_call, tool_result, round_limit, loop, context, error)
+    <- {"type": "done", "exit_code": 0, "profile": {...}}   # profile: with /profile on
+    -> {"op": "cancel"}                  # interrupt the running turn
+    -> {"op": "stats"}                   # a session command, any time
+    <- {"type": "reply", "op": "stats", "lines": [...], "trace": "..."}
+    -> {"op": "status"} | {"op": "stop"}
+
+The session commands are those of ``commands.OPS`` (clear, compact, model,
+session, resume, stats, profile, mem) with their arguments as further
+keys, e.g. ``{"op": "profile", "action": "start", "mode": "sample"}``.
+
+Every front-end is a client whenever the daemon is running: ``taiyo -p``
+runs its turn through ``attach``, the REPL and the TUI hold their whole
+conversation in it through ``RemoteClient``. Without a daemon (or with
+``TAIYO_DAEMON=0``) they run it in their own process.
+"""
+from __future__ import annotations
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from collections import deque
+from dataclasses import asdict, fields
+
+from .config import Config
+
+# Longest protocol line (tool output travels inline)
+MAX_LINE = 16 * 1024 * 1024
+# Seconds between keep-alive requests; below Ollama's default 5 minute unload
+KEEP_WARM_INTERVAL = 240.0
+# Models unused for this long are left to unload
+KEEP_WARM_FOR = 1800.0
+# Seconds ``daemon start`` waits for the socket to come up
+START_TIMEOUT = 10.0
+LOST = "Lost the connection to the taiyo daemon"
+
+
+def _hello(config: Config) -> dict:
+    """A client's first message: its config, environment and interpreter."""
+    return {
+        "op": "hello",
+        "config": asdict(config),
+        "env": dict(os.environ),
+        "python": {"prefix": sys.prefix, "path": sys.path},
+    }
+
+
+def _encode(message: dict) -> bytes:
+    return (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+async def _receive(reader: asyncio.StreamReader) -> dict | None:
+    try:
+        line = await reader.readline()
+    except (ConnectionError, ValueError):
+        return None
+    if not line:
+        return None
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+async def _connect(path: str):
+    if not hasattr(asyncio, "open_unix_connection") or not os.path.exists(path):
+        return None
+    try:
+        return await asyncio.wait_for(asyncio.open_unix_connection(path, limit=MAX_LINE), 1.0)
+    except (OSError, asyncio.TimeoutError):
+        return None
+
+
+class Workspace:
+    """Tools (with their caches and indexes) and repository map of one working directory."""
+
+    def __init__(self, config: Config, python: dict | None = None):
+        from .factory import create_tools
+        from .repomap import RepoMap
+
+        self.working_dir = config.working_dir
+        # Each session adds bash and task tools of its own (see ``factory.session_tools``)
+        self.tools = [t for t in create_tools(config, python=python) if t.name != "task"]
+        self.repo_map = RepoMap(config.working_dir, token_budget=config.repo_map_tokens)
+
+
+class Daemon:
+    """Serves conversations over a Unix socket until ``stop`` is called."""
+
+    def __init__(self, path: str, memory_limit_bytes: int = 0, memory_interval: float = 0.0):
+        from .memory import MemoryMonitor
+
+        self.path = path
+        self.http = None
+        # (working dir, host, embed model, interpreter prefix, *sys.path) -> Workspace
+        self.workspaces: dict[tuple[str, ...], Workspace] = {}
+        # (host, model) -> monotonic time of last use
+        self.models: dict[tuple[str, str], float] = {}
+        # (host, model) -> ``Config.keep_alive`` of the session that used it last
+        self.keep_alive: dict[tuple[str, str], str] = {}
+        # ``SessionCommands`` of the open conversations
+        self.sessions: set = set()
+        self.total_sessions = 0
+        self.memory = MemoryMonitor(limit_bytes=memory_limit_bytes, interval=memory_interval, on_limit=self._evict)
+        self.started = time.monotonic()
+        self._connections: dict[asyncio.Task, asyncio.StreamWriter] = {}
+        self._stopped: asyncio.Event | None = None
+
+    async def serve(self):
+        import httpx
+
+        from .factory import close_tools
+
+        connection = await _connect(self.path)
+        if connection is not None:
+            connection[1].close()
+            raise RuntimeError(f"a daemon is already listening on {self.path}")
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # left behind by a daemon that crashed
+
+        self._stopped = asyncio.Event()
+        self.http = httpx.AsyncClient(timeout=300.0)
+        server = await asyncio.start_unix_server(self._handle, path=self.path, limit=MAX_LINE)
+        os.chmod(self.path, 0o600)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                pass
+        print(f"taiyo daemon {os.getpid()} listening on {self.path}", flush=True)
+
+        warm = loop.create_task(self._keep_warm())
+        self.memory.start()
+        try:
+            await self._stopped.wait()
+        finally:
+            warm.cancel()
+            self.memory.stop()
+            server.close()
+            # Closing a connection ends its handler, which cancels its turn
+            for writer in self._connections.values():
+                writer.close()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            for workspace in self.workspaces.values():
+                await close_tools(workspace.tools)
+            await self.http.aclose()
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+    def stop(self):
+        if self._stopped is not None:
+            self._stopped.set()
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        return {
+            "pid": os.getpid(),
+            "uptime_s": round(now - self.started),
+            "sessions": len(self.sessions),
+            "total_sessions": self.total_sessions,
+            "workspaces": sorted({w.working_dir for w in self.workspaces.values()}),
+            "models": sorted(
+                f"{model} ({host})" for (host, model), used in self.models.items() if now - used < KEEP_WARM_FOR
+            ),
+        }
+
+    # -- sessions ------------------------------------------------------------
+
+    def _evict(self, rss: int) -> bool:
+        """Memory above the soft limit: drop old tool output of every conversation."""
+        from .memory import format_bytes, release_memory
+
+        if not self.sessions:
+            return False
+        freed = sum(session.client.evict_tool_output() for session in self.sessions)
+        release_memory()
+        print(f"memory at {format_bytes(rss)} is above the soft limit: "
+              f"evicted {freed} characters of old tool output", flush=True)
+        return True
+
+    async def _open_session(self, values: dict, env: dict[str, str] | None = None, python: dict | None = None):
+        """Start a conversation with a client's config, environment and interpreter.
+
+        Tools run as they would in the client's process: bash commands in
+        its environment (PATH, VIRTUAL_ENV, ...), and ``web_search`` over
+        its interpreter's packages, so clients in different environments
+        get different workspaces.
+        """
+        from .api import OllamaClient
+        from .commands import SessionCommands
+        from .factory import session_tools
+        from .session import SessionJournal, new_session_id
+        from .tracing import Tracer
+
+        known = {f.name for f in fields(Config)}
+        config = Config(**{k: v for k, v in values.items() if k in known})
+        python = python or {"prefix": sys.prefix, "path": sys.path}
+        key = (config.working_dir, config.ollama_host, config.embed_model, python["prefix"], *python["path"])
+        workspace = self.workspaces.get(key)
+        if workspace is None:
+            # Imports the tool modules and builds their indexes lazily; keep the loop free
+            workspace = await asyncio.to_thread(Workspace, config, python)
+            self.workspaces[key] = workspace
+            task = workspace.repo_map.refresh()
+            if task is not None:
+                await task
+        self.total_sessions += 1
+
+        tools = session_tools(config, workspace.tools, self.http, env=env)
+        client = OllamaClient(config, tools, http_client=self.http)
+        client.repo_map = workspace.repo_map
+        session_id = f"{new_session_id()}_d{self.total_sessions}"
+        client.journal = SessionJournal(config.working_dir, session_id=session_id)
+        client.tracer = Tracer(config.working_dir, session_id=session_id)
+
+        session = SessionCommands(client, self.memory)
+        self.sessions.add(session)
+        self._touch(config)
+        return session
+
+    async def _close_session(self, session):
+        self.sessions.discard(session)
+        await session.client.close()
+        session.client.tracer.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        from .commands import OPS
+
+        self._connections[asyncio.current_task()] = writer
+        session = None
+        turn: asyncio.Task | None = None
+
+        async def send(event: dict):
+            writer.write(_encode(event))
+            await writer.drain()
+
+        try:
+            while True:
+                request = await _receive(reader)
+                if request is None:
+                    break
+                op = request.get("op")
+                if op == "hello":
+                    if session is None:
+                        session = await self._open_session(
+                            request.get("config") or {}, request.get("env"), request.get("python"),
+                        )
+                    await send({"type": "ready", "session_id": session.client.journal.session_id, "pid": os.getpid()})
+                elif op == "chat":
+                    if session is None:
+                        await send({"type": "error", "message": "Send hello first"})
+                    elif turn is not None and not turn.done():
+                        await send({"type": "error", "message": "A turn is already running"})
+                    else:
+                        turn = asyncio.get_running_loop().create_task(
+                            self._chat(session, request.get("prompt", ""), send)
+                        )
+                elif op == "cancel":
+                    if turn is not None:
+                        turn.cancel()
+                elif op in OPS:
+                    if session is None:
+                        result = {"error": "Send hello first"}
+                    else:
+                        result = await session.run(op, {k: v for k, v in request.items() if k != "op"})
+                        if op == "model":
+                            self._touch(session.client.config)
+                    await send({"type": "reply", "op": op, **result})
+                elif op == "status":
+                    await send({"type": "status", **self.status()})
+                elif op == "stop":
+                    await send({"type": "stopping"})
+                    self.stop()
+                else:
+                    await send({"type": "error", "message": f"Unknown op: {op}"})
+        except ConnectionError:
+            pass
+        finally:
+            # A client that goes away mid-turn cancels it
+            if turn is not None and not turn.done():
+                turn.cancel()
+                await asyncio.gather(turn, return_exceptions=True)
+            if session is not None:
+                await self._close_session(session)
+            writer.close()
+            self._connections.pop(asyncio.current_task(), None)
+
+    async def _chat(self, session, prompt: str, send):
+        from .headless import run_turn
+
+        self._touch(session.client.config)
+        session.begin_turn()
+        try:
+            code = await run_turn(session.client, prompt, send)
+        except ConnectionError:
+            return
+        finally:
+            report = session.end_turn()
+        done = {"type": "done", "exit_code": code}
+        if report is not None:
+            done["profile"] = asdict(report)
+        try:
+            await send(done)
+        except ConnectionError:
+            pass
+
+    # -- keeping models loaded -----------------------------------------------
+
+    def _touch(self, config: Config):
+        for name in filter(None, (config.model, config.fast_model)):
+            model = (config.ollama_host, name)
+            self.keep_alive[model] = config.keep_alive
+            if model not in self.models:
+                asyncio.get_running_loop().create_task(self._preload(*model))
+            self.models[model] = time.monotonic()
+
+    async def _keep_warm(self):
+        while True:
+            await asyncio.sleep(KEEP_WARM_INTERVAL)
+            now = time.monotonic()
+            for model, used in list(self.models.items()):
+                if now - used > KEEP_WARM_FOR:
+                    del self.models[model]
+                    self.keep_alive.pop(model, None)
+                else:
+                    await self._preload(*model)
+
+    async def _preload(self, host: str, model: str):
+        """Load ``model`` (or extend its keep-alive) with an empty generate request.
+
+        The request carries the sessions' ``num_ctx``; a different one would
+        make Ollama load the model again with the wrong context size. It
+        carries their ``keep_alive`` too, so the daemon keeps a model loaded
+        the way the sessions' own requests do.
+        """
+        import httpx
+
+        from .contextsize import current_size
+
+        payload = {"model": model}
+        keep_alive = self.keep_alive.get((host, model))
+        if keep_alive:
+            payload["keep_alive"] = keep_alive
+        num_ctx = current_size(host, model)
+        if num_ctx:
+            payload["options"] = {"num_ctx": num_ctx}
+        try:
+            resp = await self.http.post(f"{host}/api/generate", json=payload)
+        except httpx.HTTPError:
+            return
+        if resp.status_code == 404:  # not pulled; nothing to keep warm
+            self.models.pop((host, model), None)
+            self.keep_alive.pop((host, model), None)
+
+
+# ---------------------------------------------------------------------------
+# Clients
+# ---------------------------------------------------------------------------
+
+async def attach(config: Config, prompt: str, emit, on_signals) -> int | None:
+    """Run one turn in the daemon, relaying its events through ``emit``.
+
+    Returns the turn's exit code, or ``None`` when no daemon accepted the
+    session, in which case the caller runs the turn itself. ``on_signals``
+    installs a callback for SIGINT / SIGTERM, which cancels the remote turn.
+    """
+    from .headless import EXIT_ERROR
+
+    connection = await _connect(config.daemon_socket)
+    if connection is None:
+        return None
+    reader, writer = connection
+    try:
+        writer.write(_encode(_hello(config)))
+        ready = await _receive(reader)
+        if ready is None or ready.get("type") != "ready":
+            return None
+        writer.write(_encode({"op": "chat", "prompt": prompt}))
+        on_signals(lambda: writer.write(_encode({"op": "cancel"})))
+        while True:
+            event = await _receive(reader)
+            if event is None:
+                await emit({"type": "error", "message": LOST})
+                return EXIT_ERROR
+            if event.get("type") == "done":
+                return event.get("exit_code", EXIT_ERROR)
+            await emit(event)
+    finally:
+        writer.close()
+
+
+class RemoteClient:
+    """A conversation held by the daemon, driven like a local ``OllamaClient``.
+
+    The REPL and the TUI use it both as their client and as their
+    ``SessionCommands``: ``chat_stream`` relays the turn's events (rebuilding
+    ``ToolResult`` objects), ``run`` sends a session command as a protocol op.
+    A reader task hands replies to the waiting ``run`` calls in order and
+    everything else to the running turn.
+    """
+
+    remote = True
+
+    def __init__(self, config: Config, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, session_id: str):
+        from .tracing import Tracer
+
+        self.config = config
+        self.session_id = session_id
+        # Tools, caches and the repository map live in the daemon
+        self.tools: dict = {}
+        self.repo_map = None
+        # Rendering happens here; the daemon traces the rest of the turn
+        self.tracer = Tracer(config.working_dir, session_id=f"{session_id}_ui")
+        self._writer = writer
+        self._replies: deque[asyncio.Future] = deque()
+        self._events: asyncio.Queue[dict | None] = asyncio.Queue()
+        # Cleared while a turn (or the drain of a cancelled one) is running
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._profile: dict | None = None
+        self._reader = asyncio.get_running_loop().create_task(self._read(reader))
+
+    async def _read(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                event = await _receive(reader)
+                if event is None:
+                    break
+                if event.get("type") == "reply":
+                    if self._replies:
+                        future = self._replies.popleft()
+                        if not future.done():
+                            future.set_result(event)
+                else:
+                    self._events.put_nowait(event)
+        finally:
+            for future in self._replies:
+                if not future.done():
+                    future.set_result({"type": "reply", "error": LOST})
+            self._replies.clear()
+            self._events.put_nowait(None)
+
+    def _send(self, message: dict):
+        if not self._reader.done():
+            self._writer.write(_encode(message))
+
+    async def run(self, op: str, args: dict | None = None) -> dict:
+        if self._reader.done():
+            return {"error": LOST}
+        future = asyncio.get_running_loop().create_future()
+        self._replies.append(future)
+        self._send({"op": op, **(args or {})})
+        reply = dict(await future)
+        reply.pop("type", None)
+        reply.pop("op", None)
+        return reply
+
+    async def chat_stream(self, prompt: str):
+        from .tools.base import ToolResult
+
+        await self._idle.wait()
+        self._idle.clear()
+        self._profile = None
+        self._send({"op": "chat", "prompt": prompt})
+        finished = False
+        error = None
+        try:
+            while True:
+                event = await self._events.get()
+                if event is None:
+                    finished = True
+                    raise ConnectionError(LOST)
+                kind = event.get("type")
+                if kind == "done":
+                    finished = True
+                    self._profile = event.get("profile")
+                    break
+                if kind == "error":
+                    error = event.get("message") or "The turn failed"
+                elif kind == "tool_result":
+                    result = ToolResult(
+                        output=event.get("output", ""), error=event.get("error", ""),
+                        is_error=event.get("is_error", False),
+                    )
+                    yield {"type": "tool_result", "name": event.get("name", ""), "result": result}
+                else:
+                    yield event
+        finally:
+            if finished:
+                self._idle.set()
+            else:
+                # Cancelled by the front-end: stop the remote turn and drop
+                # its remaining events before the next one starts
+                self._send({"op": "cancel"})
+                asyncio.get_running_loop().create_task(self._drain())
+        if error:
+            raise RuntimeError(error)
+
+    async def _drain(self):
+        while True:
+            event = await self._events.get()
+            if event is None or event.get("type") == "done":
+                break
+        self._idle.set()
+
+    def begin_turn(self):
+        pass  # the daemon profiles the turn where it runs
+
+    def end_turn(self):
+        from .profiling import TurnProfile
+
+        profile, self._profile = self._profile, None
+        return TurnProfile(**profile) if profile else None
+
+    async def check_connection(self) -> bool:
+        return (await self.run("model")).get("connected", False)
+
+    async def list_models(self) -> list[str]:
+        return (await self.run("model")).get("models", [])
+
+    async def preload(self):
+        pass  # the daemon loads the session's models when it opens it
+
+    async def close(self):
+        self._writer.close()
+        self._reader.cancel()
+        await asyncio.gather(self._reader, return_exceptions=True)
+        self.tracer.close()
+
+
+async def open_session(config: Config) -> RemoteClient | None:
+    """Start a conversation in the daemon; ``None`` when no daemon is running."""
+    connection = await _connect(config.daemon_socket)
+    if connection is None:
+        return None
+    reader, writer = connection
+    writer.write(_encode(_hello(config)))
+    ready = await _receive(reader)
+    if ready is None or ready.get("type") != "ready":
+        writer.close()
+        return None
+    return RemoteClient(config, reader, writer, ready["session_id"])
+
+
+async def _request(path: str, op: str) -> dict | None:
+    connection = await _connect(path)
+    if connection is None:
+        return None
+    reader, writer = connection
+    try:
+        writer.write(_encode({"op": op}))
+        return await _receive(reader)
+    finally:
+        writer.close()
+
+
+def start(config: Config, foreground: bool = False) -> int:
+    """``taiyo daemon start``: serve in this process or spawn a detached one."""
+    if not hasattr(asyncio, "start_unix_server"):
+        print("The daemon needs Unix domain sockets, which this platform lacks.", file=sys.stderr)
+        return 1
+    path = config.daemon_socket
+    if foreground:
+        try:
+            daemon = Daemon(path, config.memory_limit_mb * 1024 * 1024, config.memory_sample_interval)
+            asyncio.run(daemon.serve())
+        except RuntimeError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        return 0
+
+    running = asyncio.run(_request(path, "status"))
+    if running is not None:
+        print(f"taiyo daemon already running (pid {running.get('pid')}) on {path}")
+        return 0
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    log_path = os.path.join(os.path.dirname(path), "taiyo-daemon.log")
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [package_root, os.environ.get("PYTHONPATH")])))
+    env["TAIYO_DAEMON_SOCKET"] = path
+    with open(log_path, "ab") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-m", f"{__package__}.main", "daemon", "start", "--foreground"],
+            stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+            cwd=os.path.expanduser("~"), env=env, start_new_session=True,
+        )
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            print(f"taiyo daemon exited during start-up; see {log_path}", file=sys.stderr)
+            return 1
+        if asyncio.run(_request(path, "status")) is not None:
+            print(f"taiyo daemon started (pid {process.pid}) on {path}")
+            return 0
+        time.sleep(0.05)
+    print(f"taiyo daemon did not come up within {START_TIMEOUT:.0f}s; see {log_path}", file=sys.stderr)
+    return 1
+
+
+def stop(config: Config) -> int:
+    if asyncio.run(_request(config.daemon_socket, "stop")) is None:
+        print("taiyo daemon is not running")
+        return 1
+    # The daemon removes its socket once open sessions are closed
+    deadline = time.monotonic() + START_TIMEOUT
+    while os.path.exists(config.daemon_socket) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    print("taiyo daemon stopped")
+    return 0
+
+
+def status(config: Config) -> int:
+    info = asyncio.run(_request(config.daemon_socket, "status"))
+    if info is None:
+        print("taiyo daemon is not running")
+        return 1
+    print(f"taiyo daemon {info['pid']} on {config.daemon_socket}, up {info['uptime_s']}s")
+    print(f"  sessions: {info['sessions']} open, {info['total_sessions']} total")
+    for directory in info["workspaces"]:
+        print(f"  workspace: {directory}")
+    for model in info["models"]:
+        print(f"  warm model: {model}")
+    return 0
@@ -0,0 +1,450 @@
+"""Offline documentation index with BM25 ranking.
+
+Covers installed Python packages (metadata descriptions and docstrings),
+Markdown/reST files in the workspace and system man pages. The index is
+split into shards (one per package, man section directory or workspace)
+cached under ``~/.cache/taiyo/docs``; only shards whose signature changed
+are rebuilt. Builds run in a background thread: cached shards are
+available at once and rebuilt ones join the index as they finish, so a
+query during a cold build answers from what is indexed so far.
+"""
+from __future__ import annotations
+import ast
+import gzip
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from importlib import metadata
+
+from .symbols import MAX_FILE_SIZE, iter_workspace_files
+
+# 2: package shard keys include a hash of the install location
+INDEX_VERSION = 2
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have if in into is it its of on or "
+    "that the this to was were will with not".split()
+)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+SNIPPET_CHARS = 300
+MAX_DOC_CHARS = 20000
+MAX_PY_FILES_PER_DIST = 3000
+# Re-check installed packages and docs at most this often (seconds)
+REFRESH_INTERVAL = 300.0
+# Seconds a query waits for a running build before answering from the shards ready so far
+BUILD_WAIT = 2.0
+DOC_EXTENSIONS = frozenset({".md", ".rst", ".txt"})
+
+MAN_SECTION_RE = re.compile(r"^\.S[Hh]\s+\"?([^\"\n]*)\"?", re.MULTILINE)
+ROFF_ESCAPE_RE = re.compile(r"\\f[BIRP]|\\\(..|\\[-e&|^ ]|\\\*\(..|\\\*.")
+MD_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*)$", re.MULTILINE)
+
+
+def default_cache_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "taiyo", "docs")
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def _signature(*parts) -> str:
+    return hashlib.sha1(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+# ---------------------------------------------------------------------------
+# Document extraction: each returns a list of (title, location, text)
+# ---------------------------------------------------------------------------
+
+def _python_docs(dist: metadata.Distribution) -> list[tuple[str, str, str]]:
+    name = dist.metadata.get("Name", "") or ""
+    docs: list[tuple[str, str, str]] = []
+    summary = dist.metadata.get("Summary", "") or ""
+    description = dist.metadata.get("Description") or ""
+    if not description and hasattr(dist.metadata, "get_payload"):
+        description = dist.metadata.get_payload() or ""
+    if summary or description:
+        docs.append((f"{name} {dist.version}", f"pypi:{name}", f"{summary}\n\n{description}"))
+
+    files = [f for f in (dist.files or []) if str(f).endswith(".py")][:MAX_PY_FILES_PER_DIST]
+    for rel in files:
+        path = str(dist.locate_file(rel))
+        if "/tests/" in path or "/test/" in path:
+            continue
+        try:
+            if os.path.getsize(path) > MAX_FILE_SIZE:
+                continue
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                tree = ast.parse(f.read())
+        except (OSError, SyntaxError, ValueError):
+            continue
+        module = str(rel)[:-3].replace("/", ".").replace(".__init__", "")
+        doc = ast.get_docstring(tree)
+        if doc:
+            docs.append((module, path, doc))
+        for node in tree.body:
+            _collect_docstrings(node, module, path, docs)
+    return docs
+
+
+def _collect_docstrings(node: ast.AST, prefix: str, path: str, docs: list):
+    if not isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+        return
+    if node.name.startswith("_") and node.name != "__init__":
+        return
+    qualname = f"{prefix}.{node.name}"
+    doc = ast.get_docstring(node)
+    if doc:
+        docs.append((qualname, f"{path}:{node.lineno}", doc))
+    if isinstance(node, ast.ClassDef):
+        for child in node.body:
+            _collect_docstrings(child, qualname, path, docs)
+
+
+def _markdown_docs(path: str, rel: str) -> list[tuple[str, str, str]]:
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read()
+    except OSError:
+        return []
+    docs = []
+    matches = list(MD_HEADING_RE.finditer(text))
+    if not matches:
+        return [(rel, path, text)]
+    if matches[0].start() > 0 and text[:matches[0].start()].strip():
+        docs.append((rel, path, text[:matches[0].start()]))
+    for i, m in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        line = text.count("\n", 0, m.start()) + 1
+        docs.append((f"{rel}: {m.group(2).strip()}", f"{path}:{line}", text[m.start():end]))
+    return docs
+
+
+def _man_docs(path: str) -> list[tuple[str, str, str]]:
+    try:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8", errors="replace") as f:
+            text = f.read(MAX_FILE_SIZE)
+    except (OSError, EOFError, ValueError):
+        return []
+    base = os.path.basename(path)
+    if base.endswith(".gz"):
+        base = base[:-3]
+    page, _, section = base.rpartition(".")
+    title = f"{page}({section})"
+    docs = []
+    matches = list(MAN_SECTION_RE.finditer(text))
+    for i, m in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        body = _strip_roff(text[m.end():end])
+        if body.strip():
+            docs.append((f"{title} {m.group(1).strip()}", f"man {section} {page}", body))
+    return docs
+
+
+def _strip_roff(text: str) -> str:
+    lines = []
+    for line in text.splitlines():
+        if line.startswith(('.\\"', "'\\\"")):
+            continue
+        if line.startswith("."):
+            # Keep macro arguments (e.g. ".B --verbose"), drop the macro name
+            _, _, line = line.partition(" ")
+        lines.append(ROFF_ESCAPE_RE.sub("", line))
+    return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+
+class _Shard:
+    """Postings and document table for one source."""
+
+    def __init__(self, data: dict):
+        self.docs: list[list[str]] = data["docs"]  # [title, location, snippet]
+        self.lengths: list[int] = data["lengths"]
+        self.postings: dict[str, list[int]] = data["postings"]  # term -> [doc, tf, doc, tf, ...]
+        self.kind: str = data["kind"]
+
+    @staticmethod
+    def build(kind: str, documents: list[tuple[str, str, str]]) -> dict:
+        docs, lengths = [], []
+        postings: dict[str, list[int]] = {}
+        for title, location, text in documents:
+            text = text[:MAX_DOC_CHARS]
+            terms = tokenize(title) * 2 + tokenize(text)
+            if not terms:
+                continue
+            doc_id = len(docs)
+            snippet = " ".join(text.split())[:SNIPPET_CHARS]
+            docs.append([title, location, snippet])
+            lengths.append(len(terms))
+            for term, tf in Counter(terms).items():
+                postings.setdefault(term, []).extend((doc_id, tf))
+        return {"kind": kind, "docs": docs, "lengths": lengths, "postings": postings}
+
+
+def _write_json(path: str, data, **kwargs):
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, **kwargs)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class DocIndex:
+    """Lazily built, incrementally refreshed documentation index."""
+
+    def __init__(
+        self, working_dir: str, cache_dir: str | None = None, man_dirs: list[str] | None = None,
+        python: dict | None = None,
+    ):
+        self.working_dir = os.path.abspath(working_dir)
+        # Interpreter whose packages are indexed, as {"prefix", "path"}: the
+        # daemon indexes its client's, everything else this process's
+        python = python or {}
+        self.prefix = python.get("prefix") or sys.prefix
+        self.sys_path = list(python.get("path") or sys.path)
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.man_dirs = man_dirs if man_dirs is not None else self._default_man_dirs()
+        # Replaced, never mutated, so queries can read it while a build runs
+        self._shards: dict[str, _Shard] = {}
+        # Source signature of each shard in ``_shards``; the manifest may not be writable
+        self._signatures: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._refreshed_at: float | None = None
+        self._builder: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        # Sources ready / total during the current build
+        self.progress = (0, 0)
+        # Why the last refresh could not write the cache ("" if it could)
+        self.error = ""
+
+    @staticmethod
+    def _default_man_dirs() -> list[str]:
+        roots = [p for p in os.environ.get("MANPATH", "").split(":") if p]
+        roots += ["/usr/share/man", "/usr/local/share/man"]
+        dirs = []
+        for root in dict.fromkeys(roots):
+            for section in ("1", "3", "5", "7", "8"):
+                path = os.path.join(root, f"man{section}")
+                if os.path.isdir(path):
+                    dirs.append(path)
+        return dirs
+
+    # -- sources -------------------------------------------------------------
+
+    def _sources(self) -> dict[str, tuple[str, str, object]]:
+        """Map shard key -> (kind, signature, loader argument)."""
+        sources: dict[str, tuple[str, str, object]] = {}
+        seen_dists: set[str] = set()
+        for dist in metadata.distributions(path=self.sys_path):
+            name = (dist.metadata.get("Name") or "").lower()
+            if not name or name in seen_dists:
+                continue
+            seen_dists.add(name)
+            location = str(dist.locate_file(""))
+            # Environments with the same package at different paths keep separate shards
+            key = f"py-{re.sub(r'[^a-z0-9]+', '_', name)}-{dist.version}-{_signature(location)[:8]}"
+            sources[key] = ("python", _signature(name, dist.version, location), dist)
+
+        project_files = []
+        for path in iter_workspace_files(self.working_dir, DOC_EXTENSIONS):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            project_files.append((path, st.st_mtime_ns, st.st_size))
+        if project_files:
+            key = f"project-{_signature(self.working_dir)}"
+            sources[key] = ("project", _signature(project_files), [p for p, _, _ in project_files])
+
+        for man_dir in self.man_dirs:
+            try:
+                entries = os.listdir(man_dir)
+                st = os.stat(man_dir)
+            except OSError:
+                continue
+            key = f"man-{_signature(man_dir)}"
+            sources[key] = ("man", _signature(st.st_mtime_ns, len(entries)), man_dir)
+        return sources
+
+    def _extract(self, kind: str, arg) -> list[tuple[str, str, str]]:
+        if kind == "python":
+            return _python_docs(arg)
+        if kind == "project":
+            docs = []
+            for path in arg:
+                docs.extend(_markdown_docs(path, os.path.relpath(path, self.working_dir)))
+            return docs
+        docs = []
+        for fname in sorted(os.listdir(arg)):
+            docs.extend(_man_docs(os.path.join(arg, fname)))
+        return docs
+
+    # -- building ------------------------------------------------------------
+
+    @property
+    def _manifest_path(self) -> str:
+        scope = _signature(self.prefix, self.working_dir)
+        return os.path.join(self.cache_dir, f"manifest-{scope}.json")
+
+    def _shard_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, "shards", f"{key}.json")
+
+    def refresh(self) -> dict[str, int]:
+        """Rebuild shards whose source changed; load the rest from cache.
+
+        Shards are published to queries as they become available: first
+        everything loadable from the cache, then each rebuilt shard. A cache
+        that cannot be written (read-only or full disk) leaves the rebuilt
+        shards in memory only and is reported in ``error``.
+        """
+        with self._lock:
+            try:
+                return self._refresh()
+            finally:
+                # Also after a failure, so queries don't start the same build again
+                self._refreshed_at = time.monotonic()
+
+    def _refresh(self) -> dict[str, int]:
+        try:
+            with open(self._manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        previous: dict[str, str] = manifest.get("shards", {})
+        known = previous if manifest.get("version") == INDEX_VERSION else {}
+
+        stats = {"rebuilt": 0, "cached": 0, "removed": 0}
+        sources = self._sources()
+        # Shards whose source changed keep answering until their rebuild is done
+        shards = {key: shard for key, shard in self._shards.items() if key in sources}
+        signatures: dict[str, str] = {}
+        stale = []
+        for key, (kind, signature, arg) in sources.items():
+            signatures[key] = signature
+            if key in self._shards and self._signatures.get(key) == signature:
+                stats["cached"] += 1
+                continue
+            if known.get(key) == signature:
+                try:
+                    with open(self._shard_path(key), "r", encoding="utf-8") as f:
+                        shards[key] = _Shard(json.load(f))
+                    stats["cached"] += 1
+                    continue
+                except (OSError, ValueError, KeyError):
+                    pass
+            stale.append(key)
+        self._shards = dict(shards)
+        self.progress = (len(sources) - len(stale), len(sources))
+
+        errors = []
+        try:
+            os.makedirs(os.path.join(self.cache_dir, "shards"), exist_ok=True)
+        except OSError as e:
+            errors.append(e)
+        for key in stale:
+            kind, _, arg = sources[key]
+            try:
+                data = _Shard.build(kind, self._extract(kind, arg))
+            except OSError:
+                del signatures[key]  # the source went away during the build
+                continue
+            shards[key] = _Shard(data)
+            self._shards = dict(shards)
+            self.progress = (self.progress[0] + 1, len(sources))
+            stats["rebuilt"] += 1
+            if not errors:
+                try:
+                    _write_json(self._shard_path(key), data, separators=(",", ":"))
+                except OSError as e:
+                    errors.append(e)
+
+        # Shards of sources that disappeared (or of an older index version)
+        for key in set(previous) - set(signatures):
+            try:
+                os.remove(self._shard_path(key))
+                stats["removed"] += 1
+            except OSError:
+                pass
+        if signatures != known and not errors:
+            try:
+                _write_json(self._manifest_path, {"version": INDEX_VERSION, "shards": signatures})
+            except OSError as e:
+                errors.append(e)
+        self._signatures = {key: signatures[key] for key in shards if key in signatures}
+        self.error = f"cannot write the cache in {self.cache_dir}: {errors[0]}" if errors else ""
+        return stats
+
+    def start_refresh(self) -> bool:
+        """Refresh in a background thread if the index is stale; return whether a build is running."""
+        with self._start_lock:
+            if self.building:
+                return True
+            if self._refreshed_at is not None and time.monotonic() - self._refreshed_at <= REFRESH_INTERVAL:
+                return False
+            self._builder = threading.Thread(target=self.refresh, name="taiyo-docsearch", daemon=True)
+            self._builder.start()
+            return True
+
+    @property
+    def building(self) -> bool:
+        return self._builder is not None and self._builder.is_alive()
+
+    # -- queries -------------------------------------------------------------
+
+    def search(
+        self, query: str, limit: int = 10, kinds: set[str] | None = None, wait: float = BUILD_WAIT,
+    ) -> list[tuple[float, str, list[str]]]:
+        """Return ``(score, kind, [title, location, snippet])`` ranked by BM25.
+
+        A stale index is refreshed in the background; the query waits up to
+        ``wait`` seconds for it and then uses the shards ready so far.
+        """
+        if self.start_refresh() and wait:
+            self._builder.join(wait)
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        shards = [s for s in list(self._shards.values()) if not kinds or s.kind in kinds]
+        total_docs = sum(len(s.lengths) for s in shards)
+        if not total_docs:
+            return []
+        avgdl = sum(sum(s.lengths) for s in shards) / total_docs
+        df = {t: sum(len(s.postings.get(t, ())) // 2 for s in shards) for t in terms}
+
+        scored: list[tuple[float, str, list[str]]] = []
+        for shard in shards:
+            scores: dict[int, float] = {}
+            for term in terms:
+                postings = shard.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (total_docs - df[term] + 0.5) / (df[term] + 0.5))
+                for i in range(0, len(postings), 2):
+                    doc, tf = postings[i], postings[i + 1]
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * shard.lengths[doc] / avgdl)
+                    scores[doc] = scores.get(doc, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+            for doc, score in scores.items():
+                scored.append((score, shard.kind, shard.docs[doc]))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return scored[:limit]
@@ -0,0 +1,89 @@
+"""Building the tool set and the Ollama client of a conversation.
+
+Every front-end (REPL, TUI, ``taiyo -p``), the batch runner and the daemon
+build their tools and clients here. Tool modules and httpx are imported
+inside the functions, so importing this module stays cheap at startup.
+"""
+from __future__ import annotations
+
+from .config import Config
+
+
+def create_tools(config: Config, http_client=None, python: dict | None = None) -> list:
+    """Instantiate the full tool set for ``config.working_dir``.
+
+    ``python`` selects the interpreter whose packages ``web_search`` indexes
+    (see ``docsearch.DocIndex``).
+    """
+    from .tools import (
+        BashTool,
+        ReadTool,
+        WriteTool,
+        EditTool,
+        ApplyPatchTool,
+        GrepTool,
+        GlobTool,
+        WebSearchTool,
+        SymbolsTool,
+        SemanticSearchTool,
+        TaskTool,
+    )
+
+    tools = [
+        BashTool(cwd=config.working_dir),
+        ReadTool(cwd=config.working_dir),
+        WriteTool(cwd=config.working_dir),
+        EditTool(cwd=config.working_dir),
+        ApplyPatchTool(cwd=config.working_dir),
+        GrepTool(cwd=config.working_dir),
+        GlobTool(cwd=config.working_dir),
+        WebSearchTool(cwd=config.working_dir, python=python),
+        SymbolsTool(cwd=config.working_dir),
+        SemanticSearchTool(config),
+    ]
+    tools.append(TaskTool(config, tools, http_client=http_client))
+    return tools
+
+
+def session_tools(config: Config, shared: list, http_client=None, env: dict[str, str] | None = None) -> list:
+    """``shared`` tools plus a task tool bound to one conversation.
+
+    The daemon and the batch runner share tools between conversations with
+    different configs; sub-agents must run with the caller's model, limits
+    and connection pool, not those of whoever created the shared set. With
+    ``env`` (a daemon client's environment) the conversation gets a bash
+    tool of its own that runs commands in it.
+    """
+    from .tools import BashTool, TaskTool
+
+    tools = [t for t in shared if t.name != "task"]
+    if env is not None:
+        tools = [BashTool(cwd=config.working_dir, env=env) if t.name == "bash" else t for t in tools]
+    tools.append(TaskTool(config, tools, http_client=http_client))
+    return tools
+
+
+async def close_tools(tools):
+    """Release what the tools hold between calls (e.g. embedding connections)."""
+    for tool in tools:
+        await tool.close()
+
+
+def create_client(config: Config):
+    """Build the Ollama client with the full tool set.
+
+    This is where httpx and every tool module get imported, so front-ends
+    call it off the critical path (see ``main.run_repl``).
+    """
+    from .api import OllamaClient
+    from .repomap import RepoMap
+    from .session import SessionJournal
+    from .tracing import Tracer
+
+    client = OllamaClient(config, create_tools(config))
+    # Sub-agents share the conversation's connection pool
+    client.tools["task"].http_client = client.client
+    client.repo_map = RepoMap(config.working_dir, token_budget=config.repo_map_tokens)
+    client.journal = SessionJournal(config.working_dir)
+    client.tracer = Tracer(config.working_dir, session_id=client.journal.session_id)
+    return client
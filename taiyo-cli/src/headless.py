@@ -0,0 +1,133 @@
+"""Non-interactive one-shot mode: ``taiyo -p "prompt"``.
+
+Runs a single agent turn and writes every ``chat_stream`` chunk to stdout
+as one JSON object per line, as soon as it happens (``text`` events are
+pieces of the reply as the model streams it)::
+
+    {"type": "text", "content": "..."}
+    {"type": "tool_call", "name": "bash", "arguments": {...}}
+    {"type": "tool_result", "name": "bash", "output": "...", "error": "", "is_error": false}
+    {"type": "round_limit", "rounds": 15}
+    {"type": "loop", "reason": "repeated read call", "rounds": 4, "saved": 11}
+    {"type": "context", "message": "...", "model": "qwen2.5-coder:7b", "tokens": 26000, "limit": 32768}
+    {"type": "error", "message": "..."}
+    {"type": "done", "exit_code": 0, "duration_ms": 1234}
+
+No terminal UI is loaded and the Ollama connection is not probed first;
+an unreachable server surfaces as an ``error`` event and exit code. When a
+daemon (``taiyo daemon start``) is listening, the turn runs there on warm
+connections and indexes and this process only relays its events.
+"""
+from __future__ import annotations
+import asyncio
+import json
+import signal
+import sys
+import time
+from typing import Awaitable, Callable
+
+from .config import Config
+
+EXIT_OK = 0
+EXIT_ERROR = 1  # model request failed (HTTP error, unknown model, ...)
+EXIT_UNREACHABLE = 3  # could not connect to Ollama
+EXIT_ROUND_LIMIT = 4  # stopped at the tool-round limit without a final answer
+EXIT_LOOP = 5  # stopped because the agent kept repeating itself
+EXIT_INTERRUPTED = 130  # SIGINT / SIGTERM
+
+Emit = Callable[[dict], Awaitable[None]]
+
+
+async def _emit(event: dict):
+    sys.stdout.write(json.dumps(event, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+
+
+def _on_signals(callback):
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, callback)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+
+async def run_headless(config: Config, prompt: str) -> int:
+    """Run one turn for ``prompt``, streaming NDJSON events; return the exit code."""
+    started = time.perf_counter()
+    code = None
+    if config.use_daemon:
+        from .daemon import attach
+
+        code = await attach(config, prompt, _emit, _on_signals)
+    if code is None:
+        code = await _run_local(config, prompt)
+    await _emit({"type": "done", "exit_code": code, "duration_ms": round((time.perf_counter() - started) * 1000)})
+    return code
+
+
+async def _run_local(config: Config, prompt: str) -> int:
+    from .factory import close_tools, create_client
+
+    client = create_client(config)
+    try:
+        task = client.repo_map.refresh()
+        if task is not None:
+            await task
+        # Built once for this turn; skip the rebuild chat_stream schedules afterwards
+        client.repo_map.token_budget = 0
+
+        turn = asyncio.ensure_future(run_turn(client, prompt, _emit))
+        _on_signals(turn.cancel)
+        return await turn
+    finally:
+        await client.close()
+        await close_tools(client.tools.values())
+
+
+async def run_turn(client, prompt: str, emit: Emit) -> int:
+    """Stream one turn of ``client`` as events through ``emit``; return the exit code.
+
+    Failures become an ``error`` event; so does cancelling the task running
+    it, which is how both SIGINT here and a daemon client's ``cancel``
+    interrupt a turn.
+    """
+    import httpx
+
+    try:
+        return await _stream_turn(client, prompt, emit)
+    except asyncio.CancelledError:
+        await emit({"type": "error", "message": "Interrupted"})
+        return EXIT_INTERRUPTED
+    except httpx.HTTPStatusError as e:
+        try:
+            detail = e.response.json().get("error") or e.response.text
+        except ValueError:
+            detail = e.response.text
+        await emit({"type": "error", "message": f"Ollama returned {e.response.status_code}: {detail}"})
+        return EXIT_ERROR
+    except httpx.ConnectError as e:
+        await emit({"type": "error", "message": f"Cannot connect to Ollama at {client.config.ollama_host}: {e}"})
+        return EXIT_UNREACHABLE
+    except Exception as e:
+        await emit({"type": "error", "message": str(e) or type(e).__name__})
+        return EXIT_ERROR
+
+
+async def _stream_turn(client, prompt: str, emit: Emit) -> int:
+    code = EXIT_OK
+    async for chunk in client.chat_stream(prompt):
+        kind = chunk["type"]
+        if kind == "tool_result":
+            result = chunk["result"]
+            await emit({
+                "type": "tool_result", "name": chunk["name"],
+                "output": result.output, "error": result.error, "is_error": result.is_error,
+            })
+        else:
+            await emit(chunk)
+            if kind == "round_limit":
+                code = EXIT_ROUND_LIMIT
+            elif kind == "loop":
+                code = EXIT_LOOP
+    return code
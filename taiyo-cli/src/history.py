@@ -0,0 +1,211 @@
+"""Full-text search over past session logs, with optional archival rollup."""
+from __future__ import annotations
+import gzip
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+from .session import BlobStore, list_sessions, sessions_dir
+
+INDEX_VERSION = 1
+# Indexed text per record; long tool output is cut to keep the index small
+MAX_ENTRY_CHARS = 4000
+TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass
+class HistoryHit:
+    session_id: str
+    role: str
+    ts: str
+    snippet: str
+    score: float
+
+
+class HistoryIndex:
+    """SQLite FTS5 index over every ``session_*.jsonl`` in a workspace.
+
+    Session logs are append-only, so the index remembers how many bytes of
+    each log it has consumed and ``refresh`` only parses what was appended
+    since. Queries run entirely inside SQLite (BM25 ranking, snippets), so
+    nothing but the matching rows is loaded into memory.
+
+    ``rollup`` moves logs older than a cutoff into one gzip archive per
+    month under ``.taiyo/archive``; their rows stay in the index, so they
+    remain searchable.
+    """
+
+    def __init__(self, working_dir: str):
+        self.dir = sessions_dir(working_dir)
+        self.working_dir = working_dir
+        self.db_path = os.path.join(self.dir, "history.db")
+        self.archive_dir = os.path.join(self.dir, "archive")
+        self.blobs = BlobStore(os.path.join(self.dir, "blobs"))
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(self.dir, exist_ok=True)
+        db = sqlite3.connect(self.db_path)
+        version = db.execute("PRAGMA user_version").fetchone()[0]
+        if version != INDEX_VERSION:
+            db.executescript(
+                """
+                DROP TABLE IF EXISTS sessions;
+                DROP TABLE IF EXISTS entries;
+                CREATE TABLE sessions (
+                    session_id TEXT PRIMARY KEY,
+                    consumed INTEGER NOT NULL,
+                    archived INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE VIRTUAL TABLE entries USING fts5(
+                    text, session_id UNINDEXED, role UNINDEXED, ts UNINDEXED,
+                    tokenize = 'unicode61'
+                );
+                """
+            )
+            db.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+            db.commit()
+        return db
+
+    # -- indexing ------------------------------------------------------------
+
+    def refresh(self) -> dict[str, int]:
+        """Index bytes appended to session logs since the last refresh."""
+        with self._lock:
+            db = self._connect()
+            try:
+                return self._refresh(db)
+            finally:
+                db.close()
+
+    def _refresh(self, db: sqlite3.Connection) -> dict[str, int]:
+        known = {sid: (consumed, archived) for sid, consumed, archived in db.execute(
+            "SELECT session_id, consumed, archived FROM sessions"
+        )}
+        stats = {"sessions": 0, "entries": 0, "removed": 0}
+        live = set()
+        for info in list_sessions(self.working_dir):
+            live.add(info.session_id)
+            consumed = known.get(info.session_id, (0, 0))[0]
+            if info.size < consumed:
+                # Rewritten log: start over
+                db.execute("DELETE FROM entries WHERE session_id = ?", (info.session_id,))
+                consumed = 0
+            if info.size == consumed:
+                continue
+            rows, consumed = self._read_log(info.path, info.session_id, consumed)
+            db.executemany("INSERT INTO entries (text, session_id, role, ts) VALUES (?, ?, ?, ?)", rows)
+            db.execute(
+                "INSERT INTO sessions (session_id, consumed) VALUES (?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET consumed = excluded.consumed",
+                (info.session_id, consumed),
+            )
+            stats["sessions"] += 1
+            stats["entries"] += len(rows)
+
+        # Logs deleted by hand drop out of the index; archived ones stay
+        for sid, (_, archived) in known.items():
+            if sid not in live and not archived:
+                db.execute("DELETE FROM entries WHERE session_id = ?", (sid,))
+                db.execute("DELETE FROM sessions WHERE session_id = ?", (sid,))
+                stats["removed"] += 1
+        db.commit()
+        return stats
+
+    def _read_log(self, path: str, session_id: str, offset: int) -> tuple[list[tuple], int]:
+        rows = []
+        with open(path, "rb") as log:
+            log.seek(offset)
+            data = log.read()
+        # Only complete lines; a record still being written is picked up next time
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get("type", "message") != "message":
+                continue
+            text = self._entry_text(entry)
+            if text.strip():
+                rows.append((text, session_id, entry.get("role", ""), entry.get("ts", "")))
+        return rows, offset + end
+
+    def _entry_text(self, entry: dict) -> str:
+        parts = []
+        content = entry.get("content", "")
+        if "content_blob" in entry:
+            content = self.blobs.get(entry["content_blob"])[:MAX_ENTRY_CHARS]
+        parts.append(content)
+        calls = entry.get("tool_calls")
+        if "tool_calls_blob" in entry:
+            calls = self.blobs.get(entry["tool_calls_blob"])[:MAX_ENTRY_CHARS]
+        if calls:
+            parts.append(calls if isinstance(calls, str) else json.dumps(calls, ensure_ascii=False))
+        return "\n".join(parts)[:MAX_ENTRY_CHARS]
+
+    # -- queries -------------------------------------------------------------
+
+    def search(self, query: str, limit: int = 10) -> list[HistoryHit]:
+        """Rank past messages by BM25; all terms must match (prefix on the last)."""
+        terms = TERM_RE.findall(query)
+        if not terms:
+            return []
+        # Quote every term so user input can't be parsed as FTS5 syntax
+        match = " ".join(f'"{t}"' for t in terms[:-1]) + f' "{terms[-1]}"*'
+        self.refresh()
+        with self._lock:
+            db = self._connect()
+            try:
+                rows = db.execute(
+                    "SELECT session_id, role, ts, snippet(entries, 0, '[', ']', '...', 16), bm25(entries) "
+                    "FROM entries WHERE entries MATCH ? ORDER BY bm25(entries) LIMIT ?",
+                    (match.strip(), limit),
+                ).fetchall()
+            finally:
+                db.close()
+        return [HistoryHit(sid, role, ts, " ".join(snippet.split()), -score) for sid, role, ts, snippet, score in rows]
+
+    # -- rollup --------------------------------------------------------------
+
+    def rollup(self, older_than_days: float = 30, keep: set[str] | None = None) -> int:
+        """Archive session logs not modified for ``older_than_days``.
+
+        Each log is appended to ``archive/<YYYY-MM>.jsonl.gz`` as one header
+        line (``{"session": id}``) followed by its records, then removed
+        together with its offset index. Returns the number of sessions
+        archived. ``keep`` lists session ids that must stay (the active one).
+        """
+        self.refresh()
+        cutoff = time.time() - older_than_days * 86400
+        archived = 0
+        with self._lock:
+            db = self._connect()
+            try:
+                os.makedirs(self.archive_dir, exist_ok=True)
+                for info in list_sessions(self.working_dir):
+                    if info.modified > cutoff or (keep and info.session_id in keep):
+                        continue
+                    month = time.strftime("%Y-%m", time.localtime(info.modified))
+                    archive = os.path.join(self.archive_dir, f"{month}.jsonl.gz")
+                    with open(info.path, "rb") as src, gzip.open(archive, "ab") as dst:
+                        dst.write(json.dumps({"session": info.session_id}).encode("utf-8") + b"\n")
+                        dst.write(src.read())
+                    db.execute(
+                        "INSERT INTO sessions (session_id, consumed, archived) VALUES (?, ?, 1) "
+                        "ON CONFLICT(session_id) DO UPDATE SET archived = 1",
+                        (info.session_id, info.size),
+                    )
+                    db.commit()
+                    os.remove(info.path)
+                    index_path = info.path[:-len(".jsonl")] + ".idx"
+                    if os.path.exists(index_path):
+                        os.remove(index_path)
+                    archived += 1
+            finally:
+                db.close()
+        return archived
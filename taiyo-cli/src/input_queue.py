@@ -0,0 +1,56 @@
+"""Per-session queue for messages submitted while a turn is running."""
+from __future__ import annotations
+
+
+class InputQueue:
+    """Ordered list of pending user messages.
+
+    Front-ends ``put`` messages that arrive while the agent is busy and
+    ``take`` the next request once the current turn ends. Items are
+    addressed by their 1-based position so they can be shown, edited and
+    cancelled by number.
+    """
+
+    def __init__(self, merge: bool = True):
+        self.merge = merge
+        self._items: list[str] = []
+
+    def put(self, text: str) -> int:
+        """Queue a message; return its position."""
+        self._items.append(text)
+        return len(self._items)
+
+    def take(self) -> str | None:
+        """Pop the next request, or None if the queue is empty.
+
+        With ``merge`` enabled every queued message is combined into one
+        request, so follow-ups typed during a long turn cost one model round
+        instead of one each.
+        """
+        if not self._items:
+            return None
+        if self.merge:
+            text = "\n\n".join(self._items)
+            self._items.clear()
+            return text
+        return self._items.pop(0)
+
+    def pop(self, position: int) -> str:
+        """Remove and return the message at ``position`` (1-based)."""
+        if not 1 <= position <= len(self._items):
+            raise IndexError(f"No queued message #{position}")
+        return self._items.pop(position - 1)
+
+    def replace(self, position: int, text: str):
+        if not 1 <= position <= len(self._items):
+            raise IndexError(f"No queued message #{position}")
+        self._items[position - 1] = text
+
+    def clear(self):
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
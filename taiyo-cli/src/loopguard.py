@@ -0,0 +1,129 @@
+"""Per-turn loop detection and adaptive round budget for ``chat_stream``.
+
+Small models tend to get stuck: re-reading the same file, re-running the
+same grep, or alternating between two edits that both fail, until the
+round limit ends the turn. ``TurnGuard`` watches one turn's tool calls:
+
+* a call identical to an earlier one, with nothing changed in between
+  (no successful write, edit, patch or command), is not run again;
+* calls that cycle (``A B A B``, ``A B C A B C``) are flagged;
+* a tool failing with an error it already returned this turn is flagged.
+
+Each of these is a strike and puts a corrective message in the history
+instead of (or after) the tool output. At ``MAX_STRIKES`` the turn ends.
+
+The round budget starts at ``Config.max_tool_rounds``. When it runs out
+while the last ``PROGRESS_WINDOW`` rounds all produced results not seen
+before in the turn, it grows by ``ROUND_EXTENSION`` up to
+``Config.max_tool_rounds_cap``.
+"""
+from __future__ import annotations
+import hashlib
+import json
+from collections import Counter
+
+# Strikes (repeats, cycles, repeated failures) before the turn is ended
+MAX_STRIKES = 2
+# Longest cycle of calls recognised
+MAX_CYCLE = 3
+# Rounds that must all have made progress for the budget to grow
+PROGRESS_WINDOW = 3
+ROUND_EXTENSION = 5
+# Tools after whose success an identical earlier call may legitimately differ
+MUTATING_TOOLS = ("write", "edit", "apply_patch", "bash")
+
+REPEAT_MESSAGE = (
+    "Repeated call: this exact {name} call already ran this turn and nothing has changed "
+    "since, so it would return the same result. Use that result, try something different, "
+    "or give your answer."
+)
+CYCLE_MESSAGE = (
+    "You are going in circles: the last {count} tool calls repeat the {count} before them. "
+    "Stop and try a different approach, or give your answer with what you know."
+)
+FAILURE_NOTE = (
+    "\n\n[{name} already failed with this exact error earlier in this turn. "
+    "Repeating the approach will not work; change it or explain the problem to the user.]"
+)
+
+
+def _signature(name: str, arguments: dict) -> str:
+    try:
+        args = json.dumps(arguments, sort_keys=True, ensure_ascii=False)
+    except (TypeError, ValueError):
+        args = repr(arguments)
+    return f"{name}:{args}"
+
+
+def _fingerprint(name: str, text: str) -> str:
+    return hashlib.sha1(f"{name}\0{text}".encode("utf-8", "replace")).hexdigest()
+
+
+class TurnGuard:
+    """Tracks the tool calls of one turn; see the module docstring."""
+
+    def __init__(self, budget: int, cap: int = 0):
+        self.budget = budget
+        self.cap = max(cap, budget)
+        self.strikes = 0
+        self.reason = ""
+        self.extensions = 0
+        self._calls: list[str] = []
+        # Signature -> workspace epoch of its last run
+        self._last_run: dict[str, int] = {}
+        self._epoch = 0
+        self._results: set[str] = set()
+        self._errors: Counter[tuple[str, str]] = Counter()
+        self._progress: list[bool] = []
+        self._round_progress = False
+
+    @property
+    def stuck(self) -> bool:
+        return self.strikes >= MAX_STRIKES
+
+    def _strike(self, reason: str):
+        self.strikes += 1
+        self.reason = reason
+
+    def check(self, name: str, arguments: dict) -> str | None:
+        """Before running a call: the message to return instead, if it should not run."""
+        sig = _signature(name, arguments)
+        self._calls.append(sig)
+        if self._last_run.get(sig) == self._epoch:
+            self._strike(f"repeated {name} call")
+            return REPEAT_MESSAGE.format(name=name)
+        # A period of one is a plain repeat, caught above
+        for period in range(2, MAX_CYCLE + 1):
+            recent = self._calls[-2 * period:]
+            if len(recent) == 2 * period and recent[:period] == recent[period:]:
+                self._strike(f"cycle of {period} tool calls")
+                return CYCLE_MESSAGE.format(count=period)
+        return None
+
+    def record(self, name: str, arguments: dict, output: str, error: str = "") -> str:
+        """After running a call: a note to append to its result (empty if none)."""
+        note = ""
+        if error:
+            key = (name, error)
+            self._errors[key] += 1
+            if self._errors[key] > 1:
+                self._strike(f"repeated {name} failure")
+                note = FAILURE_NOTE.format(name=name)
+        elif name in MUTATING_TOOLS:
+            self._epoch += 1
+        self._last_run[_signature(name, arguments)] = self._epoch
+        fingerprint = _fingerprint(name, error or output)
+        if fingerprint not in self._results:
+            self._results.add(fingerprint)
+            self._round_progress = True
+        return note
+
+    def end_round(self, rounds: int):
+        """Close a round; grow the budget if it is spent and rounds keep making progress."""
+        self._progress.append(self._round_progress)
+        self._round_progress = False
+        recent = self._progress[-PROGRESS_WINDOW:]
+        if (rounds >= self.budget and self.budget < self.cap
+                and len(recent) == PROGRESS_WINDOW and all(recent)):
+            self.budget = min(self.cap, self.budget + ROUND_EXTENSION)
+            self.extensions += 1
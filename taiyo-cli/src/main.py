@@ -1,11 +1,14 @@
 """Taiyo CLI - Main entry point with Claude Code-like REPL."""
 from __future__ import annotations
+import time
+
+# Taken before anything else is imported, for --startup-profile
+_LAUNCH = time.perf_counter()
+
 import os
 import sys
 import asyncio
-import json
-import time
-import threading
+import signal
 import subprocess
 from pathlib import Path
 from datetime import datetime
@@ -13,6 +16,9 @@ from datetime import datetime
 import click
 
 from .config import Config
+from .factory import close_tools, create_client
+from .input_queue import InputQueue
+from .startup import StartupProfile
 
 
 # ---------------------------------------------------------------------------
@@ -24,13 +30,32 @@ VERSION = "1.0.0"
 # ---------------------------------------------------------------------------
 # Click entry point
 # ---------------------------------------------------------------------------
-@click.command()
+@click.group(invoke_without_command=True)
 @click.option("--model", "-m", default=None, help="Ollama model to use")
+@click.option("--fast-model", default=None, help="Small model for tool-selection rounds (answers still use --model)")
 @click.option("--host", default=None, help="Ollama host URL")
 @click.option("--cwd", "-d", default=None, help="Working directory")
 @click.option("--tui", is_flag=True, default=False, help="Use TUI mode instead of REPL")
+@click.option(
+    "--startup-profile", is_flag=True, default=False,
+    help="Start up, print an import-time and phase breakdown, and exit",
+)
+@click.option(
+    "--profile", "profiler", type=click.Choice(["cprofile", "sample"]), is_flag=False,
+    flag_value="cprofile", default=None,
+    help="Profile every turn (cProfile by default, or the sampling profiler) into .taiyo/profiles",
+)
+@click.option(
+    "--print", "-p", "prompt", default=None, metavar="PROMPT",
+    help="Run one turn non-interactively and print NDJSON events ('-' reads stdin)",
+)
+@click.option("--max-rounds", type=click.IntRange(min=1), default=None, help="Tool rounds allowed per turn")
 @click.version_option(version=VERSION, prog_name="Taiyo CLI")
-def main(model: str | None, host: str | None, cwd: str | None, tui: bool):
+@click.pass_context
+def main(
+    ctx: click.Context, model: str | None, fast_model: str | None, host: str | None, cwd: str | None, tui: bool,
+    startup_profile: bool, profiler: str | None, prompt: str | None, max_rounds: int | None,
+):
     """Taiyo CLI - AI-Powered Coding Assistant
 
     An interactive terminal-based AI assistant for software engineering tasks.
@@ -40,26 +65,103 @@ def main(model: str | None, host: str | None, cwd: str | None, tui: bool):
         taiyo                    # Start REPL mode (default)
         taiyo --tui              # Start TUI mode
         taiyo -m codellama       # Use a specific model
+        taiyo --fast-model phi3  # Let a small model pick the tools
+        taiyo --startup-profile  # Print startup timing and exit
+        taiyo --profile sample   # Profile each turn with the sampling profiler
+        taiyo -p "fix the tests" # One turn, NDJSON events on stdout
+        taiyo batch tasks.jsonl  # Run many prompts concurrently
+        taiyo daemon start       # Keep sessions, connections and indexes warm
     """
+    profile = StartupProfile(start=_LAUNCH)
+    profile.mark("arguments parsed")
+    if startup_profile:
+        profile.track_imports()
+
     config = Config.from_env()
 
     if model:
         config.model = model
+    if fast_model is not None:
+        config.fast_model = fast_model
     if host:
         config.ollama_host = host
     if cwd:
         config.working_dir = os.path.abspath(cwd)
+    if profiler:
+        config.profiler = profiler
+    if max_rounds:
+        config.max_tool_rounds = max_rounds
+
+    if ctx.invoked_subcommand is not None:
+        ctx.obj = config
+        return
+
+    if prompt is not None:
+        from .headless import run_headless
+        if prompt == "-":
+            prompt = sys.stdin.read()
+        sys.exit(asyncio.run(run_headless(config, prompt)))
 
     if tui:
-        run_tui(config)
+        run_tui(config, profile, profile_only=startup_profile)
     else:
-        asyncio.run(run_repl(config))
+        asyncio.run(run_repl(config, profile, profile_only=startup_profile))
+
+    if startup_profile:
+        profile.stop_tracking()
+        print(profile.report(), file=sys.stderr)
+
+
+@main.command()
+@click.argument("tasks_file", type=click.Path(exists=True, dir_okay=False))
+@click.option("--output", "-o", default=None, help="Results file (default: <tasks>.results.jsonl); also the resume checkpoint")
+@click.option(
+    "--concurrency", "-j", type=click.IntRange(min=1), default=None,
+    help="Model requests in flight (default: $OLLAMA_NUM_PARALLEL or 4)",
+)
+@click.pass_obj
+def batch(config: Config, tasks_file: str, output: str | None, concurrency: int | None):
+    """Run every prompt in TASKS_FILE (JSON lines) as its own conversation."""
+    from .batch import run_batch
+    sys.exit(asyncio.run(run_batch(config, tasks_file, output, concurrency)))
+
+
+@main.group()
+def daemon():
+    """Manage the background daemon that serves warm sessions to every front-end."""
+
+
+@daemon.command("start")
+@click.option("--foreground", is_flag=True, default=False, help="Serve in this process instead of detaching")
+@click.pass_obj
+def daemon_start(config: Config, foreground: bool):
+    """Start the daemon (a no-op if it is already running)."""
+    from . import daemon as daemon_module
+    sys.exit(daemon_module.start(config, foreground))
+
+
+@daemon.command("stop")
+@click.pass_obj
+def daemon_stop(config: Config):
+    """Stop the daemon, ending its open sessions."""
+    from . import daemon as daemon_module
+    sys.exit(daemon_module.stop(config))
 
 
-def run_tui(config: Config):
+@daemon.command("status")
+@click.pass_obj
+def daemon_status(config: Config):
+    """Show the daemon's sessions, workspaces and warm models."""
+    from . import daemon as daemon_module
+    sys.exit(daemon_module.status(config))
+
+
+def run_tui(config: Config, profile: StartupProfile | None = None, profile_only: bool = False):
     """Run the TUI application."""
     from .app import TaiyoApp
-    app = TaiyoApp(config=config)
+    if profile:
+        profile.mark("textual app imported")
+    app = TaiyoApp(config=config, profile=profile, profile_only=profile_only)
     app.run()
 
 
@@ -69,6 +171,23 @@ def run_tui(config: Config):
 
 def _get_git_branch(working_dir: str) -> str | None:
     """Get the current git branch name, or None if not in a git repo."""
+    # Read .git/HEAD directly; spawning git costs more than the rest of the banner
+    path = Path(working_dir).resolve()
+    for directory in (path, *path.parents):
+        git = directory / ".git"
+        try:
+            if git.is_file():
+                # Worktrees and submodules: ".git" holds "gitdir: <path>"
+                gitdir = git.read_text(encoding="utf-8").strip().removeprefix("gitdir:").strip()
+                git = directory / gitdir
+            if git.is_dir():
+                head = (git / "HEAD").read_text(encoding="utf-8").strip()
+                if head.startswith("ref: refs/heads/"):
+                    return head[len("ref: refs/heads/"):]
+                break
+        except OSError:
+            break
+    # Detached HEAD or unusual layout: ask git
     try:
         result = subprocess.run(
             ["git", "rev-parse", "--abbrev-ref", "HEAD"],
@@ -114,100 +233,127 @@ def _get_terminal_width() -> int:
 # ---------------------------------------------------------------------------
 
 class ThinkingSpinner:
-    """Single-line animated thinking spinner."""
+    """Single-line animated thinking spinner.
+
+    Driven by a shared ``AnimationClock`` on the event loop and drawn
+    through the same ``write`` function as streamed text, so the spinner
+    and the response never interleave on the terminal.
+    """
 
     FRAMES = ["◐", "◓", "◑", "◒"]
 
-    def __init__(self):
+    def __init__(self, clock, write):
+        self._clock = clock
+        self._write = write
         self._running = False
-        self._thread: threading.Thread | None = None
-        self._frame = 0
         self._start_time = 0.0
+        self._frame = 0
 
     def start(self):
+        if self._running:
+            return
         self._running = True
         self._start_time = time.time()
-        self._frame = 0
-        self._thread = threading.Thread(target=self._animate, daemon=True)
-        self._thread.start()
+        self._clock.subscribe(self._animate)
+        self._animate(0)
 
     def stop(self):
         if not self._running:
             return
         self._running = False
-        if self._thread:
-            self._thread.join(timeout=1)
-            self._thread = None
+        self._clock.unsubscribe(self._animate)
         # Clear spinner line
-        print(f"\r\033[K", end="", flush=True)
+        self._write("\r\033[K")
+
+    def status(self) -> str:
+        """The current frame as plain text ("" when stopped), for toolbars."""
+        if not self._running:
+            return ""
+        return f"{self.FRAMES[self._frame % len(self.FRAMES)]} Thinking... ({time.time() - self._start_time:.1f}s)"
 
-    def _animate(self):
-        while self._running:
-            spinner = self.FRAMES[self._frame % len(self.FRAMES)]
-            elapsed = time.time() - self._start_time
-            line = f"\r  \033[3;36m{spinner} Thinking...\033[0m \033[2m({elapsed:.1f}s)\033[0m"
-            print(line, end="", flush=True)
-            self._frame += 1
-            time.sleep(0.15)
+    def _animate(self, frame: int):
+        self._frame = frame
+        spinner = self.FRAMES[frame % len(self.FRAMES)]
+        elapsed = time.time() - self._start_time
+        self._write(f"\r  \033[3;36m{spinner} Thinking...\033[0m \033[2m({elapsed:.1f}s)\033[0m")
 
 
 # ---------------------------------------------------------------------------
-# Session - Conversation persistence
+# REPL core
 # ---------------------------------------------------------------------------
 
-class Session:
-    """Manages conversation persistence as JSONL."""
+async def _open_backend(config: Config, memory):
+    """The conversation: in the daemon when one is running, else in this process.
 
-    def __init__(self, working_dir: str):
-        self._dir = os.path.join(working_dir, ".taiyo")
-        os.makedirs(self._dir, exist_ok=True)
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self._path = os.path.join(self._dir, f"session_{ts}.jsonl")
+    Returns ``(client, session)``, where ``session`` runs the session
+    commands (``commands.SessionCommands``); a daemon conversation's
+    ``RemoteClient`` is both.
+    """
+    if config.use_daemon:
+        from .daemon import open_session
 
-    def append(self, role: str, content: str, **extra):
-        entry = {"ts": datetime.now().isoformat(), "role": role, "content": content}
-        entry.update(extra)
-        try:
-            with open(self._path, "a", encoding="utf-8") as f:
-                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
-        except Exception:
-            pass
+        remote = await open_session(config)
+        if remote is not None:
+            return remote, remote
+    client = await asyncio.to_thread(create_client, config)
+    from .commands import SessionCommands
 
+    return client, SessionCommands(client, memory)
 
-# ---------------------------------------------------------------------------
-# REPL core
-# ---------------------------------------------------------------------------
 
-async def run_repl(config: Config):
-    """Run a Claude Code-style REPL."""
+async def run_repl(config: Config, profile: StartupProfile | None = None, profile_only: bool = False):
+    """Run a Claude Code-style REPL.
+
+    The banner and prompt come up as soon as rich and prompt_toolkit are
+    loaded. The conversation attaches to the daemon if one is running;
+    otherwise the client (httpx, tools) is built in a worker thread. The
+    Ollama connection is checked in the background; the first request waits
+    for both.
+    """
+    profile = profile or StartupProfile()
+
+    # Part of the system prompt, which the daemon receives with the session
+    claude_md = _load_claude_md(config.working_dir)
+    if claude_md:
+        config.system_prompt += f"\n\n## PROJECT INSTRUCTIONS (from CLAUDE.md)\n{claude_md}\n"
+
+    from .memory import MemoryMonitor, format_bytes
+
+    def _evict(rss: int | None = None) -> bool:
+        """Drop old tool output from memory (soft limit)."""
+        if not backend.done():
+            return False
+        client, session = backend.result()
+        if client.remote:
+            return False  # the daemon watches its own memory
+        freed = session.evict()
+        notices.append(
+            f"[yellow]  Memory at {format_bytes(rss)} is above the soft limit: evicted {freed} characters "
+            "of old tool output; /compact shrinks history further.[/]"
+        )
+        return True
+
+    memory = MemoryMonitor(
+        limit_bytes=config.memory_limit_mb * 1024 * 1024,
+        interval=config.memory_sample_interval,
+        on_limit=_evict,
+    )
+
+    # Backend imports run in a thread while the banner is drawn
+    backend = asyncio.ensure_future(_open_backend(config, memory))
+
     from rich.console import Console
     from rich.markdown import Markdown
     from rich.text import Text
     from rich.rule import Rule
-
-    from prompt_toolkit import PromptSession
-    from prompt_toolkit.formatted_text import HTML
-    from prompt_toolkit.history import InMemoryHistory
-    from prompt_toolkit.keys import Keys
-    from prompt_toolkit.key_binding import KeyBindings
-
-    from .api import OllamaClient
-    from .tools import (
-        BashTool,
-        ReadTool,
-        WriteTool,
-        EditTool,
-        GrepTool,
-        GlobTool,
-        WebSearchTool,
-    )
+    from rich.markup import escape
+    profile.mark("rich imported")
 
     console = Console()
     tw = _get_terminal_width()
 
     # ---- Build startup banner (Polymarket-style big ASCII art) ----
     git_branch = _get_git_branch(config.working_dir)
-    claude_md = _load_claude_md(config.working_dir)
 
     tokens_up = 0
     tokens_down = 0
@@ -255,46 +401,59 @@ async def run_repl(config: Config):
     console.print(f"{prefix}[dim]  type /help for commands[/]")
     console.print()
 
-    # ---- Initialize tools & client ----
-    tools = [
-        BashTool(cwd=config.working_dir),
-        ReadTool(),
-        WriteTool(),
-        EditTool(),
-        GrepTool(),
-        GlobTool(),
-        WebSearchTool(),
-    ]
-    client = OllamaClient(config, tools)
-
-    # Inject CLAUDE.md into system prompt
     if claude_md:
-        config.system_prompt += f"\n\n## PROJECT INSTRUCTIONS (from CLAUDE.md)\n{claude_md}\n"
         console.print("[dim]  Loaded CLAUDE.md from working directory.[/]")
+    profile.mark("banner shown")
+
+    # ---- Check connection (in the background, shown next to the prompt) ----
+    connection_status = "connecting to Ollama..."
+    notices: list[str] = []
+
+    async def _connect() -> bool:
+        nonlocal connection_status
+        client, session = await backend
+        profile.mark("client ready" if not client.remote else "daemon session ready")
+        if client.repo_map is not None:
+            client.repo_map.refresh()
+        if config.profiler:
+            result = await session.run("profile", {"action": "start", "mode": config.profiler})
+            if "error" in result:
+                notices.append(f"[yellow]  {result['error']}[/]")
+        connected = await client.check_connection()
+        if connected:
+            models = await client.list_models()
+            if models and not any(config.model in m or m in config.model for m in models):
+                config.model = models[0]
+                await session.run("model", {"name": models[0]})
+                notices.append(f"[yellow]  Model auto-selected: {models[0]}[/]")
+            fast = config.fast_model
+            if fast and models and not any(fast in m or m in fast for m in models):
+                notices.append(f"[yellow]  Fast model {config.fast_model} not found; routing off[/]")
+                config.fast_model = ""
+                await session.run("model", {"fast": ""})
+            if config.fast_model:
+                asyncio.ensure_future(client.preload())
+            connection_status = ""
+        else:
+            connection_status = "Ollama not reachable"
+        profile.mark("connection checked")
+        prompt_session.app.invalidate()
+        return connected
 
-    # ---- Check connection ----
-    connected = await client.check_connection()
-    if not connected:
-        console.print("[bold red]  Cannot connect to Ollama![/]")
-        console.print("  Start Ollama with: [bold]ollama serve[/]")
-        console.print(f"  Then pull a model: [bold]ollama pull {config.model}[/]")
-        await client.close()
-        return
-
-    models = await client.list_models()
-    if models:
-        if not any(config.model in m or m in config.model for m in models):
-            config.model = models[0]
-            client.config.model = models[0]
-            console.print(f"[yellow]  Model auto-selected: {models[0]}[/]")
+    def _rprompt():
+        if connection_status:
+            return HTML(f"<i><ansigray>{connection_status}</ansigray></i>")
+        return ""
 
-    console.print(f"[dim]  Connected to Ollama. Model: {config.model}[/]")
-    console.print()
+    # ---- prompt_toolkit setup ----
+    from prompt_toolkit import PromptSession
+    from prompt_toolkit.formatted_text import HTML
+    from prompt_toolkit.history import InMemoryHistory
+    from prompt_toolkit.keys import Keys
+    from prompt_toolkit.key_binding import KeyBindings
 
-    # ---- Session ----
-    session = Session(config.working_dir)
+    from .ui.animation import AnimationClock
 
-    # ---- prompt_toolkit setup ----
     history = InMemoryHistory()
 
     # Key bindings: backslash-newline for multi-line
@@ -310,9 +469,63 @@ async def run_repl(config: Config):
         key_bindings=kb,
         multiline=False,
         enable_history_search=True,
+        rprompt=_rprompt,
     )
+    connection = asyncio.ensure_future(_connect())
+    profile.mark("prompt ready")
+
+    if profile_only:
+        await connection
+        client, _ = await backend
+        await client.close()
+        await close_tools(client.tools.values())
+        return
 
-    spinner = ThinkingSpinner()
+    # Messages typed while a turn runs; the queue prompt is up for the whole turn
+    queue = InputQueue(merge=config.merge_queued)
+    composing = False
+    draft = ""
+    partial = ""
+
+    def _write(text: str):
+        """Write raw text to the terminal; the only path for streamed output."""
+        nonlocal partial
+        text, partial = partial + text, ""
+        if composing:
+            # Under the queue prompt only whole lines can be printed above it;
+            # the rest of the line waits for its newline (or the turn's end)
+            cut = text.rfind("\n") + 1
+            text, partial = text[:cut], text[cut:]
+            if not text:
+                return
+        console.file.write(text)
+        console.file.flush()
+
+    def _draw_spinner(text: str):
+        # With the queue prompt up the spinner lives in its toolbar
+        if composing:
+            prompt_session.app.invalidate()
+        else:
+            _write(text)
+
+    spinner = ThinkingSpinner(AnimationClock(interval=0.15), _draw_spinner)
+
+    def _toolbar():
+        """Bottom toolbar: turn status and the queued messages."""
+        lines = []
+        status = spinner.status()
+        if status:
+            lines.append(f" {status}  Enter: queue a message  Ctrl+C: cancel")
+        if queue:
+            lines.append(f" Queued ({len(queue)})  /queue edit <n> | drop <n> | clear")
+            for i, item in enumerate(queue, 1):
+                line = item.replace("\n", " ")
+                if len(line) > tw - 8:
+                    line = line[: tw - 11] + "..."
+                lines.append(f"  {i}. {line}")
+        return "\n".join(lines)
+
+    memory.start()
 
     # ---- Render helpers ----
     def _draw_rule(label: str = "", style: str = "dim"):
@@ -370,7 +583,41 @@ async def run_repl(config: Config):
 
         console.print(f"  [{style}]{'─' * min(tw - 4, 50)}[/{style}]")
 
+    def _print_turn_profile(report):
+        """Print where the turn spent its time (``--profile`` / ``/profile``)."""
+        console.print(f"[dim]  --- Profile ({report.mode}, {report.seconds:.2f}s) ---[/]")
+        for line in report.top:
+            console.print(f"  [dim]{escape(line)}[/]")
+        console.print(f"  [dim]saved: {report.path}[/]")
+        console.print()
+
     # ---- Slash commands ----
+    def _queue_command(arg: str):
+        """``/queue [list|clear|drop <n>|edit <n>]``; works during a turn too."""
+        nonlocal draft
+        args = arg.split()
+        action = args[0].lower() if args else "list"
+        try:
+            if action == "list":
+                if not queue:
+                    console.print("[dim]  No queued messages.[/]")
+                for i, item in enumerate(queue, 1):
+                    console.print(f"  [bold]{i}.[/] {escape(item)}")
+            elif action == "clear":
+                queue.clear()
+                console.print("[dim]  Queue cleared.[/]")
+            elif action in ("drop", "cancel", "edit") and len(args) == 2:
+                text = queue.pop(int(args[1]))
+                if action == "edit":
+                    # Back into the input line; Enter queues (or sends) it again
+                    draft = text
+                else:
+                    console.print(f"[dim]  Dropped queued message #{args[1]}.[/]")
+            else:
+                console.print("[dim]  Usage: /queue \\[list|clear|drop <n>|edit <n>][/]")
+        except (ValueError, IndexError) as e:
+            console.print(f"[red]  Queue: {e}[/]")
+
     async def _handle_command(cmd_input: str) -> bool:
         """Handle a slash command. Returns True if should continue loop, False to exit."""
         parts = cmd_input.split(maxsplit=1)
@@ -381,7 +628,7 @@ async def run_repl(config: Config):
             return False
 
         elif cmd == "/clear":
-            client.clear_history()
+            await session.run("clear")
             nonlocal tokens_up, tokens_down
             tokens_up = 0
             tokens_down = 0
@@ -390,13 +637,11 @@ async def run_repl(config: Config):
 
         elif cmd == "/compact":
             console.print("[dim]  Compacting conversation...[/]")
-            msg_count = len(client.messages)
-            if msg_count > 4:
-                # Keep system context but summarize the rest
-                summary_prompt = "Summarize the conversation so far in a few bullet points for context preservation."
-                # Simple approach: keep last 4 messages
-                client.messages = client.messages[-4:]
-                console.print(f"[dim]  Compacted: {msg_count} messages -> {len(client.messages)} messages.[/]")
+            result = await session.run("compact")
+            if "error" in result:
+                console.print(f"[red]  {escape(result['error'])}[/]")
+            elif result["after"] < result["before"]:
+                console.print(f"[dim]  Compacted: {result['before']} messages -> {result['after']} messages.[/]")
             else:
                 console.print("[dim]  Conversation is already short. No compaction needed.[/]")
             console.print()
@@ -405,10 +650,10 @@ async def run_repl(config: Config):
             if len(parts) > 1:
                 new_model = parts[1].strip()
                 config.model = new_model
-                client.config.model = new_model
+                await session.run("model", {"name": new_model})
                 console.print(f"[dim]  Model switched to: [bold]{new_model}[/bold][/]")
             else:
-                avail = await client.list_models()
+                avail = (await session.run("model")).get("models", [])
                 console.print("[dim]  Available models:[/]")
                 for m in avail:
                     marker = " [bold cyan]*[/]" if m == config.model else ""
@@ -419,13 +664,111 @@ async def run_repl(config: Config):
 
         elif cmd == "/status":
             branch = _get_git_branch(config.working_dir)
+            info = await session.run("session")
             console.print("[dim]  --- Status ---[/]")
             console.print(f"  [dim]model:[/]   {config.model}")
             console.print(f"  [dim]cwd:[/]     {config.working_dir}")
             if branch:
                 console.print(f"  [dim]branch:[/]  {branch}")
             console.print(f"  [dim]tokens:[/]  {tokens_up} ^ / {tokens_down} v")
-            console.print(f"  [dim]history:[/] {len(client.messages)} messages")
+            console.print(f"  [dim]history:[/] {info.get('messages', '?')} messages")
+            if client.remote:
+                console.print(f"  [dim]session:[/] {info.get('session_id', '?')} (daemon)")
+            console.print()
+
+        elif cmd == "/resume":
+            arg = parts[1].strip() if len(parts) > 1 else ""
+            result = await session.run("resume", {"session": arg})
+            if "error" in result:
+                console.print(f"[yellow]  {escape(result['error'])}.[/]")
+            elif arg == "list":
+                console.print("[dim]  Recent sessions:[/]")
+                for s in result["sessions"]:
+                    when = datetime.fromtimestamp(s["modified"]).strftime("%Y-%m-%d %H:%M")
+                    console.print(f"    {s['session_id']}  [dim]{when}  {s['size'] // 1024} KB[/]")
+                if not result["sessions"]:
+                    console.print("[dim]    (none)[/]")
+            else:
+                console.print(
+                    f"[dim]  Resumed session {result['session_id']}: {len(result['history'])} messages.[/]"
+                )
+            console.print()
+
+        elif cmd == "/history":
+            from .history import HistoryIndex
+
+            args = parts[1].split(maxsplit=1) if len(parts) > 1 else []
+            action = args[0].lower() if args else ""
+            index = HistoryIndex(config.working_dir)
+            if action == "search" and len(args) > 1:
+                start = time.perf_counter()
+                hits = await asyncio.to_thread(index.search, args[1], 15)
+                elapsed = (time.perf_counter() - start) * 1000
+                for hit in hits:
+                    console.print(
+                        f"  [cyan]{hit.session_id}[/] [dim]{hit.ts} {hit.role}:[/] {escape(hit.snippet)}"
+                    )
+                console.print(f"[dim]  {len(hits)} matches ({elapsed:.0f} ms)[/]")
+            elif action == "rollup":
+                try:
+                    days = float(args[1]) if len(args) > 1 else 30
+                except ValueError:
+                    days = 30
+                current = (await session.run("session")).get("session_id")
+                archived = await asyncio.to_thread(index.rollup, days, {current})
+                console.print(f"[dim]  Archived {archived} sessions older than {days:g} days.[/]")
+            else:
+                console.print("[dim]  Usage: /history search <query> | /history rollup [days][/]")
+            console.print()
+
+        elif cmd == "/stats":
+            result = await session.run("stats")
+            console.print("[dim]  --- Session stats ---[/]")
+            for line in result.get("lines") or [result.get("error", "No turns traced yet.")]:
+                console.print(f"  {escape(line)}")
+            console.print(f"  [dim]trace: {result.get('trace', '')}[/]")
+            console.print(f"  [dim]view: python -m src.tracing <trace> out.json, open in ui.perfetto.dev[/]")
+            console.print()
+
+        elif cmd == "/profile":
+            args = parts[1].split() if len(parts) > 1 else []
+            action = args[0].lower() if args else "status"
+            usage = "Usage: /profile start \\[cprofile|sample] | /profile stop"
+            if action in ("start", "stop", "status"):
+                mode = args[1] if len(args) > 1 else "cprofile"
+                result = await session.run("profile", {"action": action, "mode": mode})
+                if "error" in result:
+                    console.print(f"[red]  {escape(result['error'])}[/]")
+                elif action == "start":
+                    console.print(f"[dim]  Profiling turns with {result['mode']} into {result['dir']}[/]")
+                elif action == "stop":
+                    console.print("[dim]  Profiling stopped.[/]")
+                else:
+                    state = f"on ({result['mode']})" if result["mode"] else "off"
+                    console.print(f"[dim]  Profiling {state}. {usage}[/]")
+            else:
+                console.print(f"[dim]  {usage}[/]")
+            console.print()
+
+        elif cmd == "/mem":
+            args = parts[1].split() if len(parts) > 1 else []
+            action = args[0].lower() if args else ""
+            limit = int(args[1]) if action == "top" and len(args) > 1 and args[1].isdigit() else 10
+            result = await session.run("mem", {"action": action, "limit": limit})
+            if action == "evict" and "freed" in result:
+                lines = [f"Evicted {result['freed']} characters of old tool output; /compact shrinks history further."]
+            else:
+                lines = result.get("lines") or [result.get("error", "")]
+            console.print("[dim]  --- Memory" + (" (daemon) ---[/]" if client.remote else " ---[/]"))
+            for line in lines:
+                console.print(f"  {escape(line)}")
+            for notice in notices:
+                console.print(notice)
+            notices.clear()
+            console.print()
+
+        elif cmd == "/queue":
+            _queue_command(parts[1] if len(parts) > 1 else "")
             console.print()
 
         elif cmd == "/help":
@@ -437,6 +780,12 @@ async def run_repl(config: Config):
             console.print("  [bold]/compact[/]        Summarize and compress conversation")
             console.print("  [bold]/model[/] [name]   List or switch models")
             console.print("  [bold]/status[/]         Show current status")
+            console.print("  [bold]/resume[/] [id]    Resume the last (or given) session; /resume list")
+            console.print("  [bold]/history[/] search Search past sessions; /history rollup [days]")
+            console.print("  [bold]/stats[/]          Latency, tokens/s and time per tool")
+            console.print("  [bold]/profile[/] start  Profile each turn \\[cprofile|sample]; /profile stop")
+            console.print("  [bold]/mem[/]            Memory use; /mem top \\[n] (tracemalloc), /mem evict")
+            console.print("  [bold]/queue[/]          Messages typed during a turn; /queue edit|drop <n>, clear")
             console.print("  [bold]/init[/]           Create CLAUDE.md in current directory")
             console.print("  [bold]/quit[/]           Exit Taiyo CLI")
             console.print()
@@ -444,6 +793,7 @@ async def run_repl(config: Config):
             console.print("  [dim]─────────────────────────────────[/]")
             console.print("  [dim]End a line with \\ for multi-line input[/]")
             console.print("  [dim]Ctrl+C to cancel current request[/]")
+            console.print("  [dim]Type during a turn to queue messages; they run when it ends[/]")
             console.print()
 
         elif cmd == "/init":
@@ -475,20 +825,141 @@ Created: {datetime.now().strftime('%Y-%m-%d')}
 
         return True
 
+    async def _run_turn(user_input: str) -> str:
+        """Stream one turn to the terminal; return the final text reply."""
+        full_response = ""
+        tool_start_time = 0.0
+        first_text = True
+
+        async for chunk in client.chat_stream(user_input):
+            if chunk["type"] == "text":
+                if first_text:
+                    spinner.stop()
+                    # Response prefix, on the same path as the text it leads
+                    _write("\033[1mTaiyo\033[0m \033[1m>\033[0m ")
+                    first_text = False
+                content = chunk["content"]
+                with client.tracer.span("render", "ui"):
+                    _write(content)
+                full_response += content
+
+            elif chunk["type"] == "tool_call":
+                spinner.stop()
+                # If we were streaming text, close it
+                if full_response and not first_text:
+                    _write("\n")
+                    console.print()
+
+                name = chunk["name"]
+                args = chunk["arguments"]
+                with client.tracer.span("render", "ui"):
+                    _print_tool_call(name, args)
+
+                # Record start time for tool execution
+                tool_start_time = time.time()
+
+                # Restart spinner for tool execution
+                spinner.start()
+
+            elif chunk["type"] == "tool_result":
+                spinner.stop()
+                result = chunk["result"]
+                name = chunk["name"]
+                elapsed = time.time() - tool_start_time if tool_start_time else 0.0
+                with client.tracer.span("render", "ui"):
+                    _print_tool_result(name, result, elapsed)
+                tool_start_time = 0.0
+
+                # Reset for next text
+                full_response = ""
+                first_text = True
+
+                # Restart spinner for follow-up thinking
+                spinner.start()
+
+            elif chunk["type"] == "loop":
+                spinner.stop()
+                console.print(
+                    f"[yellow]  Stopped after {chunk['rounds']} rounds: {chunk['reason']} "
+                    f"(saved up to {chunk['saved']} rounds)[/]"
+                )
+
+            elif chunk["type"] == "context":
+                spinner.stop()
+                console.print(f"[yellow]  {chunk['message']} (/compact, /clear)[/]")
+                spinner.start()
+
+        spinner.stop()
+        if full_response:
+            _write("\n")  # End the raw streaming line
+        return full_response
+
+    async def _compose_queued(turn: asyncio.Future):
+        """Keep a prompt open while ``turn`` runs and queue what is entered.
+
+        Output printed meanwhile goes above the prompt. Ctrl+C cancels the
+        turn; ``/queue`` manages the queue, other commands wait for the turn.
+        """
+        nonlocal composing, draft
+        from contextlib import redirect_stdout
+        from prompt_toolkit.patch_stdout import StdoutProxy
+
+        # Writes are printed above the prompt, bundled per interval
+        stdout = StdoutProxy(sleep_between_writes=0.02, raw=True)
+        try:
+            with redirect_stdout(stdout):
+                try:
+                    while not turn.done():
+                        text, draft = draft, ""
+                        try:
+                            line = await prompt_session.prompt_async(
+                                HTML("<ansigray>queue &gt;</ansigray> "),
+                                default=text,
+                                bottom_toolbar=_toolbar,
+                            )
+                        except EOFError:
+                            continue
+                        except asyncio.CancelledError:
+                            # The turn ended mid-line: keep the text for the next prompt
+                            draft = prompt_session.default_buffer.text
+                            raise
+                        if line is None:
+                            turn.cancel()
+                            return
+                        line = line.strip()
+                        if line.startswith("/queue"):
+                            _queue_command(line[len("/queue"):])
+                        elif line.startswith("/"):
+                            console.print(f"[dim]  {escape(line.split()[0])} can run once the turn ends.[/]")
+                            draft = line
+                        elif line:
+                            position = queue.put(line)
+                            console.print(f"[dim]  Queued #{position}; runs when the current turn ends.[/]")
+                finally:
+                    composing = False
+                    # The unfinished line of a cancelled reply
+                    _write("")
+        finally:
+            # Joins the writer thread once the output is out; not on the event loop
+            await asyncio.to_thread(stdout.close)
+
     # ---- Main loop ----
+    # The prompt runs on the event loop (prompt_async), so background tasks
+    # such as the repo map refresh keep making progress while the user types.
+    next_input: str | None = None
     while True:
         try:
             # Multi-line support: if line ends with \, continue reading
             input_lines: list[str] = []
             first_line = True
-            while True:
+            while next_input is None:
                 if first_line:
+                    text, draft = draft, ""
                     try:
-                        line = await asyncio.get_event_loop().run_in_executor(
-                            None,
-                            lambda: prompt_session.prompt(
-                                HTML("<b><skyblue>You</skyblue></b> <b>&gt;</b> "),
-                            ),
+                        line = await prompt_session.prompt_async(
+                            HTML("<b><skyblue>You</skyblue></b> <b>&gt;</b> "),
+                            default=text,
+                            bottom_toolbar=_toolbar if queue else None,
                         )
                     except KeyboardInterrupt:
                         # Ctrl+C on empty prompt - ignore
@@ -500,12 +971,7 @@ Created: {datetime.now().strftime('%Y-%m-%d')}
                     first_line = False
                 else:
                     try:
-                        line = await asyncio.get_event_loop().run_in_executor(
-                            None,
-                            lambda: prompt_session.prompt(
-                                HTML("  <b>...</b> "),
-                            ),
-                        )
+                        line = await prompt_session.prompt_async(HTML("  <b>...</b> "))
                     except (KeyboardInterrupt, EOFError):
                         break
 
@@ -519,14 +985,20 @@ Created: {datetime.now().strftime('%Y-%m-%d')}
                     input_lines.append(line)
                     break
 
-            if line is None and not input_lines:
+            if next_input is not None:
+                # Messages queued during the last turn
+                user_input, next_input = next_input, None
+                console.print(f"[bold]You[/] [bold]>[/] {escape(user_input)}")
+            elif line is None and not input_lines:
                 console.print("\n[dim]Goodbye![/]")
                 break
-
-            user_input = "\n".join(input_lines).strip()
+            else:
+                user_input = "\n".join(input_lines).strip()
             if not user_input:
                 continue
 
+            client, session = await backend
+
             # Slash commands
             if user_input.startswith("/"):
                 should_continue = await _handle_command(user_input)
@@ -534,75 +1006,51 @@ Created: {datetime.now().strftime('%Y-%m-%d')}
                     break
                 continue
 
+            # A failed check is retried when the user tries again
+            if connection.done() and not connection.result():
+                connection = asyncio.ensure_future(_connect())
+            if not await connection:
+                console.print("[bold red]  Cannot connect to Ollama![/]")
+                console.print("  Start Ollama with: [bold]ollama serve[/]")
+                console.print(f"  Then pull a model: [bold]ollama pull {config.model}[/]")
+                console.print()
+                continue
+            for notice in notices:
+                console.print(notice)
+            notices.clear()
+
             # Track tokens
             tokens_up += _estimate_tokens(user_input)
-            session.append("user", user_input)
 
             # ---- Process message ----
             console.print()
-            full_response = ""
+            composing = True
             spinner.start()
+            session.begin_turn()
+            turn = asyncio.ensure_future(_run_turn(user_input))
+            composer = asyncio.ensure_future(_compose_queued(turn))
             cancelled = False
-            tool_start_time = 0.0
 
+            # Ctrl+C cancels the turn task: the Ollama request is closed and
+            # any running tool process is killed instead of left behind.
+            loop = asyncio.get_running_loop()
             try:
-                first_text = True
+                loop.add_signal_handler(signal.SIGINT, turn.cancel)
+                sigint_handled = True
+            except (NotImplementedError, RuntimeError):
+                sigint_handled = False
 
-                async for chunk in client.chat_stream(user_input):
-                    if chunk["type"] == "text":
-                        if first_text:
-                            spinner.stop()
-                            # Print response prefix
-                            console.print("[bold]Taiyo[/] [bold]>[/] ", end="")
-                            first_text = False
-                        content = chunk["content"]
-                        print(content, end="", flush=True)
-                        full_response += content
-
-                    elif chunk["type"] == "tool_call":
-                        spinner.stop()
-                        # If we were streaming text, close it
-                        if full_response and not first_text:
-                            print()
-                            console.print()
-
-                        name = chunk["name"]
-                        args = chunk["arguments"]
-                        _print_tool_call(name, args)
-
-                        # Record start time for tool execution
-                        tool_start_time = time.time()
-
-                        # Restart spinner for tool execution
-                        spinner.start()
-
-                    elif chunk["type"] == "tool_result":
-                        spinner.stop()
-                        result = chunk["result"]
-                        name = chunk["name"]
-                        elapsed = time.time() - tool_start_time if tool_start_time else 0.0
-                        _print_tool_result(name, result, elapsed)
-                        tool_start_time = 0.0
-
-                        # Reset for next text
-                        full_response = ""
-                        first_text = True
-
-                        # Restart spinner for follow-up thinking
-                        spinner.start()
-
-                spinner.stop()
-                if full_response:
-                    print()  # End the raw streaming line
+            try:
+                full_response = await turn
 
                 tokens_down += _estimate_tokens(full_response)
-                session.append("assistant", full_response)
 
                 console.print()
 
-            except KeyboardInterrupt:
-                spinner.stop()
+            except (asyncio.CancelledError, KeyboardInterrupt):
                 cancelled = True
+                turn.cancel()
+                spinner.stop()
                 console.print("\n[dim italic]  Cancelled.[/]")
                 console.print()
             except Exception as e:
@@ -613,12 +1061,32 @@ Created: {datetime.now().strftime('%Y-%m-%d')}
                 else:
                     console.print(f"[bold red]  Error: {error_msg}[/]")
                 console.print()
+            finally:
+                composer.cancel()
+                try:
+                    await composer
+                except asyncio.CancelledError:
+                    pass
+                composing = False
+                if sigint_handled:
+                    loop.remove_signal_handler(signal.SIGINT)
+                report = session.end_turn()
+                if report:
+                    _print_turn_profile(report)
+
+            # After a cancel the queue waits for the next turn to end
+            if not cancelled:
+                next_input = queue.take()
 
         except (EOFError, KeyboardInterrupt):
             console.print("\n[dim]Goodbye![/]")
             break
 
+    connection.cancel()
+    memory.stop()
+    client, _ = await backend
     await client.close()
+    await close_tools(client.tools.values())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,177 @@
+"""Memory accounting for ``/mem``: RSS, history size, caches and a soft limit."""
+from __future__ import annotations
+import asyncio
+import ctypes
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+from typing import Callable
+
+# Seconds between RSS samples when only the soft limit is configured
+DEFAULT_SAMPLE_INTERVAL = 10.0
+# After the limit handler ran, wait this long before running it again
+LIMIT_COOLDOWN = 60.0
+# Frames kept per tracemalloc traceback
+TRACE_FRAMES = 8
+
+
+def peak_rss_bytes() -> int:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def rss_bytes() -> int:
+    """Current resident set size; the peak where the current value is unavailable."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return peak_rss_bytes()
+
+
+def format_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(n) < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+def message_bytes(message) -> int:
+    size = len((message.content or "").encode("utf-8"))
+    if message.tool_calls:
+        size += len(json.dumps(message.tool_calls, ensure_ascii=False).encode("utf-8"))
+    return size
+
+
+def history_breakdown(messages) -> list[tuple[str, int, int]]:
+    """``(kind, count, bytes)`` per role, with tool results split by tool, largest first."""
+    totals: dict[str, list[int]] = {}
+    for message in messages:
+        kind = f"tool:{message.name}" if message.role == "tool" and message.name else message.role
+        entry = totals.setdefault(kind, [0, 0])
+        entry[0] += 1
+        entry[1] += message_bytes(message)
+    return sorted(((kind, c, b) for kind, (c, b) in totals.items()), key=lambda row: -row[2])
+
+
+def cache_sizes(client) -> list[tuple[str, str]]:
+    """Describe the long-lived caches hanging off an ``OllamaClient``."""
+    from .symbols import shared_indexes
+
+    rows = []
+    if client.repo_map is not None:
+        rows.append(("repository map", format_bytes(len(client.repo_map.text.encode("utf-8")))))
+    for root, index in shared_indexes().items():
+        rows.append((f"symbol index {os.path.basename(root) or root}", f"{len(index.files())} files, {len(index)} symbols"))
+    semantic = getattr(client.tools.get("semantic_search"), "index", None)
+    if semantic is not None:
+        rows.append(("semantic index", f"{len(semantic)} vectors, {format_bytes(semantic.nbytes)}"))
+    if client.tracer is not None:
+        rows.append(("trace events buffered", str(len(client.tracer.events))))
+    return rows
+
+
+def tracemalloc_top(limit: int = 10) -> list[str]:
+    """Largest allocation sites since tracing started (starts it if needed)."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACE_FRAMES)
+        return ["tracemalloc started; allocations from now on are tracked. Run it again later."]
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ))
+    traced, peak = tracemalloc.get_traced_memory()
+    lines = [f"traced {format_bytes(traced)} (peak {format_bytes(peak)})"]
+    for stat in snapshot.statistics("lineno")[:limit]:
+        frame = stat.traceback[0]
+        where = "/".join(frame.filename.replace("\\", "/").split("/")[-2:])
+        lines.append(f"{format_bytes(stat.size):>10} {stat.count:>8} blocks  {where}:{frame.lineno}")
+    return lines
+
+
+def release_memory():
+    """Collect garbage and hand freed heap pages back to the OS where possible."""
+    gc.collect()
+    if sys.platform.startswith("linux"):
+        try:
+            ctypes.CDLL("libc.so.6").malloc_trim(0)
+        except (OSError, AttributeError):
+            pass
+
+
+class MemoryMonitor:
+    """Samples RSS periodically and calls ``on_limit`` above a soft limit.
+
+    Samples are kept in a bounded ring for ``/mem``. ``on_limit`` receives
+    the RSS that crossed the limit and returns whether it could act; after
+    it did, it is not called again for ``LIMIT_COOLDOWN`` seconds, since
+    freed memory is not always returned to the OS and RSS can stay high
+    after a successful eviction.
+    """
+
+    def __init__(self, limit_bytes: int = 0, interval: float = 0.0,
+                 on_limit: Callable[[int], bool] | None = None):
+        self.limit_bytes = limit_bytes
+        self.interval = interval or (DEFAULT_SAMPLE_INTERVAL if limit_bytes else 0.0)
+        self.on_limit = on_limit
+        self.samples: deque[tuple[float, int]] = deque(maxlen=360)
+        self._last_trigger = float("-inf")
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self.interval and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
+
+    def sample(self) -> int:
+        rss = rss_bytes()
+        now = time.monotonic()
+        self.samples.append((now, rss))
+        if (self.limit_bytes and rss > self.limit_bytes and self.on_limit
+                and now - self._last_trigger >= LIMIT_COOLDOWN):
+            if self.on_limit(rss):
+                self._last_trigger = now
+        return rss
+
+    def report(self, client=None) -> list[str]:
+        """Plain-text lines for ``/mem``."""
+        rss = self.sample()
+        lines = [f"rss {format_bytes(rss)} (peak {format_bytes(max(rss, peak_rss_bytes()))})"]
+        if self.limit_bytes:
+            lines.append(f"soft limit {format_bytes(self.limit_bytes)}")
+        if len(self.samples) > 1:
+            window = self.samples[-1][0] - self.samples[0][0]
+            values = [r for _, r in self.samples]
+            lines.append(
+                f"sampled over {window / 60:.1f} min: min {format_bytes(min(values))}, "
+                f"max {format_bytes(max(values))} ({len(values)} samples)"
+            )
+        if client is not None:
+            total = sum(message_bytes(m) for m in client.messages)
+            lines.append(f"history {len(client.messages)} messages, {format_bytes(total)}")
+            for kind, count, size in history_breakdown(client.messages):
+                lines.append(f"  {kind:<18} {count:>6}  {format_bytes(size):>10}")
+            for name, size in cache_sizes(client):
+                lines.append(f"{name:<20} {size}")
+        if tracemalloc.is_tracing():
+            lines.append("tracemalloc on (/mem top for allocation sites)")
+        return lines
@@ -0,0 +1,180 @@
+"""Per-turn Python profiling for ``--profile`` and ``/profile``.
+
+Two profilers are available. ``cprofile`` uses the deterministic
+``cProfile`` on the event-loop thread and writes ``.pstats`` files (open
+them with ``python -m pstats`` or snakeviz). ``sample`` snapshots the stacks
+of every thread from a background thread and writes collapsed stacks, one
+``frame;frame;frame count`` line per stack, ready for flamegraph.pl or
+speedscope. Sampling costs far less per call and also sees tool threads;
+cProfile gives exact call counts.
+"""
+from __future__ import annotations
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+from .session import new_session_id
+
+PROFILERS = ("cprofile", "sample")
+# Seconds between stack samples in ``sample`` mode
+SAMPLE_INTERVAL = 0.002
+# Hot functions listed after each turn
+TOP_FUNCTIONS = 12
+# Frames that mean "waiting" (event-loop polling, idle threads); left out of
+# the hot-function summary, which would otherwise be all idle time
+IDLE_MARKERS = ("select.", "selectors.py", "_overlapped", "threading.py", "futures/thread.py")
+
+
+@dataclass
+class TurnProfile:
+    path: str
+    seconds: float
+    top: list[str] = field(default_factory=list)
+    mode: str = ""
+
+
+def _short_path(filename: str) -> str:
+    parts = filename.replace("\\", "/").split("/")
+    return "/".join(parts[-2:])
+
+
+def _is_idle(frame: str) -> bool:
+    return any(marker in frame for marker in IDLE_MARKERS)
+
+
+class _Sampler:
+    """Background thread that counts the stacks of all other threads."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="taiyo-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[tuple(reversed(stack))] += 1
+
+
+class TurnProfiler:
+    """Profiles each turn while enabled and writes one file per turn.
+
+    Front-ends call ``begin`` before a turn and ``end`` after it (also when
+    it is cancelled); ``end`` returns the file written and the hottest
+    functions by self time, or ``None`` when profiling is off.
+    """
+
+    def __init__(self, working_dir: str, session_id: str | None = None):
+        self.dir = os.path.join(working_dir, ".taiyo", "profiles")
+        self.session_id = session_id or new_session_id()
+        self.mode = ""
+        self._turns = 0
+        self._started = 0.0
+        self._profile: cProfile.Profile | None = None
+        self._sampler: _Sampler | None = None
+
+    @property
+    def active(self) -> bool:
+        return bool(self.mode)
+
+    def enable(self, mode: str = "cprofile"):
+        if mode not in PROFILERS:
+            raise ValueError(f"Unknown profiler '{mode}' (choose from {', '.join(PROFILERS)})")
+        self.mode = mode
+
+    def disable(self):
+        self.mode = ""
+
+    def begin(self):
+        if not self.mode:
+            return
+        self._started = time.perf_counter()
+        if self.mode == "cprofile":
+            self._profile = cProfile.Profile()
+            try:
+                self._profile.enable()
+            except ValueError:
+                # Another profiler (e.g. a debugger) already holds the hook
+                self._profile = None
+        else:
+            self._sampler = _Sampler(SAMPLE_INTERVAL)
+            self._sampler.start()
+
+    def end(self) -> TurnProfile | None:
+        seconds = time.perf_counter() - self._started
+        profile, self._profile = self._profile, None
+        sampler, self._sampler = self._sampler, None
+        if profile is None and sampler is None:
+            return None
+        self._turns += 1
+        os.makedirs(self.dir, exist_ok=True)
+        base = os.path.join(self.dir, f"{self.session_id}_turn{self._turns:03d}")
+        if profile is not None:
+            profile.disable()
+            path = base + ".pstats"
+            profile.dump_stats(path)
+            return TurnProfile(path, seconds, self._top_cprofile(profile), self.mode)
+        sampler.stop()
+        path = base + ".collapsed"
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sampler.stacks.most_common():
+                f.write(f"{';'.join(stack)} {count}\n")
+        return TurnProfile(path, seconds, self._top_samples(sampler), self.mode)
+
+    @staticmethod
+    def _top_cprofile(profile: cProfile.Profile) -> list[str]:
+        stats = pstats.Stats(profile).stats
+        rows = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)
+        lines = []
+        for (filename, line, name), (_, calls, self_s, cum_s, _) in rows:
+            where = f"{_short_path(filename)}:{line}" if line else filename
+            if _is_idle(f"{name} {where}"):
+                continue
+            if len(lines) == TOP_FUNCTIONS:
+                break
+            lines.append(
+                f"{self_s * 1000:8.1f} ms self {cum_s * 1000:8.1f} ms cum {calls:>8}x  {name} ({where})"
+            )
+        return lines
+
+    @staticmethod
+    def _top_samples(sampler: _Sampler) -> list[str]:
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        for stack, count in sampler.stacks.items():
+            if _is_idle(stack[-1]):
+                continue
+            own[stack[-1]] += count
+            for frame in set(stack[1:]):
+                total[frame] += count
+        samples = sum(own.values()) or 1
+        # Shares of the samples in which some thread was busy
+        return [
+            f"{count / samples:6.1%} self {total[frame] / samples:6.1%} total  {frame}"
+            for frame, count in own.most_common(TOP_FUNCTIONS)
+        ]
@@ -0,0 +1,130 @@
+"""Compact, token-budgeted repository map for the system context."""
+from __future__ import annotations
+import asyncio
+import os
+
+from .symbols import IGNORED_DIRS, get_symbol_index
+
+# Files that tell the model what kind of project this is
+KEY_FILES = frozenset({
+    "README.md", "README.rst", "README", "CLAUDE.md",
+    "pyproject.toml", "setup.py", "setup.cfg", "requirements.txt",
+    "package.json", "tsconfig.json", "Cargo.toml", "go.mod",
+    "Makefile", "Dockerfile", "docker-compose.yml", "pom.xml", "build.gradle",
+})
+
+MAX_SYMBOLS_PER_FILE = 8
+MAX_DIRS = 200
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 3)
+
+
+class RepoMap:
+    """Directory layout, key files and top-level symbols of a workspace.
+
+    ``refresh()`` rebuilds the map in a worker thread on top of the
+    incremental symbol index, so only changed files are re-parsed. ``text``
+    holds the last completed map (empty until the first build).
+    """
+
+    def __init__(self, root: str, token_budget: int = 1024):
+        self.root = os.path.abspath(root)
+        self.token_budget = token_budget
+        self.text = ""
+        self._task: asyncio.Task | None = None
+        self._dirty = False
+
+    def _walk_layout(self) -> tuple[list[tuple[str, int]], list[str]]:
+        """Return ``(dir, file_count)`` pairs and key files, root-relative."""
+        dirs: list[tuple[str, int]] = []
+        key_files: list[str] = []
+        for dirpath, subdirs, files in os.walk(self.root):
+            subdirs[:] = sorted(
+                d for d in subdirs
+                if not d.startswith(".") and d not in IGNORED_DIRS and not d.endswith(".egg-info")
+            )
+            rel = os.path.relpath(dirpath, self.root)
+            visible = [f for f in files if not f.startswith(".")]
+            if rel != "." and len(dirs) < MAX_DIRS:
+                dirs.append((rel, len(visible)))
+            for fname in visible:
+                if fname in KEY_FILES:
+                    key_files.append(fname if rel == "." else os.path.join(rel, fname))
+        return dirs, sorted(key_files, key=lambda p: (p.count(os.sep), p))
+
+    def build(self) -> str:
+        """Synchronously rebuild and return the map."""
+        index = get_symbol_index(self.root)
+        index.refresh()
+        dirs, key_files = self._walk_layout()
+
+        lines = []
+        if key_files:
+            lines.append("Key files: " + ", ".join(key_files[:20]))
+        # Directories get at most half of the budget, shallowest first
+        dir_budget = self.token_budget // 2
+        shown_dirs = []
+        for d, n in sorted(dirs, key=lambda item: (item[0].count(os.sep), item[0])):
+            label = f"{d}/ ({n})"
+            dir_budget -= _estimate_tokens(label) + 1
+            if dir_budget < 0:
+                break
+            shown_dirs.append(label)
+        if shown_dirs:
+            more = f", ... +{len(dirs) - len(shown_dirs)}" if len(shown_dirs) < len(dirs) else ""
+            lines.append("Directories: " + ", ".join(sorted(shown_dirs)) + more)
+        header = "\n".join(lines)
+
+        budget = self.token_budget - _estimate_tokens(header)
+        # Shallow files first: they are the entry points and most informative
+        files = sorted(index.files(), key=lambda p: (p.count(os.sep), p))
+        entries: list[str] = []
+        omitted = 0
+        for rel in files:
+            top = [
+                s.name for s in index.file_symbols(rel)
+                if not s.parent and s.kind != "variable" and not s.name.startswith("_")
+            ]
+            entry = rel
+            if top:
+                shown = ", ".join(top[:MAX_SYMBOLS_PER_FILE])
+                more = f", +{len(top) - MAX_SYMBOLS_PER_FILE}" if len(top) > MAX_SYMBOLS_PER_FILE else ""
+                entry = f"{rel}: {shown}{more}"
+            cost = _estimate_tokens(entry) + 1
+            if cost > budget:
+                omitted += 1
+                continue
+            budget -= cost
+            entries.append(entry)
+
+        parts = [header] if header else []
+        if entries:
+            parts.append("Source files (top-level symbols):\n" + "\n".join(
+                f"  {e}" for e in sorted(entries)
+            ))
+        if omitted:
+            parts.append(f"  ... {omitted} more source files not shown")
+        self.text = "\n".join(parts)
+        return self.text
+
+    def refresh(self) -> asyncio.Task | None:
+        """Rebuild in the background; coalesces requests made while running."""
+        if self.token_budget <= 0:
+            return None
+        if self._task and not self._task.done():
+            self._dirty = True
+            return self._task
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self._task
+
+    async def _run(self):
+        while True:
+            self._dirty = False
+            try:
+                await asyncio.to_thread(self.build)
+            except Exception:
+                pass
+            if not self._dirty:
+                break
@@ -0,0 +1,49 @@
+"""Two-tier model routing: a fast model picks tools, the main model answers.
+
+With ``Config.fast_model`` set, every round of a turn first goes to the fast
+model. Rounds in which it calls a tool keep its reply. When it stops
+calling tools, the round is asked again of ``Config.model``, which writes
+the answer. A malformed or unknown tool call from the fast model, or a
+loop-guard strike, escalates the rest of the turn to ``Config.model``.
+
+A fast-model round is not capped in tokens, since the arguments of
+``write``, ``edit`` and ``apply_patch`` carry whole files and diffs. Its
+request is closed instead as soon as the reply is decided: at the first
+complete tool call, or once ``FAST_PROSE_CHARS`` of plain text have
+arrived with no tool call under way. Such a reply is an answer, which the
+main model writes again anyway. The requests whose replies are discarded
+are traced as ``discarded`` and reported per model in ``/stats``.
+"""
+from __future__ import annotations
+import re
+
+from .config import Config
+
+# Plain text (no tool call begun) after which a fast-model reply is taken as an answer
+FAST_PROSE_CHARS = 1500
+# Text that tried to be a tool call but did not parse as one
+_TOOL_CALL_ATTEMPT = re.compile(r'"(name|arguments|function|tool)"\s*:')
+
+
+def looks_like_tool_call(text: str) -> bool:
+    return bool(_TOOL_CALL_ATTEMPT.search(text))
+
+
+class ModelRoute:
+    """Which model handles the rounds of one turn."""
+
+    def __init__(self, config: Config):
+        self.model = config.model
+        self.fast_model = config.fast_model if config.fast_model != config.model else ""
+        self.escalation = ""
+
+    @property
+    def routing(self) -> bool:
+        return bool(self.fast_model) and not self.escalation
+
+    def tool_model(self) -> str:
+        return self.fast_model if self.routing else self.model
+
+    def escalate(self, reason: str):
+        if self.routing:
+            self.escalation = reason
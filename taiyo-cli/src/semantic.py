@@ -0,0 +1,307 @@
+"""Local semantic code search backed by Ollama embeddings."""
+from __future__ import annotations
+import asyncio
+import hashlib
+import heapq
+import json
+import math
+import operator
+import os
+import time
+from array import array
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+import httpx
+
+try:  # optional: ``pip install taiyo-cli[fast]``
+    import numpy as np
+except ImportError:
+    np = None
+
+from .symbols import INDEXED_EXTENSIONS, MAX_FILE_SIZE, iter_workspace_files
+
+INDEX_VERSION = 1
+
+SEARCH_EXTENSIONS = INDEXED_EXTENSIONS | {".md", ".rst", ".txt", ".toml", ".yaml", ".yml"}
+
+CHUNK_LINES = 40
+CHUNK_MAX_CHARS = 2000
+EMBED_BATCH_SIZE = 32
+# Seconds a search trusts the index before walking the workspace again
+REFRESH_INTERVAL = 15.0
+
+EmbedFn = Callable[[list[str]], Awaitable[list[list[float]]]]
+
+
+@dataclass
+class Chunk:
+    """A contiguous range of lines in a workspace file."""
+    path: str  # relative to the index root
+    start: int
+    end: int
+
+
+class OllamaEmbedder:
+    """Batched client for Ollama's ``/api/embed`` endpoint."""
+
+    def __init__(self, host: str, model: str, client: httpx.AsyncClient | None = None):
+        self.host = host
+        self.model = model
+        # A client passed in is closed by its owner
+        self._owns_client = client is None
+        self._client = client or httpx.AsyncClient(timeout=300.0)
+
+    async def close(self):
+        if self._owns_client:
+            await self._client.aclose()
+
+    async def __call__(self, texts: list[str]) -> list[list[float]]:
+        vectors: list[list[float]] = []
+        for i in range(0, len(texts), EMBED_BATCH_SIZE):
+            batch = texts[i:i + EMBED_BATCH_SIZE]
+            resp = await self._client.post(
+                f"{self.host}/api/embed",
+                json={"model": self.model, "input": batch},
+            )
+            resp.raise_for_status()
+            embeddings = resp.json().get("embeddings", [])
+            if len(embeddings) != len(batch):
+                raise ValueError(
+                    f"Embedding server returned {len(embeddings)} vectors for {len(batch)} inputs"
+                )
+            vectors.extend(embeddings)
+        return vectors
+
+
+def chunk_text(rel_path: str, text: str) -> list[tuple[int, int, str]]:
+    """Split a file into ``(start_line, end_line, embed_text)`` windows."""
+    lines = text.splitlines()
+    chunks = []
+    for start in range(0, len(lines), CHUNK_LINES):
+        window = lines[start:start + CHUNK_LINES]
+        body = "\n".join(window).strip()
+        if not body:
+            continue
+        chunks.append((start + 1, start + len(window), f"{rel_path}\n{body[:CHUNK_MAX_CHARS]}"))
+    return chunks
+
+
+if hasattr(math, "sumprod"):  # Python 3.12+: one C-level loop per row
+    _dot = math.sumprod
+else:
+    def _dot(row, query: list[float]) -> float:
+        return sum(map(operator.mul, row, query))
+
+
+def _normalize(vector: list[float]) -> list[float]:
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class SemanticIndex:
+    """Chunk embeddings for the workspace, stored under ``.taiyo/semantic/``.
+
+    Vectors are L2-normalized and kept in a single flat ``array('f')`` so a
+    query is one matrix-vector product. Chunks are keyed by content hash:
+    ``refresh()`` only embeds chunks whose text is new.
+    """
+
+    def __init__(self, root: str, embed: EmbedFn, model: str, index_dir: str | None = None):
+        self.root = os.path.abspath(root)
+        self.embed = embed
+        self.model = model
+        self.index_dir = index_dir or os.path.join(self.root, ".taiyo", "semantic")
+        self.dim = 0
+        # rel_path -> {"stamp": [mtime_ns, size], "chunks": [[start, end, digest], ...]}
+        self._files: dict[str, dict] = {}
+        self._vectors = array("f")
+        self._rows: dict[str, int] = {}
+        self._row_chunks: list[list[Chunk]] = []
+        self._lock = asyncio.Lock()
+        self._loaded = False
+        # Monotonic time of the last completed refresh
+        self._refreshed = 0.0
+
+    # -- persistence ---------------------------------------------------------
+
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.index_dir, "meta.json")
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.index_dir, "vectors.f32")
+
+    def load(self):
+        self._loaded = True
+        try:
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            vectors = array("f")
+            with open(self._vectors_path, "rb") as f:
+                vectors.frombytes(f.read())
+        except (OSError, ValueError):
+            return
+        if meta.get("version") != INDEX_VERSION or meta.get("model") != self.model:
+            return
+        order = meta.get("order", [])
+        if len(vectors) != len(order) * meta.get("dim", 0):
+            return
+        self.dim = meta["dim"]
+        self._files = meta.get("files", {})
+        self._vectors = vectors
+        self._rows = {digest: i for i, digest in enumerate(order)}
+        self._rebuild_locations()
+
+    def save(self):
+        os.makedirs(self.index_dir, exist_ok=True)
+        order = sorted(self._rows, key=self._rows.get)
+        tmp = self._vectors_path + ".tmp"
+        with open(tmp, "wb") as f:
+            self._vectors.tofile(f)
+        os.replace(tmp, self._vectors_path)
+        tmp = self._meta_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": INDEX_VERSION,
+                    "model": self.model,
+                    "dim": self.dim,
+                    "order": order,
+                    "files": self._files,
+                },
+                f,
+                separators=(",", ":"),
+            )
+        os.replace(tmp, self._meta_path)
+
+    # -- building ------------------------------------------------------------
+
+    def _scan(self) -> tuple[dict[str, dict], dict[str, str]]:
+        """Walk the workspace; return new file table and texts of unseen chunks."""
+        files: dict[str, dict] = {}
+        pending: dict[str, str] = {}
+        for fpath in iter_workspace_files(self.root, SEARCH_EXTENSIONS):
+            try:
+                st = os.stat(fpath)
+            except OSError:
+                continue
+            if st.st_size > MAX_FILE_SIZE:
+                continue
+            rel = os.path.relpath(fpath, self.root)
+            stamp = [st.st_mtime_ns, st.st_size]
+            entry = self._files.get(rel)
+            if entry and entry["stamp"] == stamp and all(c[2] in self._rows for c in entry["chunks"]):
+                files[rel] = entry
+                continue
+            try:
+                with open(fpath, "r", encoding="utf-8", errors="replace") as f:
+                    text = f.read()
+            except OSError:
+                continue
+            chunks = []
+            for start, end, embed_text in chunk_text(rel, text):
+                digest = _digest(embed_text)
+                chunks.append([start, end, digest])
+                if digest not in self._rows:
+                    pending[digest] = embed_text
+            files[rel] = {"stamp": stamp, "chunks": chunks}
+        return files, pending
+
+    def _rebuild_locations(self):
+        locations: list[list[Chunk]] = [[] for _ in range(len(self._rows))]
+        for rel, entry in self._files.items():
+            for start, end, digest in entry["chunks"]:
+                row = self._rows.get(digest)
+                if row is not None:
+                    locations[row].append(Chunk(rel, start, end))
+        self._row_chunks = locations
+
+    async def refresh(self) -> dict[str, int]:
+        """Re-chunk changed files and embed only chunks not already indexed.
+
+        Returns counts of ``embedded`` and ``reused`` chunks and ``dropped``
+        vectors no longer referenced by any file.
+        """
+        async with self._lock:
+            if not self._loaded:
+                await asyncio.to_thread(self.load)
+            files, pending = await asyncio.to_thread(self._scan)
+
+            digests = list(pending)
+            new_vectors = await self.embed([pending[d] for d in digests]) if digests else []
+
+            live = {c[2] for entry in files.values() for c in entry["chunks"]}
+            changed = bool(digests) or files.keys() != self._files.keys() or live != self._rows.keys()
+            if new_vectors and not self.dim:
+                self.dim = len(new_vectors[0])
+
+            vectors = array("f")
+            rows: dict[str, int] = {}
+            for digest, row in self._rows.items():
+                if digest in live:
+                    rows[digest] = len(rows)
+                    vectors.extend(self._vectors[row * self.dim:(row + 1) * self.dim])
+            for digest, vector in zip(digests, new_vectors):
+                if len(vector) != self.dim:
+                    raise ValueError(f"Embedding dimension changed ({len(vector)} != {self.dim})")
+                rows[digest] = len(rows)
+                vectors.extend(_normalize(vector))
+
+            stats = {
+                "embedded": len(digests),
+                "reused": len(live) - len(digests),
+                "dropped": len(self._rows) - (len(rows) - len(digests)),
+            }
+            self._files, self._vectors, self._rows = files, vectors, rows
+            self._rebuild_locations()
+            self._refreshed = time.monotonic()
+            if changed:
+                try:
+                    await asyncio.to_thread(self.save)
+                except OSError:
+                    pass
+            return stats
+
+    # -- queries -------------------------------------------------------------
+
+    def _scores(self, query: list[float]) -> list[float]:
+        """Cosine similarity of ``query`` against every stored vector."""
+        if np is not None:
+            matrix = np.frombuffer(self._vectors, dtype=np.float32).reshape(-1, self.dim)
+            return (matrix @ np.asarray(query, dtype=np.float32)).tolist()
+        dim = self.dim
+        # Rows as zero-copy views of the flat array
+        vectors = memoryview(self._vectors)
+        return [_dot(vectors[i * dim:(i + 1) * dim], query) for i in range(len(self._rows))]
+
+    async def search(self, query: str, k: int = 8) -> list[tuple[float, Chunk]]:
+        """Return the ``k`` chunks most similar to ``query``.
+
+        The workspace is re-scanned at most every ``REFRESH_INTERVAL``
+        seconds; ``refresh()`` forces it.
+        """
+        if time.monotonic() - self._refreshed >= REFRESH_INTERVAL:
+            await self.refresh()
+        if not self._rows:
+            return []
+        (vector,) = await self.embed([query])
+        scores = self._scores(_normalize(vector))
+        results: list[tuple[float, Chunk]] = []
+        for row in heapq.nlargest(k, range(len(scores)), key=scores.__getitem__):
+            for chunk in self._row_chunks[row]:
+                results.append((scores[row], chunk))
+        return results[:k]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the vector matrix."""
+        return len(self._vectors) * self._vectors.itemsize
+
+    def __len__(self) -> int:
+        return len(self._rows)
@@ -0,0 +1,296 @@
+"""Buffered, crash-safe session journal with an offset index for resume."""
+from __future__ import annotations
+import asyncio
+import atexit
+import hashlib
+import json
+import os
+import struct
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+
+# Seconds between background flushes of buffered records
+FLUSH_INTERVAL = 0.5
+# Message content / tool calls larger than this are stored as blobs
+BLOB_THRESHOLD = 1024
+
+# Sidecar index entry: byte offset of the record in the log, record kind
+INDEX_ENTRY = struct.Struct("<QB")
+KIND_MESSAGE = 0
+KIND_RESET = 1  # history cleared; nothing before it is part of the context
+KIND_SNAPSHOT = 2  # full replacement history, e.g. after /compact
+
+
+@dataclass
+class SessionInfo:
+    session_id: str
+    path: str
+    size: int
+    modified: float
+
+
+def new_session_id() -> str:
+    """Start-time id; the pid keeps processes started in the same second apart."""
+    return f"{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}"
+
+
+def sessions_dir(working_dir: str) -> str:
+    return os.path.join(working_dir, ".taiyo")
+
+
+def list_sessions(working_dir: str) -> list[SessionInfo]:
+    """Session logs in the workspace, most recently modified first."""
+    directory = sessions_dir(working_dir)
+    sessions = []
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return []
+    for entry in entries:
+        if entry.name.startswith("session_") and entry.name.endswith(".jsonl"):
+            st = entry.stat()
+            sessions.append(SessionInfo(
+                session_id=entry.name[len("session_"):-len(".jsonl")],
+                path=entry.path,
+                size=st.st_size,
+                modified=st.st_mtime,
+            ))
+    sessions.sort(key=lambda s: s.modified, reverse=True)
+    return sessions
+
+
+class BlobStore:
+    """Content-addressed text blobs under ``.taiyo/blobs``."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:])
+
+    def put(self, text: str) -> str:
+        data = text.encode("utf-8")
+        digest = hashlib.sha1(data).hexdigest()
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        return digest
+
+    def get(self, digest: str) -> str:
+        try:
+            with open(self._path(digest), "rb") as f:
+                return f.read().decode("utf-8", errors="replace")
+        except OSError:
+            return f"[missing blob {digest}]"
+
+
+class _Blob:
+    """Text bound for the ``BlobStore``; replaced by its hash when flushed."""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class SessionJournal:
+    """Append-only log of every ``Message`` in a session.
+
+    ``record`` only queues the entry; a background task writes queued
+    entries every ``FLUSH_INTERVAL`` seconds in one write, in a worker
+    thread, and anything left is flushed on ``close`` or at interpreter
+    exit. Large contents and tool-call arguments go to a ``BlobStore``
+    during the flush and the log keeps their hash, so the log itself stays
+    small.
+
+    Next to ``session_<id>.jsonl`` a binary ``.idx`` file holds the offset
+    and kind of every record. ``load`` uses it to seek straight to the last
+    reset or snapshot and parses only the records after it. The index is
+    written after the log, so after a crash it can only lag behind; the
+    unindexed tail is re-scanned and a torn last line is ignored.
+    """
+
+    def __init__(self, working_dir: str, session_id: str | None = None):
+        self.dir = sessions_dir(working_dir)
+        self.blobs = BlobStore(os.path.join(self.dir, "blobs"))
+        self.session_id = session_id or new_session_id()
+        self._buffer: list[tuple[int, dict]] = []
+        # Guards ``_buffer`` only; held briefly, also on the event loop
+        self._lock = threading.Lock()
+        # Serializes flushes so batches reach the log in order
+        self._write_lock = threading.Lock()
+        self._task: asyncio.Task | None = None
+        atexit.register(self.flush)
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.dir, f"session_{self.session_id}.jsonl")
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.dir, f"session_{self.session_id}.idx")
+
+    # -- writing -------------------------------------------------------------
+
+    def record(self, message):
+        """Queue a message (anything with ``Message``'s attributes)."""
+        entry = {"type": "message", **self._encode(message)}
+        self._enqueue(KIND_MESSAGE, entry)
+
+    def reset(self):
+        self._enqueue(KIND_RESET, {"type": "reset"})
+
+    def snapshot(self, messages):
+        self._enqueue(KIND_SNAPSHOT, {"type": "snapshot", "messages": [self._encode(m) for m in messages]})
+
+    def _encode(self, message) -> dict:
+        entry: dict = {"role": message.role}
+        content = message.content or ""
+        if len(content) > BLOB_THRESHOLD:
+            entry["content_blob"] = _Blob(content)
+        else:
+            entry["content"] = content
+        if message.tool_calls:
+            calls = json.dumps(message.tool_calls, ensure_ascii=False)
+            if len(calls) > BLOB_THRESHOLD:
+                entry["tool_calls_blob"] = _Blob(calls)
+            else:
+                entry["tool_calls"] = message.tool_calls
+        if message.name:
+            entry["name"] = message.name
+        if message.tool_call_id:
+            entry["tool_call_id"] = message.tool_call_id
+        return entry
+
+    def _enqueue(self, kind: int, entry: dict):
+        entry["ts"] = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            self._buffer.append((kind, entry))
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(FLUSH_INTERVAL)
+        await asyncio.to_thread(self.flush)
+
+    def _store_blob(self, value):
+        if isinstance(value, _Blob):
+            return self.blobs.put(value.text)
+        raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+    def flush(self):
+        """Write all buffered records to the log, then to the index."""
+        with self._write_lock:
+            with self._lock:
+                pending, self._buffer = self._buffer, []
+            if not pending:
+                return
+            os.makedirs(self.dir, exist_ok=True)
+            lines = [
+                json.dumps(entry, ensure_ascii=False, default=self._store_blob).encode("utf-8") + b"\n"
+                for _, entry in pending
+            ]
+            with open(self.path, "ab") as log:
+                offset = log.tell()
+                if offset and not self._ends_with_newline():
+                    # Terminate a line torn by a crash so it can't swallow ours
+                    log.write(b"\n")
+                    offset += 1
+                log.write(b"".join(lines))
+                log.flush()
+                os.fsync(log.fileno())
+            index = bytearray()
+            for (kind, _), line in zip(pending, lines):
+                index += INDEX_ENTRY.pack(offset, kind)
+                offset += len(line)
+            with open(self.index_path, "ab") as idx:
+                idx.write(index)
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def switch(self, session_id: str):
+        """Continue journaling into another (e.g. resumed) session."""
+        self.flush()
+        self.session_id = session_id
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.flush()
+        # Long-lived processes (the daemon) close many journals
+        atexit.unregister(self.flush)
+
+    # -- reading -------------------------------------------------------------
+
+    def _read_index(self) -> list[tuple[int, int]]:
+        try:
+            with open(self.index_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return []
+        usable = len(data) - len(data) % INDEX_ENTRY.size
+        return [INDEX_ENTRY.unpack_from(data, i) for i in range(0, usable, INDEX_ENTRY.size)]
+
+    def load(self) -> list:
+        """Rebuild the conversation (a list of ``api.Message``) from the log."""
+        from .api import Message
+
+        self.flush()
+        entries = self._read_index()
+        start = 0
+        for offset, kind in reversed(entries):
+            if kind != KIND_MESSAGE:
+                start = offset
+                break
+
+        # Records past the last index entry (lost in a crash) are read too
+        messages: list = []
+        if not os.path.exists(self.path):
+            return messages
+        with open(self.path, "rb") as log:
+            log.seek(start)
+            for line in log:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn write at the end of a crashed session
+                kind = entry.get("type", "message")
+                if kind == "reset":
+                    messages = []
+                elif kind == "snapshot":
+                    messages = [self._decode(Message, m) for m in entry.get("messages", [])]
+                elif kind == "message":
+                    messages.append(self._decode(Message, entry))
+        return messages
+
+    def _decode(self, message_cls, entry: dict):
+        content = entry.get("content", "")
+        if "content_blob" in entry:
+            content = self.blobs.get(entry["content_blob"])
+        tool_calls = entry.get("tool_calls")
+        if "tool_calls_blob" in entry:
+            try:
+                tool_calls = json.loads(self.blobs.get(entry["tool_calls_blob"]))
+            except ValueError:
+                tool_calls = None
+        return message_cls(
+            role=entry.get("role", "user"),
+            content=content,
+            tool_calls=tool_calls,
+            tool_call_id=entry.get("tool_call_id"),
+            name=entry.get("name"),
+        )
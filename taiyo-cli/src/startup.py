@@ -0,0 +1,73 @@
+"""Startup timing for ``taiyo --startup-profile``."""
+from __future__ import annotations
+import builtins
+import sys
+import threading
+import time
+
+
+class StartupProfile:
+    """Records startup milestones and, optionally, per-package import times.
+
+    ``mark`` stores the time since the profile was created, so milestones
+    reached by background tasks (e.g. the Ollama connection check) line up
+    on the same timeline as the foreground ones. ``track_imports`` wraps
+    ``__import__`` and charges the cost of every newly loaded module to its
+    top-level package; nested imports are attributed to the outermost one.
+    """
+
+    def __init__(self, start: float | None = None):
+        self.start = start if start is not None else time.perf_counter()
+        self.marks: list[tuple[str, float]] = []
+        self.imports: dict[str, float] = {}
+        self._depth = threading.local()
+        self._original_import = None
+
+    def mark(self, name: str):
+        self.marks.append((name, time.perf_counter() - self.start))
+
+    def elapsed(self, name: str) -> float | None:
+        for mark, at in self.marks:
+            if mark == name:
+                return at
+        return None
+
+    def track_imports(self):
+        if self._original_import is not None:
+            return
+        original = self._original_import = builtins.__import__
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in sys.modules:
+                return original(name, globals, locals, fromlist, level)
+            depth = getattr(self._depth, "value", 0)
+            self._depth.value = depth + 1
+            started = time.perf_counter()
+            try:
+                return original(name, globals, locals, fromlist, level)
+            finally:
+                self._depth.value = depth
+                if depth == 0:
+                    package = name.partition(".")[0]
+                    self.imports[package] = self.imports.get(package, 0.0) + time.perf_counter() - started
+
+        builtins.__import__ = timed_import
+
+    def stop_tracking(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def report(self, limit: int = 12) -> str:
+        lines = ["Startup profile (ms since launch)"]
+        for name, at in sorted(self.marks, key=lambda m: m[1]):
+            lines.append(f"  {at * 1000:8.1f}  {name}")
+        if self.imports:
+            lines.append("Imports (ms, by top-level package)")
+            ranked = sorted(self.imports.items(), key=lambda kv: kv[1], reverse=True)
+            for package, seconds in ranked[:limit]:
+                lines.append(f"  {seconds * 1000:8.1f}  {package}")
+            rest = ranked[limit:]
+            if rest:
+                lines.append(f"  {sum(s for _, s in rest) * 1000:8.1f}  ({len(rest)} others)")
+        return "\n".join(lines)
@@ -0,0 +1,336 @@
+"""Incrementally maintained index of symbol definitions and references."""
+from __future__ import annotations
+import ast
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+
+INDEX_VERSION = 1
+
+# Directories never worth indexing (matches the grep/glob tool filters)
+IGNORED_DIRS = ("node_modules", "__pycache__", "venv", ".git")
+
+MAX_FILE_SIZE = 1024 * 1024
+
+IDENT_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+# Lightweight regex extractors for non-Python languages: (kind, pattern).
+# Each pattern must expose the symbol name as group "name".
+_JS_PATTERNS = [
+    ("class", re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:abstract\s+)?class\s+(?P<name>[A-Za-z_$][\w$]*)")),
+    ("function", re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*(?P<name>[A-Za-z_$][\w$]*)")),
+    ("function", re.compile(r"^\s*(?:export\s+)?(?:const|let|var)\s+(?P<name>[A-Za-z_$][\w$]*)\s*=\s*(?:async\s+)?(?:function\b|\([^)]*\)\s*=>|[A-Za-z_$][\w$]*\s*=>)")),
+    ("interface", re.compile(r"^\s*(?:export\s+)?interface\s+(?P<name>[A-Za-z_$][\w$]*)")),
+    ("type", re.compile(r"^\s*(?:export\s+)?type\s+(?P<name>[A-Za-z_$][\w$]*)\s*=")),
+    ("enum", re.compile(r"^\s*(?:export\s+)?(?:const\s+)?enum\s+(?P<name>[A-Za-z_$][\w$]*)")),
+]
+
+_REGEX_EXTRACTORS: dict[str, list[tuple[str, re.Pattern]]] = {
+    ".js": _JS_PATTERNS,
+    ".jsx": _JS_PATTERNS,
+    ".mjs": _JS_PATTERNS,
+    ".ts": _JS_PATTERNS,
+    ".tsx": _JS_PATTERNS,
+    ".go": [
+        ("function", re.compile(r"^func\s+(?:\([^)]*\)\s*)?(?P<name>[A-Za-z_]\w*)")),
+        ("type", re.compile(r"^type\s+(?P<name>[A-Za-z_]\w*)")),
+    ],
+    ".rs": [
+        ("function", re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:async\s+)?(?:unsafe\s+)?fn\s+(?P<name>[A-Za-z_]\w*)")),
+        ("struct", re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?struct\s+(?P<name>[A-Za-z_]\w*)")),
+        ("enum", re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?enum\s+(?P<name>[A-Za-z_]\w*)")),
+        ("trait", re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?trait\s+(?P<name>[A-Za-z_]\w*)")),
+        ("type", re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?type\s+(?P<name>[A-Za-z_]\w*)")),
+        ("module", re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?mod\s+(?P<name>[A-Za-z_]\w*)")),
+    ],
+    ".java": [
+        ("class", re.compile(r"^\s*(?:(?:public|private|protected|static|final|abstract|sealed)\s+)*(?:class|interface|enum|record)\s+(?P<name>[A-Za-z_]\w*)")),
+        ("method", re.compile(r"^\s+(?:(?:public|private|protected|static|final|abstract|synchronized)\s+)+[\w<>\[\],\s]+?\s+(?P<name>[A-Za-z_]\w*)\s*\(")),
+    ],
+    ".c": [
+        ("function", re.compile(r"^[A-Za-z_][\w\s\*]*?\b(?P<name>[A-Za-z_]\w*)\s*\([^;]*$")),
+        ("struct", re.compile(r"^\s*(?:typedef\s+)?struct\s+(?P<name>[A-Za-z_]\w*)")),
+        ("macro", re.compile(r"^\s*#\s*define\s+(?P<name>[A-Za-z_]\w*)")),
+    ],
+    ".rb": [
+        ("class", re.compile(r"^\s*class\s+(?P<name>[A-Z]\w*)")),
+        ("module", re.compile(r"^\s*module\s+(?P<name>[A-Z]\w*)")),
+        ("method", re.compile(r"^\s*def\s+(?:self\.)?(?P<name>[A-Za-z_]\w*[?!=]?)")),
+    ],
+    ".sh": [
+        ("function", re.compile(r"^\s*(?:function\s+)?(?P<name>[A-Za-z_][\w-]*)\s*\(\)\s*\{?")),
+    ],
+}
+for _ext in (".h", ".cc", ".cpp", ".hpp", ".cxx"):
+    _REGEX_EXTRACTORS[_ext] = _REGEX_EXTRACTORS[".c"] + [
+        ("class", re.compile(r"^\s*(?:template\s*<[^>]*>\s*)?class\s+(?P<name>[A-Za-z_]\w*)")),
+    ]
+
+_C_KEYWORDS = frozenset({"if", "for", "while", "switch", "return", "sizeof", "else"})
+
+INDEXED_EXTENSIONS = frozenset({".py", *_REGEX_EXTRACTORS})
+
+
+def iter_workspace_files(root: str, extensions: frozenset[str] | set[str]):
+    """Yield paths under ``root`` with one of ``extensions``, skipping ignored dirs."""
+    for dirpath, dirs, files in os.walk(root):
+        dirs[:] = [
+            d for d in dirs
+            if not d.startswith(".") and d not in IGNORED_DIRS
+        ]
+        for fname in files:
+            if fname.startswith("."):
+                continue
+            if os.path.splitext(fname)[1] not in extensions:
+                continue
+            yield os.path.join(dirpath, fname)
+
+
+@dataclass
+class Symbol:
+    """A single symbol definition."""
+    name: str
+    kind: str
+    path: str  # relative to the index root
+    line: int
+    parent: str = ""
+
+    @property
+    def qualname(self) -> str:
+        return f"{self.parent}.{self.name}" if self.parent else self.name
+
+
+def _extract_python(source: str) -> list[tuple[str, str, int, str]]:
+    """Extract definitions from Python source using ``ast``."""
+    tree = ast.parse(source)
+    found: list[tuple[str, str, int, str]] = []
+
+    def visit(node: ast.AST, parent: str, in_class: bool):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.ClassDef):
+                found.append((child.name, "class", child.lineno, parent))
+                visit(child, f"{parent}.{child.name}" if parent else child.name, True)
+            elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                kind = "method" if in_class else "function"
+                found.append((child.name, kind, child.lineno, parent))
+                visit(child, f"{parent}.{child.name}" if parent else child.name, False)
+            elif isinstance(child, (ast.Assign, ast.AnnAssign)) and (not parent or in_class):
+                targets = child.targets if isinstance(child, ast.Assign) else [child.target]
+                for target in targets:
+                    if isinstance(target, ast.Name):
+                        found.append((target.id, "variable", child.lineno, parent))
+            elif isinstance(child, (ast.If, ast.Try)) and not parent:
+                # Module-level conditional definitions (e.g. optional imports)
+                visit(child, parent, in_class)
+
+    visit(tree, "", False)
+    return found
+
+
+def _extract_regex(source: str, ext: str) -> list[tuple[str, str, int, str]]:
+    """Extract definitions line-by-line using the regex table for ``ext``."""
+    patterns = _REGEX_EXTRACTORS[ext]
+    found: list[tuple[str, str, int, str]] = []
+    for lineno, line in enumerate(source.splitlines(), 1):
+        for kind, pattern in patterns:
+            m = pattern.match(line)
+            if m:
+                name = m.group("name")
+                if name in _C_KEYWORDS:
+                    continue
+                found.append((name, kind, lineno, ""))
+                break
+    return found
+
+
+def extract_symbols(source: str, ext: str) -> list[tuple[str, str, int, str]]:
+    """Return ``(name, kind, line, parent)`` tuples for ``source``."""
+    if ext == ".py":
+        try:
+            return _extract_python(source)
+        except (SyntaxError, ValueError):
+            return []
+    if ext in _REGEX_EXTRACTORS:
+        return _extract_regex(source, ext)
+    return []
+
+
+class SymbolIndex:
+    """Definitions and identifier usage for every source file under ``root``.
+
+    The index is persisted to ``<root>/.taiyo/symbols.json``. ``refresh()``
+    only re-parses files whose size or mtime changed since the last run, so
+    keeping it current is cheap after the first build.
+    """
+
+    def __init__(self, root: str, index_path: str | None = None):
+        self.root = os.path.abspath(root)
+        self.index_path = index_path or os.path.join(self.root, ".taiyo", "symbols.json")
+        # rel_path -> {"stamp": [mtime_ns, size], "symbols": [...], "idents": [...]}
+        self._files: dict[str, dict] = {}
+        self._defs: dict[str, list[Symbol]] = {}
+        self._refs: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    # -- persistence ---------------------------------------------------------
+
+    def load(self):
+        """Load the on-disk index, ignoring it if missing or incompatible."""
+        self._loaded = True
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != INDEX_VERSION or data.get("root") != self.root:
+            return
+        self._files = data.get("files", {})
+        self._rebuild_lookup()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": INDEX_VERSION, "root": self.root, "files": self._files},
+                f,
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+        os.replace(tmp_path, self.index_path)
+
+    # -- building ------------------------------------------------------------
+
+    def _index_file(self, fpath: str, stamp: list[int]) -> dict:
+        ext = os.path.splitext(fpath)[1]
+        try:
+            with open(fpath, "r", encoding="utf-8", errors="replace") as f:
+                source = f.read()
+        except OSError:
+            source = ""
+        symbols = [list(s) for s in extract_symbols(source, ext)]
+        idents = sorted(set(IDENT_RE.findall(source)))
+        return {"stamp": stamp, "symbols": symbols, "idents": idents}
+
+    def refresh(self) -> dict[str, int]:
+        """Bring the index up to date with the filesystem.
+
+        Returns counts of ``added``, ``updated``, ``removed`` and ``unchanged``
+        files. The index is saved only when something changed.
+        """
+        with self._lock:
+            if not self._loaded:
+                self.load()
+            stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+            seen: set[str] = set()
+            for fpath in iter_workspace_files(self.root, INDEXED_EXTENSIONS):
+                try:
+                    st = os.stat(fpath)
+                except OSError:
+                    continue
+                if st.st_size > MAX_FILE_SIZE:
+                    continue
+                rel = os.path.relpath(fpath, self.root)
+                seen.add(rel)
+                stamp = [st.st_mtime_ns, st.st_size]
+                entry = self._files.get(rel)
+                if entry and entry["stamp"] == stamp:
+                    stats["unchanged"] += 1
+                    continue
+                stats["updated" if entry else "added"] += 1
+                self._files[rel] = self._index_file(fpath, stamp)
+
+            for rel in list(self._files):
+                if rel not in seen:
+                    del self._files[rel]
+                    stats["removed"] += 1
+
+            if stats["added"] or stats["updated"] or stats["removed"]:
+                self._rebuild_lookup()
+                try:
+                    self.save()
+                except OSError:
+                    pass
+            return stats
+
+    def _rebuild_lookup(self):
+        defs: dict[str, list[Symbol]] = {}
+        refs: dict[str, set[str]] = {}
+        for rel, entry in self._files.items():
+            for name, kind, line, parent in entry["symbols"]:
+                defs.setdefault(name, []).append(Symbol(name, kind, rel, line, parent))
+            for ident in entry["idents"]:
+                refs.setdefault(ident, set()).add(rel)
+        self._defs = defs
+        self._refs = refs
+
+    # -- queries -------------------------------------------------------------
+
+    def _split_name(self, name: str) -> tuple[str, str]:
+        """Split ``Class.method`` into (leaf name, parent qualifier)."""
+        if "." in name:
+            parent, _, leaf = name.rpartition(".")
+            return leaf, parent
+        return name, ""
+
+    def definitions(self, name: str) -> list[Symbol]:
+        """Find definitions of ``name`` (optionally qualified, e.g. ``Cls.meth``)."""
+        leaf, parent = self._split_name(name)
+        found = self._defs.get(leaf, [])
+        if parent:
+            found = [s for s in found if s.parent == parent or s.parent.endswith("." + parent)]
+        return sorted(found, key=lambda s: (s.path, s.line))
+
+    def file_symbols(self, path: str) -> list[Symbol]:
+        """List the symbols defined in ``path`` (absolute or root-relative)."""
+        rel = os.path.relpath(os.path.abspath(os.path.join(self.root, path)), self.root)
+        entry = self._files.get(rel)
+        if not entry:
+            return []
+        return [Symbol(n, k, rel, ln, p) for n, k, ln, p in entry["symbols"]]
+
+    def references(self, name: str, limit: int = 200) -> list[tuple[str, int, str]]:
+        """Find lines that mention ``name``, excluding its definition lines."""
+        leaf, _ = self._split_name(name)
+        candidates = sorted(self._refs.get(leaf, ()))
+        def_lines = {(s.path, s.line) for s in self._defs.get(leaf, [])}
+        word = re.compile(rf"(?<![\w$]){re.escape(leaf)}(?![\w$])")
+        results: list[tuple[str, int, str]] = []
+        for rel in candidates:
+            try:
+                with open(os.path.join(self.root, rel), "r", encoding="utf-8", errors="replace") as f:
+                    for lineno, line in enumerate(f, 1):
+                        if (rel, lineno) in def_lines or not word.search(line):
+                            continue
+                        results.append((rel, lineno, line.strip()))
+                        if len(results) >= limit:
+                            return results
+            except OSError:
+                continue
+        return results
+
+    def files(self) -> list[str]:
+        return sorted(self._files)
+
+    def __len__(self) -> int:
+        return sum(len(e["symbols"]) for e in self._files.values())
+
+
+_shared: dict[str, SymbolIndex] = {}
+
+
+def shared_indexes() -> dict[str, SymbolIndex]:
+    """Every index created by ``get_symbol_index``, keyed by root."""
+    return dict(_shared)
+
+
+def get_symbol_index(root: str) -> SymbolIndex:
+    """Return the process-wide index for ``root`` (created on first use)."""
+    root = os.path.abspath(root)
+    index = _shared.get(root)
+    if index is None:
+        index = _shared[root] = SymbolIndex(root)
+    return index
@@ -3,9 +3,13 @@ from .bash_tool import BashTool
 from .read_tool import ReadTool
 from .write_tool import WriteTool
 from .edit_tool import EditTool
+from .patch_tool import ApplyPatchTool
 from .grep_tool import GrepTool
 from .glob_tool import GlobTool
 from .web_tool import WebSearchTool
+from .symbols_tool import SymbolsTool
+from .semantic_tool import SemanticSearchTool
+from .task_tool import TaskTool
 
 __all__ = [
     "BaseTool",
@@ -14,7 +18,11 @@ __all__ = [
     "ReadTool",
     "WriteTool",
     "EditTool",
+    "ApplyPatchTool",
     "GrepTool",
     "GlobTool",
     "WebSearchTool",
+    "SymbolsTool",
+    "SemanticSearchTool",
+    "TaskTool",
 ]
@@ -34,6 +34,9 @@ class BaseTool(ABC):
         """Execute the tool with given parameters."""
         ...
 
+    async def close(self):
+        """Release resources (connections, processes) held between calls."""
+
     def to_api_schema(self) -> dict[str, Any]:
         """Convert to Ollama/OpenAI-compatible tool schema."""
         return {
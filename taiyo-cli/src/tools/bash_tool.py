@@ -2,16 +2,32 @@
 from __future__ import annotations
 import asyncio
 import os
+import signal
 from typing import Any
 from .base import BaseTool, ToolResult
 
 
+def _kill_process_tree(proc: asyncio.subprocess.Process):
+    """Kill a shell started in its own session together with its children."""
+    if proc.returncode is not None:
+        return
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
 class BashTool(BaseTool):
     name = "bash"
     description = "Execute a bash command and return output. Use for git, npm, system commands, etc."
 
-    def __init__(self, cwd: str | None = None):
+    def __init__(self, cwd: str | None = None, env: dict[str, str] | None = None):
         self.cwd = cwd or os.getcwd()
+        # Environment of the commands; the daemon passes its client's
+        self.env = env
 
     def get_schema(self) -> dict[str, Any]:
         return {
@@ -37,13 +53,16 @@ class BashTool(BaseTool):
         if not command:
             return ToolResult(error="No command provided", is_error=True)
 
+        proc = None
         try:
             proc = await asyncio.create_subprocess_shell(
                 command,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
                 cwd=self.cwd,
-                env={**os.environ, "TERM": "dumb"},
+                env={**(os.environ if self.env is None else self.env), "TERM": "dumb"},
+                # Own process group, so timeouts and cancellation reach children
+                start_new_session=True,
             )
             stdout, stderr = await asyncio.wait_for(
                 proc.communicate(), timeout=timeout
@@ -63,7 +82,12 @@ class BashTool(BaseTool):
             combined = output + ("\n" + err_output if err_output else "")
             return ToolResult(output=combined.strip())
 
+        except asyncio.CancelledError:
+            if proc is not None:
+                _kill_process_tree(proc)
+            raise
         except asyncio.TimeoutError:
+            _kill_process_tree(proc)
             return ToolResult(error=f"Command timed out after {timeout}s", is_error=True)
         except Exception as e:
             return ToolResult(error=str(e), is_error=True)
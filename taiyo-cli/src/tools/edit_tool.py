@@ -9,6 +9,9 @@ class EditTool(BaseTool):
     name = "edit"
     description = "Edit a file by replacing an exact string match with new content."
 
+    def __init__(self, cwd: str | None = None):
+        self.cwd = cwd or os.getcwd()
+
     def get_schema(self) -> dict[str, Any]:
         return {
             "type": "object",
@@ -45,7 +48,7 @@ class EditTool(BaseTool):
 
         file_path = os.path.expanduser(file_path)
         if not os.path.isabs(file_path):
-            file_path = os.path.abspath(file_path)
+            file_path = os.path.abspath(os.path.join(self.cwd, file_path))
 
         if not os.path.exists(file_path):
             return ToolResult(error=f"File not found: {file_path}", is_error=True)
@@ -10,6 +10,9 @@ class GlobTool(BaseTool):
     name = "glob"
     description = "Find files matching a glob pattern (e.g. '**/*.py', 'src/**/*.ts')."
 
+    def __init__(self, cwd: str | None = None):
+        self.cwd = cwd or os.getcwd()
+
     def get_schema(self) -> dict[str, Any]:
         return {
             "type": "object",
@@ -35,7 +38,7 @@ class GlobTool(BaseTool):
 
         path = os.path.expanduser(path)
         if not os.path.isabs(path):
-            path = os.path.abspath(path)
+            path = os.path.abspath(os.path.join(self.cwd, path))
 
         full_pattern = os.path.join(path, pattern)
 
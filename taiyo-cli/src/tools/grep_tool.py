@@ -10,6 +10,9 @@ class GrepTool(BaseTool):
     name = "grep"
     description = "Search file contents using regex patterns. Returns matching lines with file paths and line numbers."
 
+    def __init__(self, cwd: str | None = None):
+        self.cwd = cwd or os.getcwd()
+
     def get_schema(self) -> dict[str, Any]:
         return {
             "type": "object",
@@ -46,7 +49,7 @@ class GrepTool(BaseTool):
 
         path = os.path.expanduser(path)
         if not os.path.isabs(path):
-            path = os.path.abspath(path)
+            path = os.path.abspath(os.path.join(self.cwd, path))
 
         flags = re.IGNORECASE if case_insensitive else 0
         try:
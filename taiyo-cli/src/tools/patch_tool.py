@@ -0,0 +1,327 @@
+"""Unified-diff patch tool."""
+from __future__ import annotations
+import os
+import re
+import tempfile
+from dataclasses import dataclass, field
+from typing import Any
+from .base import BaseTool, ToolResult
+
+HUNK_HEADER_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+# How many leading/trailing context lines may be dropped when matching (like patch --fuzz)
+MAX_FUZZ = 2
+
+
+class PatchError(Exception):
+    """Raised when a patch cannot be parsed or applied."""
+
+
+@dataclass
+class Hunk:
+    header: str
+    old_start: int  # 1-based, 0 if unknown
+    lines: list[str] = field(default_factory=list)  # each prefixed with ' ', '-' or '+'
+
+    @property
+    def old_lines(self) -> list[str]:
+        return [l[1:] for l in self.lines if l[:1] in (" ", "-")]
+
+
+@dataclass
+class FilePatch:
+    old_path: str | None
+    new_path: str | None
+    hunks: list[Hunk] = field(default_factory=list)
+
+
+def _strip_prefix(path: str) -> str | None:
+    path = path.split("\t")[0].strip()
+    if path == "/dev/null":
+        return None
+    if path.startswith(("a/", "b/")):
+        return path[2:]
+    return path
+
+
+def split_lines(text: str) -> list[str]:
+    """Split on "\n" only, dropping the "\r" of CRLF endings.
+
+    ``str.splitlines`` would also break on form feeds, \x1c-\x1e, NEL and
+    the Unicode line separators, which are ordinary characters in a line.
+    """
+    lines = text.split("\n")
+    if lines[-1] == "":
+        lines.pop()
+    return [line[:-1] if line.endswith("\r") else line for line in lines]
+
+
+def _in_hunk(line: str, old_left: int, new_left: int) -> bool:
+    """Whether ``line`` is part of a hunk with that many old/new lines still to come."""
+    kind = line[:1]
+    if kind == "-":
+        return old_left > 0
+    if kind == "+":
+        return new_left > 0
+    # Context; editors and models often strip the space from blank ones
+    return kind in (" ", "") and old_left > 0 and new_left > 0
+
+
+def parse_patch(text: str) -> list[FilePatch]:
+    """Parse a (possibly multi-file) unified diff.
+
+    The line counts of a hunk header decide where the hunk ends, so a
+    removed ``-- x`` line next to an added ``++ y`` line is not taken for
+    a file header. Lines past the counts are still read into the hunk
+    until the next header, since models often get the counts wrong.
+    """
+    patches: list[FilePatch] = []
+    current: FilePatch | None = None
+    hunk: Hunk | None = None
+    # Old/new lines of the current hunk still to come, from its header
+    old_left = new_left = 0
+    lines = split_lines(text)
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if hunk is not None and _in_hunk(line, old_left, new_left):
+            hunk.lines.append(line or " ")
+            old_left -= line[:1] != "+"
+            new_left -= line[:1] != "-"
+            i += 1
+            continue
+        if line.startswith("--- ") and i + 1 < len(lines) and lines[i + 1].startswith("+++ "):
+            current = FilePatch(_strip_prefix(line[4:]), _strip_prefix(lines[i + 1][4:]))
+            patches.append(current)
+            hunk = None
+            i += 2
+            continue
+        if line.startswith("@@"):
+            if current is None:
+                raise PatchError(f"Hunk before file header at line {i + 1}")
+            m = HUNK_HEADER_RE.match(line)
+            old_start = int(m.group(1)) if m else 0
+            if m and m.group(2) == "0":
+                # Pure insertion: the header names the line *after which* to insert
+                old_start += 1
+            hunk = Hunk(header=line, old_start=old_start)
+            current.hunks.append(hunk)
+            # Counts default to 1; a header without numbers leaves them unknown
+            old_left = int(m.group(2) or 1) if m else 0
+            new_left = int(m.group(4) or 1) if m else 0
+        elif hunk is not None and line[:1] in (" ", "-", "+"):
+            hunk.lines.append(line)
+        elif hunk is not None and line == "":
+            # Editors and models often strip the space from blank context lines
+            hunk.lines.append(" ")
+        elif line.startswith("\\"):
+            pass  # "\ No newline at end of file"
+        else:
+            hunk = None
+        i += 1
+
+    if not patches:
+        raise PatchError("No file headers found (expected '--- a/path' and '+++ b/path' lines)")
+    for p in patches:
+        if not p.hunks:
+            raise PatchError(f"No hunks for {p.new_path or p.old_path}")
+        for h in p.hunks:
+            # Blank separators after a hunk are not context
+            while h.lines and h.lines[-1] == " ":
+                h.lines.pop()
+    return patches
+
+
+def _matches(content: list[str], pos: int, expected: list[str], loose: bool) -> bool:
+    if pos < 0 or pos + len(expected) > len(content):
+        return False
+    if loose:
+        return all(
+            a.strip() == b.strip() for a, b in zip(content[pos:pos + len(expected)], expected)
+        )
+    return content[pos:pos + len(expected)] == expected
+
+
+def _find(content: list[str], expected: list[str], hint: int, start: int) -> int:
+    """Find ``expected`` in ``content`` at or after ``start``, nearest ``hint``."""
+    for loose in (False, True):
+        if _matches(content, hint, expected, loose) and hint >= start:
+            return hint
+        for delta in range(1, len(content) + 1):
+            for pos in (hint - delta, hint + delta):
+                if pos >= start and _matches(content, pos, expected, loose):
+                    return pos
+            if hint - delta < start and hint + delta > len(content):
+                break
+    return -1
+
+
+def apply_hunks(content: list[str], hunks: list[Hunk], path: str) -> list[str]:
+    """Apply hunks to ``content`` lines, raising ``PatchError`` on failure."""
+    result = list(content)
+    offset = 0
+    floor = 0
+    for n, hunk in enumerate(hunks, 1):
+        old = hunk.old_lines
+        hint = max(0, hunk.old_start - 1 + offset) if hunk.old_start else floor
+        applied = False
+        for fuzz in range(MAX_FUZZ + 1):
+            lead = _leading_context(hunk, fuzz)
+            trail = _trailing_context(hunk, fuzz)
+            body = hunk.lines[lead:len(hunk.lines) - trail]
+            trimmed_old = [l[1:] for l in body if l[:1] in (" ", "-")]
+            if not trimmed_old and old:
+                break
+            pos = _find(result, trimmed_old, hint + lead, floor) if trimmed_old else min(hint, len(result))
+            if pos < 0:
+                continue
+            # Context lines keep the file's text, which may differ in whitespace
+            replacement: list[str] = []
+            cursor = pos
+            for l in body:
+                if l[:1] == " ":
+                    replacement.append(result[cursor])
+                    cursor += 1
+                elif l[:1] == "-":
+                    cursor += 1
+                else:
+                    replacement.append(l[1:])
+            result[pos:pos + len(trimmed_old)] = replacement
+            offset += len(replacement) - len(trimmed_old)
+            floor = pos + len(replacement)
+            applied = True
+            break
+        if not applied:
+            preview = "\n".join(f"    {l}" for l in old[:6])
+            raise PatchError(
+                f"{path}: hunk #{n} ({hunk.header}) does not apply near line "
+                f"{hint + 1}; expected lines not found:\n{preview}"
+            )
+    return result
+
+
+def _leading_context(hunk: Hunk, fuzz: int) -> int:
+    count = 0
+    for l in hunk.lines:
+        if l[:1] != " ":
+            break
+        count += 1
+    return min(count, fuzz)
+
+
+def _trailing_context(hunk: Hunk, fuzz: int) -> int:
+    count = 0
+    for l in reversed(hunk.lines):
+        if l[:1] != " ":
+            break
+        count += 1
+    return min(count, fuzz)
+
+
+def _atomic_write(path: str, text: str):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".taiyo-patch-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+        if os.path.exists(path):
+            os.chmod(tmp, os.stat(path).st_mode & 0o7777)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+class ApplyPatchTool(BaseTool):
+    name = "apply_patch"
+    description = (
+        "Apply a unified diff to one or more files. Cheaper than rewriting whole files. "
+        "All hunks must apply or no file is changed."
+    )
+
+    def __init__(self, cwd: str | None = None):
+        self.cwd = cwd or os.getcwd()
+
+    def get_schema(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "patch": {
+                    "type": "string",
+                    "description": "Unified diff with '--- a/path' / '+++ b/path' headers and '@@' hunks",
+                },
+            },
+            "required": ["patch"],
+        }
+
+    def _resolve(self, path: str) -> str:
+        path = os.path.expanduser(path)
+        if not os.path.isabs(path):
+            path = os.path.join(self.cwd, path)
+        return os.path.abspath(path)
+
+    async def execute(self, **kwargs: Any) -> ToolResult:
+        patch = kwargs.get("patch", "")
+
+        if not patch:
+            return ToolResult(error="No patch provided", is_error=True)
+
+        try:
+            file_patches = parse_patch(patch)
+
+            # Compute every result before touching disk so a bad hunk changes nothing
+            planned: dict[str, str | None] = {}
+            summary: list[str] = []
+            for fp in file_patches:
+                if fp.new_path is None:
+                    path = self._resolve(fp.old_path or "")
+                    if not os.path.isfile(path) or planned.get(path, "") is None:
+                        raise PatchError(f"Cannot delete missing file: {path}")
+                    planned[path] = None
+                    summary.append(f"deleted {path}")
+                    continue
+
+                path = self._resolve(fp.new_path)
+                if fp.old_path is None:
+                    if os.path.exists(path) or planned.get(path) is not None:
+                        raise PatchError(f"File already exists: {path}")
+                    content, newline, trailing = [], "\n", True
+                else:
+                    source = self._resolve(fp.old_path)
+                    if planned.get(source) is not None:
+                        # Same file patched earlier in this diff
+                        text = planned[source]
+                    elif os.path.isfile(source) and source not in planned:
+                        with open(source, "r", encoding="utf-8", newline="") as f:
+                            text = f.read()
+                    else:
+                        raise PatchError(f"File not found: {source}")
+                    newline = "\r\n" if "\r\n" in text else "\n"
+                    trailing = text.endswith("\n")
+                    content = split_lines(text)
+
+                new_content = apply_hunks(content, fp.hunks, path)
+                new_text = newline.join(new_content)
+                if new_content and trailing:
+                    new_text += newline
+                planned[path] = new_text
+                if fp.old_path is not None and source != path:
+                    planned[source] = None
+                added = sum(1 for h in fp.hunks for l in h.lines if l[:1] == "+")
+                removed = sum(1 for h in fp.hunks for l in h.lines if l[:1] == "-")
+                summary.append(f"patched {path} (+{added} -{removed})")
+
+            for path, new_text in planned.items():
+                if new_text is None:
+                    os.unlink(path)
+                else:
+                    _atomic_write(path, new_text)
+
+            return ToolResult(output="Patch applied:\n" + "\n".join(summary))
+
+        except PatchError as e:
+            return ToolResult(error=f"Patch rejected, no files changed. {e}", is_error=True)
+        except Exception as e:
+            return ToolResult(error=str(e), is_error=True)
@@ -0,0 +1,87 @@
+"""Semantic code search tool using local Ollama embeddings."""
+from __future__ import annotations
+import asyncio
+import os
+from typing import Any
+from .base import BaseTool, ToolResult
+from ..config import Config
+from ..semantic import OllamaEmbedder, SemanticIndex
+
+
+class SemanticSearchTool(BaseTool):
+    name = "semantic_search"
+    description = (
+        "Search the codebase by meaning using local embeddings. Returns the most relevant "
+        "file regions for a natural-language query."
+    )
+
+    def __init__(self, config: Config):
+        self.config = config
+        self._index: SemanticIndex | None = None
+
+    @property
+    def index(self) -> SemanticIndex | None:
+        """The index built so far, if any (for memory diagnostics)."""
+        return self._index
+
+    def get_schema(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "Natural-language description of the code to find",
+                },
+                "k": {
+                    "type": "integer",
+                    "description": "Number of results to return (default 8)",
+                    "default": 8,
+                },
+            },
+            "required": ["query"],
+        }
+
+    def _get_index(self) -> SemanticIndex:
+        root = os.path.abspath(self.config.working_dir)
+        index = self._index
+        if index is None or index.root != root or index.model != self.config.embed_model:
+            if index is not None:
+                asyncio.ensure_future(index.embed.close())
+            embedder = OllamaEmbedder(self.config.ollama_host, self.config.embed_model)
+            index = self._index = SemanticIndex(root, embedder, self.config.embed_model)
+        index.embed.host = self.config.ollama_host
+        return index
+
+    async def close(self):
+        if self._index is not None:
+            await self._index.embed.close()
+            self._index = None
+
+    async def execute(self, **kwargs: Any) -> ToolResult:
+        query = kwargs.get("query", "")
+        k = kwargs.get("k", 8)
+
+        if not query:
+            return ToolResult(error="No query provided", is_error=True)
+
+        try:
+            index = self._get_index()
+            results = await index.search(query, k=int(k))
+            if not results:
+                return ToolResult(output="No indexed content to search.")
+
+            lines = []
+            for score, chunk in results:
+                fpath = os.path.join(index.root, chunk.path)
+                lines.append(f"{fpath}:{chunk.start}-{chunk.end} (score {score:.3f})")
+                try:
+                    with open(fpath, "r", encoding="utf-8", errors="replace") as f:
+                        snippet = f.readlines()[chunk.start - 1:chunk.start + 2]
+                    for line in snippet:
+                        lines.append(f"    {line.rstrip()[:200]}")
+                except OSError:
+                    pass
+            return ToolResult(output="\n".join(lines))
+
+        except Exception as e:
+            return ToolResult(error=str(e), is_error=True)
@@ -0,0 +1,87 @@
+"""Symbol definition and reference lookup tool."""
+from __future__ import annotations
+import asyncio
+import os
+from typing import Any
+from .base import BaseTool, ToolResult
+from ..symbols import get_symbol_index
+
+
+class SymbolsTool(BaseTool):
+    name = "symbols"
+    description = (
+        "Look up code symbols using a workspace index. Find where a function/class is "
+        "defined, list what a file defines, or find references to a symbol - in one call."
+    )
+
+    def __init__(self, cwd: str | None = None):
+        self.cwd = cwd or os.getcwd()
+
+    def get_schema(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "action": {
+                    "type": "string",
+                    "enum": ["definition", "file", "references"],
+                    "description": "definition: where is NAME defined; file: symbols in FILE_PATH; references: who uses NAME",
+                    "default": "definition",
+                },
+                "name": {
+                    "type": "string",
+                    "description": "Symbol name, optionally qualified (e.g. 'OllamaClient.chat_stream')",
+                },
+                "file_path": {
+                    "type": "string",
+                    "description": "File to list symbols for (action=file)",
+                },
+            },
+        }
+
+    async def execute(self, **kwargs: Any) -> ToolResult:
+        name = kwargs.get("name", "")
+        file_path = kwargs.get("file_path", "")
+        action = kwargs.get("action") or ("file" if file_path and not name else "definition")
+
+        if action not in ("definition", "file", "references"):
+            return ToolResult(error=f"Unknown action: {action}", is_error=True)
+        if action == "file" and not file_path:
+            return ToolResult(error="No file path provided", is_error=True)
+        if action != "file" and not name:
+            return ToolResult(error="No symbol name provided", is_error=True)
+
+        index = get_symbol_index(self.cwd)
+        try:
+            await asyncio.to_thread(index.refresh)
+
+            if action == "definition":
+                found = index.definitions(name)
+                if not found:
+                    return ToolResult(output=f"No definition found for: {name}")
+                lines = [
+                    f"{os.path.join(index.root, s.path)}:{s.line}: {s.kind} {s.qualname}"
+                    for s in found
+                ]
+                return ToolResult(output="\n".join(lines))
+
+            if action == "file":
+                file_path = os.path.expanduser(file_path)
+                if not os.path.isabs(file_path):
+                    file_path = os.path.join(self.cwd, file_path)
+                found = index.file_symbols(file_path)
+                if not found:
+                    return ToolResult(output=f"No symbols indexed for: {file_path}")
+                lines = []
+                for s in found:
+                    indent = "  " * s.parent.count(".") + ("  " if s.parent else "")
+                    lines.append(f"{s.line:>6}\t{indent}{s.kind} {s.name}")
+                return ToolResult(output="\n".join(lines))
+
+            refs = await asyncio.to_thread(index.references, name)
+            if not refs:
+                return ToolResult(output=f"No references found for: {name}")
+            lines = [f"{os.path.join(index.root, rel)}:{ln}: {text}" for rel, ln, text in refs]
+            return ToolResult(output="\n".join(lines))
+
+        except Exception as e:
+            return ToolResult(error=str(e), is_error=True)
@@ -0,0 +1,109 @@
+"""Sub-agent tool: fan independent investigations out to concurrent conversations."""
+from __future__ import annotations
+import asyncio
+from dataclasses import replace
+from typing import Any
+from .base import BaseTool, ToolResult
+from ..config import Config
+
+# Tools a sub-agent may use; none of them change the workspace
+SUBAGENT_TOOLS = ("read", "grep", "glob", "symbols", "semantic_search", "web_search")
+# Sub-tasks accepted per call
+MAX_TASKS = 8
+# Characters of each sub-agent's answer kept in the parent history
+MAX_ANSWER_CHARS = 2000
+
+SUBAGENT_PROMPT = """You are a research sub-agent of a coding assistant. You get one self-contained question about the codebase and answer it by calling tools. You cannot modify files or run commands.
+
+To call a tool, output ONLY a JSON object: {"name": "tool_name", "arguments": {...}}
+
+Available tools: read, grep, glob, symbols, semantic_search, web_search.
+
+When you have the answer, reply with plain text only: a concise summary (at most about 200 words) with file paths and line numbers for everything you cite. Do not describe how you searched."""
+
+
+class TaskTool(BaseTool):
+    name = "task"
+    description = (
+        "Delegate independent research questions to sub-agents that run concurrently with "
+        "read-only tools. Returns each sub-agent's concise answer."
+    )
+
+    def __init__(self, config: Config, tools: list[BaseTool], http_client=None):
+        # The calling conversation's config: model, context size, limits
+        self.config = config
+        # Shared with the parent so sub-agents reuse its caches and indexes
+        self.tools = [t for t in tools if t.name in SUBAGENT_TOOLS]
+        # The parent's connection pool; sub-agents open no connections of their own
+        self.http_client = http_client
+        # One limit for every call of this tool, across conversations sharing it
+        self._slots = asyncio.Semaphore(config.subagent_concurrency)
+
+    def get_schema(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "tasks": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": (
+                        f"Up to {MAX_TASKS} self-contained questions, one per sub-agent "
+                        "(e.g. 'Where are auth tokens validated? List files and functions.')"
+                    ),
+                },
+            },
+            "required": ["tasks"],
+        }
+
+    async def execute(self, **kwargs: Any) -> ToolResult:
+        tasks = kwargs.get("tasks") or []
+        if isinstance(tasks, str):
+            tasks = [tasks]
+        tasks = [str(t).strip() for t in tasks if str(t).strip()]
+
+        if not tasks:
+            return ToolResult(error="No tasks provided", is_error=True)
+        if len(tasks) > MAX_TASKS:
+            return ToolResult(error=f"At most {MAX_TASKS} tasks per call (got {len(tasks)})", is_error=True)
+
+        answers = await asyncio.gather(*(self._run(task) for task in tasks), return_exceptions=True)
+        sections = []
+        failed = 0
+        for i, (task, answer) in enumerate(zip(tasks, answers), 1):
+            if isinstance(answer, BaseException):
+                failed += 1
+                answer = f"Error: {str(answer) or type(answer).__name__}"
+            sections.append(f"## Task {i}: {task.splitlines()[0][:120]}\n{answer}")
+        output = "\n\n".join(sections)
+        if failed == len(tasks):
+            return ToolResult(error=output, is_error=True)
+        return ToolResult(output=output)
+
+    async def _run(self, task: str) -> str:
+        from ..api import OllamaClient
+
+        config = replace(
+            self.config, system_prompt=SUBAGENT_PROMPT,
+            max_tool_rounds=self.config.subagent_rounds, max_tool_rounds_cap=self.config.subagent_rounds,
+        )
+        async with self._slots:
+            client = OllamaClient(config, self.tools, http_client=self.http_client)
+            try:
+                parts: list[str] = []
+                stopped = 0
+                async for chunk in client.chat_stream(task):
+                    if chunk["type"] == "text":
+                        parts.append(chunk["content"])
+                    elif chunk["type"] == "tool_call":
+                        # Only the text after the last tool call is the answer
+                        parts = []
+                    elif chunk["type"] in ("round_limit", "loop"):
+                        stopped = chunk["rounds"]
+            finally:
+                await client.close()
+        text = "".join(parts).strip()
+        if len(text) > MAX_ANSWER_CHARS:
+            text = text[:MAX_ANSWER_CHARS] + " [...]"
+        if stopped:
+            text = f"(stopped after {stopped} tool rounds) {text}".strip()
+        return text or "(no answer)"
@@ -1,12 +1,26 @@
-"""Web search placeholder tool."""
+"""Offline documentation search tool."""
 from __future__ import annotations
+import asyncio
+import os
 from typing import Any
 from .base import BaseTool, ToolResult
+from ..docsearch import DocIndex
+
+SOURCES = ("python", "project", "man")
 
 
 class WebSearchTool(BaseTool):
     name = "web_search"
-    description = "Search the web for information. (Placeholder - requires internet)"
+    description = (
+        "Search offline documentation: docstrings and descriptions of installed Python "
+        "packages, project Markdown docs and man pages. (No internet access.)"
+    )
+
+    def __init__(self, cwd: str | None = None, python: dict | None = None):
+        self.cwd = cwd or os.getcwd()
+        # Interpreter whose packages are indexed (see ``DocIndex``); None: this one
+        self.python = python
+        self._index: DocIndex | None = None
 
     def get_schema(self) -> dict[str, Any]:
         return {
@@ -16,12 +30,54 @@ class WebSearchTool(BaseTool):
                     "type": "string",
                     "description": "Search query",
                 },
+                "source": {
+                    "type": "string",
+                    "enum": ["all", "python", "project", "man"],
+                    "description": "Restrict results to one documentation source (default: all)",
+                    "default": "all",
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "Maximum number of results (default 8)",
+                    "default": 8,
+                },
             },
             "required": ["query"],
         }
 
     async def execute(self, **kwargs: Any) -> ToolResult:
         query = kwargs.get("query", "")
-        return ToolResult(
-            output=f"Web search is not available in local mode. Query: {query}"
-        )
+        source = kwargs.get("source", "all")
+        limit = kwargs.get("limit", 8)
+
+        if not query:
+            return ToolResult(error="No query provided", is_error=True)
+        if source != "all" and source not in SOURCES:
+            return ToolResult(error=f"Unknown source: {source}", is_error=True)
+
+        if self._index is None or self._index.working_dir != os.path.abspath(self.cwd):
+            self._index = DocIndex(self.cwd, python=self.python)
+
+        try:
+            kinds = None if source == "all" else {source}
+            results = await asyncio.to_thread(self._index.search, query, int(limit), kinds)
+            note = ""
+            if self._index.building:
+                ready, total = self._index.progress
+                note = (
+                    f"(Documentation index still building: {ready} of {total} sources ready; "
+                    "results may be incomplete.)"
+                )
+            if self._index.error:
+                note = "\n".join(filter(None, [note, f"(Documentation index {self._index.error}; kept in memory only.)"]))
+            if not results:
+                return ToolResult(output="\n".join(filter(None, [f"No documentation found for: {query}", note])))
+
+            lines = [note] if note else []
+            for score, kind, (title, location, snippet) in results:
+                lines.append(f"[{kind}] {title}  ({location})")
+                lines.append(f"    {snippet}")
+            return ToolResult(output="\n".join(lines))
+
+        except Exception as e:
+            return ToolResult(error=str(e), is_error=True)
@@ -9,6 +9,9 @@ class WriteTool(BaseTool):
     name = "write"
     description = "Write content to a file. Creates the file if it doesn't exist, overwrites if it does."
 
+    def __init__(self, cwd: str | None = None):
+        self.cwd = cwd or os.getcwd()
+
     def get_schema(self) -> dict[str, Any]:
         return {
             "type": "object",
@@ -34,7 +37,7 @@ class WriteTool(BaseTool):
 
         file_path = os.path.expanduser(file_path)
         if not os.path.isabs(file_path):
-            file_path = os.path.abspath(file_path)
+            file_path = os.path.abspath(os.path.join(self.cwd, file_path))
 
         try:
             os.makedirs(os.path.dirname(file_path), exist_ok=True)
@@ -0,0 +1,289 @@
+"""Per-turn tracing in Chrome trace event format, plus session statistics.
+
+Spans are written to ``.taiyo/traces/<session>.jsonl``, one trace event per
+line. ``to_chrome_trace`` (or ``python -m src.tracing <file>``) wraps them
+into a JSON document that chrome://tracing and ui.perfetto.dev can open.
+"""
+from __future__ import annotations
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from .session import new_session_id
+
+# Buffered events are written once this many have accumulated (and on flush)
+FLUSH_EVENTS = 256
+# Most recent durations kept per span name for the percentiles in ``stats``
+SAMPLE_SIZE = 1024
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[rank]
+
+
+class _Latency:
+    """Rolling aggregate of one span name: exact count and total, recent sample."""
+
+    __slots__ = ("count", "total_ms", "recent")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.recent: deque[float] = deque(maxlen=SAMPLE_SIZE)
+
+    def add(self, ms: float):
+        self.count += 1
+        self.total_ms += ms
+        self.recent.append(ms)
+
+    def summary(self) -> dict:
+        recent = list(self.recent)
+        return {
+            "count": self.count,
+            "p50_ms": percentile(recent, 50),
+            "p95_ms": percentile(recent, 95),
+            "total_ms": self.total_ms,
+        }
+
+
+class Tracer:
+    """Records complete ("X") trace events for model requests, tools and rendering.
+
+    ``span`` is a context manager yielding a dict; whatever the caller puts
+    in it becomes the event's ``args``. Events are appended to the trace
+    file in batches and dropped once written; ``stats`` is served from
+    rolling per-name aggregates, so a long session holds a bounded amount.
+    """
+
+    def __init__(self, working_dir: str, session_id: str | None = None):
+        self.dir = os.path.join(working_dir, ".taiyo", "traces")
+        self.session_id = session_id or new_session_id()
+        self.path = os.path.join(self.dir, f"{self.session_id}.jsonl")
+        # Events not yet written to the trace file
+        self.events: list[dict] = []
+        self._latency: dict[str, _Latency] = {}
+        self._tools: dict[str, _Latency] = {}
+        self._models: dict[str, dict] = {}
+        self._totals = {
+            "eval_count": 0, "eval_duration": 0, "prompt_eval_count": 0, "prompt_eval_duration": 0,
+            "loop_stops": 0, "rounds_saved": 0, "round_extensions": 0, "escalations": 0,
+        }
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+        atexit.register(self.flush)
+
+    def now_us(self) -> float:
+        return (time.perf_counter() - self._origin) * 1e6
+
+    @contextmanager
+    def span(self, name: str, cat: str, **args):
+        start = self.now_us()
+        try:
+            yield args
+        finally:
+            self.add(name, cat, start, self.now_us() - start, args)
+
+    def add(self, name: str, cat: str, start_us: float, dur_us: float, args: dict | None = None):
+        event = {
+            "name": name, "cat": cat, "ph": "X",
+            "ts": round(start_us, 1), "dur": round(dur_us, 1),
+            "pid": self._pid, "tid": threading.get_ident() % 100000,
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            self.events.append(event)
+            self._aggregate(name, cat, event["dur"] / 1000, args or {})
+            pending = len(self.events)
+        if pending >= FLUSH_EVENTS:
+            self.flush()
+
+    def _aggregate(self, name: str, cat: str, ms: float, args: dict):
+        if name not in self._latency:
+            self._latency[name] = _Latency()
+        self._latency[name].add(ms)
+        if cat == "tool":
+            if name not in self._tools:
+                self._tools[name] = _Latency()
+            self._tools[name].add(ms)
+        totals = self._totals
+        if name == "request":
+            for key in ("eval_count", "eval_duration", "prompt_eval_count", "prompt_eval_duration"):
+                totals[key] += args.get(key, 0)
+            usage = self._usage(args.get("model", "?"))
+            num_ctx = args.get("num_ctx", 0)
+            if num_ctx:
+                # Each change of num_ctx makes Ollama load the model again
+                usage["resizes"] += bool(usage["num_ctx"]) and num_ctx != usage["num_ctx"]
+                usage["num_ctx"] = num_ctx
+            usage["requests"] += 1
+            usage["prompt_tokens"] += args.get("prompt_eval_count", 0)
+            usage["generated_tokens"] += args.get("eval_count", 0)
+            usage["total_ms"] += ms
+        elif name == "discarded":
+            # A fast-model reply thrown away and asked again of the main model
+            usage = self._usage(args.get("model", "?"))
+            usage["discarded"] += 1
+            usage["discarded_tokens"] += args.get("eval_count", 0)
+            usage["discarded_ms"] += ms
+        elif name == "turn":
+            totals["loop_stops"] += bool(args.get("stuck"))
+            totals["rounds_saved"] += args.get("rounds_saved", 0)
+            totals["round_extensions"] += args.get("extensions", 0)
+            totals["escalations"] += bool(args.get("escalation"))
+
+    def _usage(self, model: str) -> dict:
+        if model not in self._models:
+            self._models[model] = {
+                "requests": 0, "prompt_tokens": 0, "generated_tokens": 0, "total_ms": 0.0,
+                "num_ctx": 0, "resizes": 0, "discarded": 0, "discarded_tokens": 0, "discarded_ms": 0.0,
+            }
+        return self._models[model]
+
+    def add_model_phases(self, request_start_us: float, request_dur_us: float, response: dict):
+        """Split a request span into Ollama's load / prompt eval / generation phases.
+
+        Ollama reports the durations (ns) but not when each phase started;
+        they run back to back and end with the response, so the phases are
+        laid out ending at the end of the request span.
+        """
+        phases = [
+            ("model.load", response.get("load_duration", 0)),
+            ("model.prompt_eval", response.get("prompt_eval_duration", 0)),
+            ("model.generate", response.get("eval_duration", 0)),
+        ]
+        cursor = request_start_us + request_dur_us - sum(ns for _, ns in phases) / 1000
+        cursor = max(cursor, request_start_us)
+        for name, ns in phases:
+            if ns:
+                self.add(name, "model", cursor, ns / 1000)
+                cursor += ns / 1000
+
+    def flush(self):
+        with self._lock:
+            pending, self.events = self.events, []
+        if not pending:
+            return
+        try:
+            os.makedirs(self.dir, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(e, separators=(",", ":")) + "\n" for e in pending))
+        except OSError:
+            pass
+
+    def close(self):
+        self.flush()
+        atexit.unregister(self.flush)
+
+    # -- statistics ----------------------------------------------------------
+
+    def stats(self) -> dict:
+        """Summarize the session: latencies, token rates and time per tool."""
+        with self._lock:
+            def latency(name: str) -> dict:
+                return self._latency.get(name, _Latency()).summary()
+
+            totals = dict(self._totals)
+            eval_tokens, eval_ns = totals["eval_count"], totals["eval_duration"]
+            prompt_tokens, prompt_ns = totals["prompt_eval_count"], totals["prompt_eval_duration"]
+            return {
+                "turn": latency("turn"),
+                "loop_stops": totals["loop_stops"],
+                "rounds_saved": totals["rounds_saved"],
+                "round_extensions": totals["round_extensions"],
+                "escalations": totals["escalations"],
+                "models": {model: dict(usage) for model, usage in self._models.items()},
+                "request": latency("request"),
+                "model.load": latency("model.load"),
+                "parse": latency("parse"),
+                "render": latency("render"),
+                "generated_tokens": eval_tokens,
+                "generate_tok_s": eval_tokens / (eval_ns / 1e9) if eval_ns else 0.0,
+                "prompt_tokens": prompt_tokens,
+                "prompt_tok_s": prompt_tokens / (prompt_ns / 1e9) if prompt_ns else 0.0,
+                "tools": {
+                    name: agg.summary()
+                    for name, agg in sorted(self._tools.items(), key=lambda kv: -kv[1].total_ms)
+                },
+            }
+
+
+def format_stats(stats: dict) -> list[str]:
+    """Render ``Tracer.stats()`` as plain text lines for the front-ends."""
+    lines = []
+    for key, label in (("turn", "turns"), ("request", "model requests"), ("model.load", "model loads"),
+                       ("parse", "tool-call parsing"), ("render", "rendering")):
+        s = stats[key]
+        if s["count"]:
+            lines.append(
+                f"{label:<18} n={s['count']:<4} p50 {s['p50_ms']:8.1f} ms  "
+                f"p95 {s['p95_ms']:8.1f} ms  total {s['total_ms'] / 1000:7.2f} s"
+            )
+    if stats["loop_stops"] or stats["round_extensions"]:
+        lines.append(
+            f"{'agent loop':<18} {stats['loop_stops']} turns stopped as stuck, "
+            f"{stats['rounds_saved']} rounds saved, {stats['round_extensions']} budget extensions"
+        )
+    for model, usage in stats["models"].items():
+        if usage["num_ctx"]:
+            lines.append(f"{'context':<18} {model}: num_ctx {usage['num_ctx']}, {usage['resizes']} resizes")
+    if len(stats["models"]) > 1 or stats["escalations"]:
+        for model, usage in stats["models"].items():
+            lines.append(
+                f"model {model:<12} n={usage['requests']:<4} prompt {usage['prompt_tokens']:>7} tok  "
+                f"generated {usage['generated_tokens']:>6} tok  total {usage['total_ms'] / 1000:7.2f} s"
+            )
+            if usage["discarded"]:
+                lines.append(
+                    f"{'  discarded':<18} n={usage['discarded']:<4} {'':<18} "
+                    f"generated {usage['discarded_tokens']:>6} tok  total {usage['discarded_ms'] / 1000:7.2f} s"
+                )
+        if stats["escalations"]:
+            lines.append(f"{'routing':<18} {stats['escalations']} turns escalated to the main model")
+    if stats["generated_tokens"]:
+        lines.append(
+            f"{'generation':<18} {stats['generated_tokens']} tokens at {stats['generate_tok_s']:.1f} tok/s"
+        )
+    if stats["prompt_tokens"]:
+        lines.append(
+            f"{'prompt eval':<18} {stats['prompt_tokens']} tokens at {stats['prompt_tok_s']:.1f} tok/s"
+        )
+    for name, s in stats["tools"].items():
+        lines.append(
+            f"tool {name:<13} n={s['count']:<4} p50 {s['p50_ms']:8.1f} ms  "
+            f"p95 {s['p95_ms']:8.1f} ms  total {s['total_ms'] / 1000:7.2f} s"
+        )
+    return lines
+
+
+def to_chrome_trace(path: str) -> dict:
+    """Load a ``.jsonl`` trace file as a Chrome trace / Perfetto document."""
+    events = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                continue
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("usage: python -m src.tracing <trace.jsonl> [out.json]")
+    document = to_chrome_trace(sys.argv[1])
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], "w", encoding="utf-8") as out:
+            json.dump(document, out)
+    else:
+        json.dump(document, sys.stdout)
@@ -0,0 +1,50 @@
+"""Shared animation clock for status indicators."""
+from __future__ import annotations
+import asyncio
+from typing import Callable
+
+FrameCallback = Callable[[int], None]
+
+
+class AnimationClock:
+    """Single asyncio-driven ticker shared by every animated indicator.
+
+    Indicators ``subscribe`` a callback that receives the frame number on
+    each tick. The clock runs one task on the current event loop only while
+    at least one callback is subscribed, so an idle front-end has no timer
+    wakeups. Callbacks run on the event loop thread, alongside all other
+    output, so they never race with streamed text.
+    """
+
+    def __init__(self, interval: float = 0.15):
+        self.interval = interval
+        self.frame = 0
+        self._subscribers: list[FrameCallback] = []
+        self._task: asyncio.Task | None = None
+
+    def subscribe(self, callback: FrameCallback):
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def unsubscribe(self, callback: FrameCallback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    @property
+    def active(self) -> bool:
+        return bool(self._subscribers)
+
+    async def _run(self):
+        while self._subscribers:
+            await asyncio.sleep(self.interval)
+            self.frame += 1
+            for callback in list(self._subscribers):
+                try:
+                    callback(self.frame)
+                except Exception:
+                    self.unsubscribe(callback)
@@ -0,0 +1,70 @@
+"""Incremental Markdown parsing for streamed assistant output."""
+from __future__ import annotations
+
+from rich.markdown import Markdown
+
+FENCE_MARKERS = ("```", "~~~")
+
+
+class IncrementalMarkdown:
+    """Markdown document built from streamed text.
+
+    Text is split into top-level blocks at blank lines outside fenced code.
+    Each completed block is parsed exactly once and handed to the caller,
+    which can render it once and keep the result; only the unfinished
+    trailing block is re-parsed on every frame.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._block_start = 0  # offset where the unfinished block begins
+        self._scan_pos = 0  # offset of the first line not yet scanned
+        self._fence = ""  # open fence marker, e.g. "```"
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    def append(self, text: str) -> list[Markdown]:
+        """Add streamed text; return blocks completed by it."""
+        self._text += text
+        completed: list[Markdown] = []
+        text = self._text
+        while True:
+            newline = text.find("\n", self._scan_pos)
+            if newline < 0:
+                return completed
+            line_start = self._scan_pos
+            self._scan_pos = newline + 1
+            stripped = text[line_start:newline].strip()
+
+            if self._fence:
+                if stripped.startswith(self._fence) and not stripped.strip(self._fence[0]):
+                    self._fence = ""
+                    self._close_block(self._scan_pos, completed)
+            elif stripped.startswith(FENCE_MARKERS):
+                # A fence starts a new block; close whatever preceded it
+                self._close_block(line_start, completed)
+                marker = stripped[0]
+                self._fence = marker * (len(stripped) - len(stripped.lstrip(marker)))
+            elif not stripped:
+                self._close_block(self._scan_pos, completed)
+
+    def _close_block(self, end: int, completed: list[Markdown]):
+        source = self._text[self._block_start:end]
+        if source.strip():
+            completed.append(Markdown(source))
+        self._block_start = end
+
+    def tail(self) -> Markdown | None:
+        """Parse the unfinished trailing block, if any."""
+        source = self._text[self._block_start:]
+        return Markdown(source) if source.strip() else None
+
+    def finish(self) -> list[Markdown]:
+        """Treat the trailing text as complete; return the final block(s)."""
+        completed: list[Markdown] = []
+        self._fence = ""
+        self._scan_pos = len(self._text)
+        self._close_block(len(self._text), completed)
+        return completed
@@ -0,0 +1,168 @@
+"""Virtualized chat transcript for the TUI."""
+from __future__ import annotations
+import bisect
+from dataclasses import dataclass
+from typing import Callable
+
+from textual.containers import VerticalScroll
+from textual.widget import Widget
+from textual.widgets import Static
+
+
+@dataclass
+class TranscriptRecord:
+    """A transcript entry; cheap to keep for every message in a session."""
+    role: str
+    content: str
+    height: int = 0  # rows incl. margin; estimated until first measured
+    widget: Widget | None = None
+    # A streamed reply; mounted again it is re-parsed from ``content``
+    streamed: bool = False
+
+
+class Transcript(VerticalScroll):
+    """Scrollable transcript that only mounts widgets near the viewport.
+
+    Messages are stored as ``TranscriptRecord`` objects. Widgets are created
+    with ``widget_factory`` for records within ``WINDOW_MARGIN`` screens of
+    the visible area and removed again once they scroll out of it; two
+    spacers stand in for the off-screen records so the scrollbar stays
+    accurate. Widgets mounted directly with ``mount()`` (the live thinking
+    indicator or streaming reply) stay below the records.
+    """
+
+    DEFAULT_CSS = """
+    Transcript > .transcript-spacer {
+        height: 0;
+    }
+    """
+
+    # How many screens above and below the viewport keep their widgets
+    WINDOW_MARGIN = 1.0
+
+    def __init__(self, *children: Widget, widget_factory: Callable[[TranscriptRecord], Widget], **kwargs):
+        self._top_spacer = Static(classes="transcript-spacer")
+        self._bottom_spacer = Static(classes="transcript-spacer")
+        super().__init__(*children, self._top_spacer, self._bottom_spacer, **kwargs)
+        self._widget_factory = widget_factory
+        self.records: list[TranscriptRecord] = []
+        self._sync_pending = False
+        # True while the view is pinned to the newest message
+        self._following = True
+
+    # -- public API ----------------------------------------------------------
+
+    def add(self, role: str, content: str) -> TranscriptRecord:
+        record = TranscriptRecord(role=role, content=content)
+        record.height = self._estimate_height(record)
+        self.records.append(record)
+        self._schedule_sync()
+        return record
+
+    def clear(self):
+        for record in self.records:
+            if record.widget is not None:
+                record.widget.remove()
+        self.records.clear()
+        for child in list(self.children):
+            if child.has_class("transcript-live"):
+                child.remove()
+        self._top_spacer.styles.height = 0
+        self._bottom_spacer.styles.height = 0
+        self._following = True
+
+    def adopt(self, widget: Widget, role: str, content: str) -> TranscriptRecord:
+        """Keep a finished live widget, still mounted, as the newest record."""
+        widget.remove_class("transcript-live")
+        record = TranscriptRecord(role=role, content=content, widget=widget)
+        record.height = self._estimate_height(record)
+        self.records.append(record)
+        self.move_child(widget, before=self._bottom_spacer)
+        self._schedule_sync()
+        return record
+
+    def mount_live(self, widget: Widget):
+        """Mount a transient widget below every record."""
+        widget.add_class("transcript-live")
+        return self.mount(widget)
+
+    @property
+    def mounted_count(self) -> int:
+        return sum(1 for r in self.records if r.widget is not None)
+
+    # -- windowing -----------------------------------------------------------
+
+    def _estimate_height(self, record: TranscriptRecord) -> int:
+        width = max(20, (self.size.width or 80) - 8)
+        rows = sum(max(1, -(-len(line) // width)) for line in record.content.split("\n"))
+        return rows + (1 if record.role == "user" else 2) + 1
+
+    def _schedule_sync(self):
+        if not self._sync_pending:
+            self._sync_pending = True
+            self.call_after_refresh(self._sync)
+
+    def watch_scroll_y(self, old_value: float, new_value: float) -> None:
+        super().watch_scroll_y(old_value, new_value)
+        self._following = new_value >= self.max_scroll_y - 1
+        if round(old_value) != round(new_value):
+            self._schedule_sync()
+
+    def on_resize(self):
+        # Wrapping changed: re-estimate records that have no widget to measure
+        for record in self.records:
+            if record.widget is None:
+                record.height = self._estimate_height(record)
+        self._schedule_sync()
+
+    def _measure(self, record: TranscriptRecord):
+        widget = record.widget
+        if widget is None or not widget.is_mounted or not widget.outer_size.height:
+            return
+        margin = widget.styles.margin
+        record.height = widget.outer_size.height + margin.top + margin.bottom
+
+    def _sync(self):
+        self._sync_pending = False
+        if not self.is_mounted:
+            return
+        for record in self.records:
+            if record.widget is not None:
+                self._measure(record)
+
+        ends: list[int] = []
+        total = 0
+        for record in self.records:
+            total += record.height
+            ends.append(total)
+
+        # Records start below any fixed header widgets (logo, welcome text)
+        origin = self._top_spacer.virtual_region.y if self._top_spacer.is_mounted else 0
+        margin = int(self.size.height * self.WINDOW_MARGIN)
+        top = self.scroll_y - origin - margin
+        bottom = self.scroll_y - origin + self.size.height + margin
+        first = bisect.bisect_right(ends, max(0, top))
+        last = min(len(self.records), bisect.bisect_left(ends, bottom) + 1)
+
+        for i, record in enumerate(self.records):
+            if record.widget is not None and not first <= i < last:
+                record.widget.remove()
+                record.widget = None
+
+        anchor: Widget = self._top_spacer
+        mounted_new = False
+        for record in self.records[first:last]:
+            if record.widget is None:
+                record.widget = self._widget_factory(record)
+                self.mount(record.widget, after=anchor)
+                mounted_new = True
+            anchor = record.widget
+
+        self._top_spacer.styles.height = ends[first - 1] if first else 0
+        self._bottom_spacer.styles.height = total - (ends[last - 1] if last else 0)
+        if self._following:
+            # Heights were corrected; stay pinned to the newest message
+            self.call_after_refresh(self.scroll_end, animate=False)
+        if mounted_new:
+            # Measure the new widgets once they have been laid out
+            self._schedule_sync()